@@ -1,50 +1,31 @@
 """Originally based on the frim1’s (for "Fractal Images") good-old-`C` code circa 1995."""
 
-import colorsys
+import decimal
 import math
-import random
+import numpy as np
+import numpy.typing as npt
+import threading
 import tkinter as tk
 from tkinter.font import Font
 
-from formatting import format_float
+from fractals_background import BackgroundRender, RenderedTile, default_band_rows, \
+    get_cached_and_parallel_tiles_generator, worker_context
+from fractals_cache import TileCache, default_cache_tile_shape, get_cached_and_missing_tiles, \
+    get_iterations_with_cache, get_tile_key
+from fractals_colors import TupleOf3Floats, colorize, generate_array_colors, generate_rgb_palette, hsv2rgb, to_str
+from fractals_deepening import DeepeningRenderer
+from fractals_engine import CancellationToken, FractalKind, FractalView, IterationsArray, Tile, \
+    generate_progressive_iterations, get_int_colors, get_tiles
+from fractals_io import get_ppm_bytes
+from fractals_lattice import LatticeRenderer, get_zoomed_view
+from fractals_parallel import generate_iterations_in_parallel
+from fractals_perturbation import DeepZoomView, generate_iterations_by_perturbation, get_iterations_by_perturbation
+from fractals_precision import ArbitraryPrecisionView, default_precision_tile_shape, \
+    get_iterations_in_arbitrary_precision, get_ulps_per_pixel, needs_arbitrary_precision
+from fractals_rectangles import get_color_rectangles
+from fractals_subdivision import get_iterations_by_subdivision
 from timer import Timer
-from typing import Final, TypeAlias
-
-
-TupleOf3Ints: TypeAlias = tuple[int, int, int]
-TupleOf3Floats: TypeAlias = tuple[float, float, float]
-
-
-def get_random_rgb() -> TupleOf3Floats:
-    return random.random(), random.random(), random.random()
-
-
-def hsv2rgb(hsv: TupleOf3Floats) -> TupleOf3Floats:
-    """Converts a color specification from the hsv model to the rgb model. As input, h ranges from 0. to 360. (not
-    included), and s and v range from 0 to 1. [Baker]328.-"""
-    (h, s, v) = hsv
-    return colorsys.hsv_to_rgb(h/360., s, v)  # h must be normalized for the call to this particular function
-
-
-def to_str(rgb: TupleOf3Floats) -> str:
-    return '(' + format_float(rgb[0]) + ', ' + format_float(rgb[1]) + ', ' + format_float(rgb[2]) + ')'
-
-
-def rgb_to_hex(rgb: TupleOf3Floats) -> str:
-    return '#{:02x}{:02x}{:02x}'.format(int(rgb[0]*255), int(rgb[1]*255), int(rgb[2]*255))
-
-
-def generate_array_colors(num_colors: int, step_colors: int, card_s: int, card_v: int) -> tuple[str, ...]:
-    """We reserve num_colors + 1 entries to save in position 0 the color associated with 'no finished iterations'
-    state."""
-    array_colors: list[str] = [rgb_to_hex((0., 0., 0.))]
-    for i in range(0, num_colors):
-        h = ((i * step_colors) % num_colors) * (360. / num_colors)
-        s = (i % card_s + 1.)/card_s if card_s > 0 else 0.
-        v = (i % card_v + 1.)/card_v if card_v > 0 else (i+1.)/num_colors  # else -> gray scale
-        rgb = hsv2rgb((h, s, v))
-        array_colors.append(rgb_to_hex(rgb))
-    return tuple(array_colors)
+from typing import Final, Generator, Iterator
 
 
 def singleton(cls):
@@ -67,7 +48,10 @@ class CommonVars:
                 a_k_max: tk.IntVar, a_c_max: tk.IntVar, a_step_colors: tk.IntVar,
                 a_card_s: tk.Scale, a_card_v: tk.Scale,
                 a_res_xy: tuple[tk.IntVar, tk.IntVar],
-                a_use_photo_image: tk.BooleanVar) -> 'CommonVars':
+                a_use_photo_image: tk.BooleanVar, a_merge_rectangles: tk.BooleanVar, a_progressive: tk.BooleanVar,
+                a_subdivision: tk.BooleanVar, a_interior_checks: tk.BooleanVar,
+                a_deepening: tk.BooleanVar, a_lattice_reuse: tk.BooleanVar, a_deep_zoom: tk.BooleanVar,
+                a_background: tk.BooleanVar, a_progress: tk.StringVar) -> 'CommonVars':
         return object.__new__(cls)
 
     def __init__(self,
@@ -75,7 +59,10 @@ class CommonVars:
                  a_k_max: tk.IntVar, a_c_max: tk.IntVar, a_step_colors: tk.IntVar,
                  a_card_s: tk.Scale, a_card_v: tk.Scale,
                  a_res_xy: tuple[tk.IntVar, tk.IntVar],
-                 a_use_photo_image: tk.BooleanVar) -> None:
+                 a_use_photo_image: tk.BooleanVar, a_merge_rectangles: tk.BooleanVar, a_progressive: tk.BooleanVar,
+                 a_subdivision: tk.BooleanVar, a_interior_checks: tk.BooleanVar,
+                 a_deepening: tk.BooleanVar, a_lattice_reuse: tk.BooleanVar, a_deep_zoom: tk.BooleanVar,
+                 a_background: tk.BooleanVar, a_progress: tk.StringVar) -> None:
         self.magnitude = a_magnitude
         self.k_max = a_k_max
         self.c_max = a_c_max
@@ -84,6 +71,15 @@ class CommonVars:
         self.card_v = a_card_v
         self.res_xy = a_res_xy[0], a_res_xy[1]
         self.use_photo_image = a_use_photo_image
+        self.merge_rectangles = a_merge_rectangles
+        self.progressive = a_progressive
+        self.subdivision = a_subdivision
+        self.interior_checks = a_interior_checks
+        self.deepening = a_deepening
+        self.lattice_reuse = a_lattice_reuse
+        self.deep_zoom = a_deep_zoom
+        self.background = a_background
+        self.progress = a_progress
 
 
 @singleton
@@ -107,189 +103,481 @@ class JuliaSetVars:
 class MandelbrotSetVars:
     def __new__(cls,
                 a_p_min_max: tuple[tk.DoubleVar, tk.DoubleVar],
-                a_q_min_max: tuple[tk.DoubleVar, tk.DoubleVar]) -> 'MandelbrotSetVars':
+                a_q_min_max: tuple[tk.DoubleVar, tk.DoubleVar],
+                a_deep_zoom_center: tuple[tk.StringVar, tk.StringVar],  # decimal strings, with all their digits
+                a_deep_zoom_width: tk.StringVar) -> 'MandelbrotSetVars':
         return object.__new__(cls)
 
     def __init__(self,
                  a_p_min_max: tuple[tk.DoubleVar, tk.DoubleVar],
-                 a_q_min_max: tuple[tk.DoubleVar, tk.DoubleVar]) -> None:
+                 a_q_min_max: tuple[tk.DoubleVar, tk.DoubleVar],
+                 a_deep_zoom_center: tuple[tk.StringVar, tk.StringVar],
+                 a_deep_zoom_width: tk.StringVar) -> None:
         self.p_min_max = a_p_min_max[0], a_p_min_max[1]
         self.q_min_max = a_q_min_max[0], a_q_min_max[1]
+        self.deep_zoom_center = a_deep_zoom_center[0], a_deep_zoom_center[1]
+        self.deep_zoom_width = a_deep_zoom_width
 
 
-def go_julia(common_vars: CommonVars, julia_set_vars: JuliaSetVars, canvas: tk.Canvas) -> None:
-    timer: Final = Timer()
+def get_julia_view(common_vars: CommonVars, julia_set_vars: JuliaSetVars) -> FractalView:
+    c: Final[tuple[float, float]] = julia_set_vars.c[0].get(), julia_set_vars.c[1].get()
+    return FractalView(FractalKind.julia,
+                       (julia_set_vars.x_min_max[0].get(), julia_set_vars.x_min_max[1].get()),
+                       (julia_set_vars.y_min_max[0].get(), julia_set_vars.y_min_max[1].get()),
+                       (common_vars.res_xy[0].get(), common_vars.res_xy[1].get()),
+                       common_vars.magnitude.get(), common_vars.k_max.get(), complex(c[0], c[1]),
+                       common_vars.interior_checks.get())
+
+
+def get_mandelbrot_view(common_vars: CommonVars, mandelbrot_set_vars: MandelbrotSetVars) -> FractalView:
+    return FractalView(FractalKind.mandelbrot,
+                       (mandelbrot_set_vars.p_min_max[0].get(), mandelbrot_set_vars.p_min_max[1].get()),
+                       (mandelbrot_set_vars.q_min_max[0].get(), mandelbrot_set_vars.q_min_max[1].get()),
+                       (common_vars.res_xy[0].get(), common_vars.res_xy[1].get()),
+                       common_vars.magnitude.get(), common_vars.k_max.get(),
+                       use_interior_checks=common_vars.interior_checks.get())
+
 
-    magnitude: Final[float] = common_vars.magnitude.get()
-    k_max: Final[int] = common_vars.k_max.get()
+def get_mandelbrot_deep_zoom_view(common_vars: CommonVars, mandelbrot_set_vars: MandelbrotSetVars) -> DeepZoomView:
+    """As the `--deep-zoom` option of the command line: the center and the width of the deep-zoom entries, instead of
+    pMin, pMax, qMin, qMax. Raises ValueError if they are not numbers."""
+    return DeepZoomView(mandelbrot_set_vars.deep_zoom_center[0].get(), mandelbrot_set_vars.deep_zoom_center[1].get(),
+                        float(mandelbrot_set_vars.deep_zoom_width.get()),
+                        (common_vars.res_xy[0].get(), common_vars.res_xy[1].get()), common_vars.magnitude.get(),
+                        common_vars.k_max.get())
+
+
+def get_array_colors(common_vars: CommonVars) -> tuple[str, ...]:
     num_colors: Final[int] = common_vars.c_max.get()
     step_colors: Final[int] = common_vars.step_colors.get()
     card_s: Final[int] = int(common_vars.card_s.get())
     card_v: Final[int] = int(common_vars.card_v.get())
-    res_xy: Final[tuple[int, int]] = common_vars.res_xy[0].get(), common_vars.res_xy[1].get()
+    return generate_array_colors(num_colors, step_colors, card_s, card_v)
 
-    c: Final[tuple[float, float]] = julia_set_vars.c[0].get(), julia_set_vars.c[1].get()
-    x_min: Final[float] = julia_set_vars.x_min_max[0].get()
-    x_max: Final[float] = julia_set_vars.x_min_max[1].get()
-    y_min: Final[float] = julia_set_vars.y_min_max[0].get()
-    y_max: Final[float] = julia_set_vars.y_min_max[1].get()
 
-    use_photo_image: Final[bool] = common_vars.use_photo_image.get()
+def get_rgb_palette(common_vars: CommonVars) -> npt.NDArray[np.uint8]:
+    return generate_rgb_palette(common_vars.c_max.get(), common_vars.step_colors.get(), int(common_vars.card_s.get()),
+                                int(common_vars.card_v.get()))
+
+
+def get_photo_image_data(int_colors: npt.NDArray[np.intp], array_colors: tuple[str, ...]) -> str:
+    """Returns the rows of colors in the format expected by `tk.PhotoImage.put`, that is, '{#rrggbb ...} {...}', so
+    that a whole band of rows is handed to Tk in a single call instead of in one Tcl round-trip per pixel."""
+    colors: Final = np.array(array_colors)[int_colors]
+    return ' '.join('{' + ' '.join(row) + '}' for row in colors.tolist())
+
+
+def create_photo_image(resolution_i: int, resolution_j: int, canvas: tk.Canvas) -> tk.PhotoImage:
+    photo_image: Final = tk.PhotoImage(width=resolution_i, height=resolution_j)
+    canvas.delete('all')  # delete old objects, reducing memory footprint and running time
+    # canvas.create_image(0, 0, anchor=tk.NW, image=new_photo, tags="image")
+    canvas.create_image((2 + resolution_i / 2, 2 + resolution_j / 2), image=photo_image, state="normal")
+    canvas.image = photo_image  # type: ignore[attr-defined]  # Keep a reference to the image
+    return photo_image
+
 
-    photo_image: Final = tk.PhotoImage(width=res_xy[0], height=res_xy[1]) if use_photo_image else None
+def paint_rgb_image(rgb_image: npt.NDArray[np.uint8], canvas: tk.Canvas) -> None:
+    """Paints a (rows, columns, 3) image in a single Tk call, handing it over as the bytes of a PPM file."""
+    resolution_j, resolution_i, _ = rgb_image.shape
+    photo_image: Final = tk.PhotoImage(data=get_ppm_bytes(rgb_image), format='PPM')
+    canvas.delete('all')  # delete old objects, reducing memory footprint and running time
+    canvas.create_image((2 + resolution_i / 2, 2 + resolution_j / 2), image=photo_image, state="normal")
+    canvas.image = photo_image  # type: ignore[attr-defined]  # Keep a reference to the image
+
+
+def paint_on_photo_image(int_colors: npt.NDArray[np.intp], array_colors: tuple[str, ...], canvas: tk.Canvas,
+                         num_bands: int = 10) -> None:
+    resolution_j, resolution_i = int_colors.shape
 
-    resolution_i: Final = res_xy[0]
-    resolution_j: Final = res_xy[1]
+    photo_image: Final = create_photo_image(resolution_i, resolution_j, canvas)
 
-    inc_x: Final = (x_max - x_min)/(resolution_i - 1.)
-    inc_y: Final = (y_min - y_max)/(resolution_j - 1.)
-    int_color: int = 0
+    rows_per_band: Final = max(1, math.ceil(resolution_j / num_bands))
+    for band, j_0 in enumerate(range(0, resolution_j, rows_per_band)):
+        j_1 = min(j_0 + rows_per_band, resolution_j)
+        photo_image.put(get_photo_image_data(int_colors[j_0:j_1], array_colors), to=(0, j_0))
+        if band > 0:
+            print(f"{band}", end='', flush=True)
+        canvas.update()
+    print('')
+
+
+def paint_pixel_by_pixel(int_colors: npt.NDArray[np.intp], array_colors: tuple[str, ...], canvas: tk.Canvas) -> None:
+    resolution_j, resolution_i = int_colors.shape
 
     informer_out: int = 1
     informer: int = int(math.floor(informer_out * resolution_i * resolution_j) / 10.)
     row_column: int = 0
 
-    array_colors: Final = generate_array_colors(num_colors, step_colors, card_s, card_v)
-    # print(f"array_colors is {array_colors}")
-
     canvas.delete('all')  # delete old objects, reducing memory footprint and running time
 
     for j in range(0, resolution_j):
         for i in range(0, resolution_i):
-            k: int = 0
-            x_k = x_min + i * inc_x
-            y_k = y_max + j * inc_y
-            finished = False
-            while not finished:
-                x_k_plus_1 = x_k * x_k-y_k * y_k + c[0]
-                y_k_plus_1 = 2. * x_k * y_k + c[1]
-                k += 1
-                x_k = x_k_plus_1
-                y_k = y_k_plus_1
-                r = x_k * x_k + y_k * y_k
-                if r > magnitude:
-                    int_color = k % num_colors + 1
-                    finished = True
-                elif k == k_max:
-                    int_color = 0
-                    finished = True
-
-            color = array_colors[int_color]  # DEBUGGING: color = array_colors[(1 + i + j) % num_colors]
+            color = array_colors[int_colors[j, i]]  # DEBUGGING: color = array_colors[(1 + i + j) % num_colors]
 
             # paint pixel
-            if use_photo_image:
-                assert photo_image is not None  # prevents mypy from generating a [union-attr] error for the line below
-                photo_image.put(color, (i, j))
-            else:
-                canvas.create_rectangle(
-                    i + 2, j + 2, i + 2, j + 2,  # Experimentally we found out we need + 2 to paint ALL pixels
-                    fill=color, outline='')  # faster than canvas.create_oval
+            canvas.create_rectangle(
+                i + 2, j + 2, i + 2, j + 2,  # Experimentally we found out we need + 2 to paint ALL pixels
+                fill=color, outline='')  # faster than canvas.create_oval
 
             if row_column > informer:
                 print(f"{informer_out}", end='', flush=True)
                 informer_out += 1
                 informer = int(math.floor(informer_out * resolution_i * resolution_j) / 10.)
-                if not use_photo_image:
-                    canvas.update()
+                canvas.update()
             row_column += 1
     print('')
 
-    if use_photo_image:
-        # canvas.create_image(0, 0, anchor=tk.NW, image=new_photo, tags="image")
-        canvas.create_image((2 + res_xy[0] / 2, 2 + res_xy[1] / 2), image=photo_image, state="normal")
-        canvas.image = photo_image  # type: ignore[attr-defined]  # Keep a reference to the image
-        canvas.update()
 
-    function_name: Final = go_julia.__name__
-    print(f'Call to `{function_name}` took {timer.elapsed()}')
+def paint_with_rectangles(int_colors: npt.NDArray[np.intp], array_colors: tuple[str, ...], canvas: tk.Canvas) -> None:
+    """Same result as `paint_pixel_by_pixel`, with one canvas item per same-color rectangle (see
+    `get_color_rectangles`) instead of one per pixel."""
+    rectangles: Final = get_color_rectangles(int_colors)
+    canvas.delete('all')  # delete old objects, reducing memory footprint and running time
 
+    informer_out: int = 1
+    for n, (j_0, j_1, i_0, i_1, color_index) in enumerate(rectangles):
+        canvas.create_rectangle(
+            i_0 + 2, j_0 + 2, i_1 + 2, j_1 + 2,  # filled from (i_0, j_0) up to, but excluding, (i_1, j_1)
+            fill=array_colors[color_index], outline='')
+        if n * 10 > informer_out * len(rectangles):
+            print(f"{informer_out}", end='', flush=True)
+            informer_out += 1
+            canvas.update()
+    print(f' ({len(rectangles)} rectangles for {int_colors.size} pixels)')
+
+
+def paint(int_colors: npt.NDArray[np.intp], array_colors: tuple[str, ...], use_photo_image: bool,
+          canvas: tk.Canvas, merge_rectangles: bool = True) -> None:
+    if use_photo_image:
+        paint_on_photo_image(int_colors, array_colors, canvas)
+    elif merge_rectangles:
+        paint_with_rectangles(int_colors, array_colors, canvas)
+    else:
+        paint_pixel_by_pixel(int_colors, array_colors, canvas)
 
-def go_mandelbrot(common_vars: CommonVars, mandelbrot_set_vars: MandelbrotSetVars, canvas: tk.Canvas) -> None:
-    timer: Final = Timer()
 
-    magnitude: Final[float] = common_vars.magnitude.get()
-    k_max: Final[int] = common_vars.k_max.get()
-    num_colors: Final[int] = common_vars.c_max.get()
-    step_colors: Final[int] = common_vars.step_colors.get()
-    card_s: Final[int] = int(common_vars.card_s.get())
-    card_v: Final[int] = int(common_vars.card_v.get())
-    res_xy: Final[tuple[int, int]] = common_vars.res_xy[0].get(), common_vars.res_xy[1].get()
+class RenderCancellation:
+    """Keeps the cancellation token of the render in progress, so that a new click on "Go!" cancels it."""
 
-    p_min: Final[float] = mandelbrot_set_vars.p_min_max[0].get()
-    p_max: Final[float] = mandelbrot_set_vars.p_min_max[1].get()
-    q_min: Final[float] = mandelbrot_set_vars.q_min_max[0].get()
-    q_max: Final[float] = mandelbrot_set_vars.q_min_max[1].get()
+    def __init__(self) -> None:
+        self.token = CancellationToken()
 
-    use_photo_image: Final[bool] = common_vars.use_photo_image.get()
+    def restart(self) -> CancellationToken:
+        self.token.cancel()
+        self.token = CancellationToken()
+        return self.token
 
-    photo_image: Final = tk.PhotoImage(width=res_xy[0], height=res_xy[1]) if use_photo_image else None
 
-    resolution_i: Final = res_xy[0]
-    resolution_j: Final = res_xy[1]
+render_cancellation: Final = RenderCancellation()
+tile_cache: Final = TileCache()
+deepening_renderer: Final = DeepeningRenderer()
+lattice_renderer: Final = LatticeRenderer()
 
-    inc_p = (p_max - p_min)/(resolution_i - 1.)
-    inc_q = (q_min - q_max)/(resolution_j - 1.)  # beware!
-    int_color: int = 0
 
-    informer_out: int = 1
-    informer: int = int(math.floor(informer_out * resolution_i * resolution_j) / 10.)
-    row_column: int = 0
+def paint_progressively(view: FractalView, array_colors: tuple[str, ...],
+                        canvas: tk.Canvas) -> IterationsArray | None:
+    """Paints the coarse-to-fine previews of the view as soon as they are available, processing the pending Tk events
+    meanwhile, so that a new click on "Go!" cancels this render. Returns the iterations of the completed render, or None
+    if it was cancelled."""
+    token: Final = render_cancellation.restart()
+
+    def is_cancelled() -> bool:
+        canvas.update()
+        return token.is_cancelled()
+
+    for step, preview in generate_progressive_iterations(view, is_cancelled):
+        paint_on_photo_image(get_int_colors(preview, len(array_colors) - 1), array_colors, canvas, num_bands=1)
+        if step == 1:
+            return None if token.is_cancelled() else preview
+    return None
+
+
+class LastRender:
+    """Keeps the iteration counts of the last completed render, so that a palette change only calls for a recolor, and
+    the view of the last render started, so that a click on the canvas zooms into what is shown."""
+
+    def __init__(self) -> None:
+        self.iterations: IterationsArray | None = None
+        self.view: FractalView | None = None
+        self.deep_zoom_view: DeepZoomView | None = None
+
+
+last_render: Final = LastRender()
+
+
+class RenderSettings(object):
+    """The renderer selected in the GUI, read from the Tk variables in the Tk thread when a render starts, so that a
+    worker thread never touches them."""
+    deep_zoom_view: Final[DeepZoomView | None]
+    deepening: Final[bool]
+    lattice_reuse: Final[bool]
+    subdivision: Final[bool]
+
+    def __init__(self, deep_zoom_view: DeepZoomView | None, deepening: bool, lattice_reuse: bool,
+                 subdivision: bool) -> None:
+        self.deep_zoom_view = deep_zoom_view
+        self.deepening = deepening
+        self.lattice_reuse = lattice_reuse
+        self.subdivision = subdivision
+
+
+def get_render_settings(common_vars: CommonVars, deep_zoom_view: DeepZoomView | None = None) -> RenderSettings:
+    return RenderSettings(deep_zoom_view, common_vars.deepening.get(), common_vars.lattice_reuse.get(),
+                          common_vars.subdivision.get())
+
+
+def is_progressive(view: FractalView, settings: RenderSettings, common_vars: CommonVars) -> bool:
+    """The coarse-to-fine previews are for the float64 renders only."""
+    return common_vars.progressive.get() and settings.deep_zoom_view is None and not needs_arbitrary_precision(view)
+
+
+def print_switching_to_arbitrary_precision(view: FractalView) -> None:
+    print(f'The pixel spacing is {get_ulps_per_pixel(view):.1f} float64 ulps: switching to arbitrary precision')
+
+
+def compute_iterations(view: FractalView, settings: RenderSettings) -> IterationsArray:
+    """Computes the iterations with the renderer selected in the GUI."""
+    if settings.deep_zoom_view is not None:
+        iterations, stats = get_iterations_by_perturbation(settings.deep_zoom_view)
+        print(stats)
+        return iterations
+    if needs_arbitrary_precision(view):
+        print_switching_to_arbitrary_precision(view)
+        iterations, report = get_iterations_in_arbitrary_precision(view)
+        print(report)
+        return iterations
+    if settings.deepening:
+        iterations = deepening_renderer.get_iterations(view, default_band_rows)
+        print(f'{deepening_renderer.num_resumed_pixels} pixels resumed from the previous k_max')
+        return iterations
+    if settings.lattice_reuse:
+        iterations = lattice_renderer.get_iterations(view)
+        print(f'{lattice_renderer.num_reused_pixels} pixels reused from the previous zoom lattice')
+        return iterations
+    if settings.subdivision:
+        return get_iterations_by_subdivision(view)[0]
+    return get_iterations_with_cache(view, tile_cache)
+
+
+def generate_iterations(view: FractalView, settings: RenderSettings) \
+        -> Generator[tuple[Tile, IterationsArray], None, None]:
+    """Same as `compute_iterations`, except for the tile cache, but yields (tile, iterations of the tile) band by band
+    (or tile by tile), so that a background render can be cancelled between them. The renderers keeping state between
+    calls are run one at a time."""
+    if settings.deep_zoom_view is not None:
+        stats = yield from generate_iterations_by_perturbation(settings.deep_zoom_view, default_band_rows)
+        print(stats)
+    elif needs_arbitrary_precision(view):
+        print_switching_to_arbitrary_precision(view)
+        yield from generate_iterations_in_parallel(ArbitraryPrecisionView(view),
+                                                   tile_shape=default_precision_tile_shape, min_pixels=0,
+                                                   context=worker_context)
+    elif settings.deepening:
+        with current_background_render.compute_lock:
+            yield from deepening_renderer.generate_iterations(view, default_band_rows)
+            print(f'{deepening_renderer.num_resumed_pixels} pixels resumed from the previous k_max')
+    elif settings.lattice_reuse:
+        with current_background_render.compute_lock:
+            yield from lattice_renderer.generate_iterations(view, default_band_rows)
+            print(f'{lattice_renderer.num_reused_pixels} pixels reused from the previous zoom lattice')
+    else:
+        # on the whole view: Mariani–Silver fills next to no rectangle of bands barely taller than its minimum size
+        iterations, num_computed_pixels = get_iterations_by_subdivision(view)
+        print(f'{num_computed_pixels} of {iterations.size} pixels computed by subdivision')
+        for j_0, j_1, i_0, i_1 in get_tiles(view.res_xy, (default_band_rows, view.res_xy[0])):
+            yield (j_0, j_1, i_0, i_1), iterations[j_0:j_1, i_0:i_1]
+
+
+def uses_the_tile_cache(view: FractalView, settings: RenderSettings) -> bool:
+    return not (settings.deep_zoom_view is not None or needs_arbitrary_precision(view) or settings.deepening
+                or settings.lattice_reuse or settings.subdivision)
+
+
+def render(view: FractalView, settings: RenderSettings, common_vars: CommonVars, canvas: tk.Canvas,
+           function_name: str) -> None:
+    timer: Final = Timer()
 
-    array_colors: Final = generate_array_colors(num_colors, step_colors, card_s, card_v)
+    array_colors: Final = get_array_colors(common_vars)
     # print(f"array_colors is {array_colors}")
 
-    canvas.delete('all')  # delete old objects, reducing memory footprint and running time
+    if is_progressive(view, settings, common_vars):
+        iterations = paint_progressively(view, array_colors, canvas)
+        if iterations is None:
+            print(f'Call to `{function_name}` was cancelled after {timer.elapsed()}')
+            return
+    else:
+        render_cancellation.restart()
+        iterations = compute_iterations(view, settings)
+        int_colors: Final = get_int_colors(iterations, len(array_colors) - 1)
+        paint(int_colors, array_colors, common_vars.use_photo_image.get(), canvas, common_vars.merge_rectangles.get())
+    last_render.iterations = iterations
+
+    print(f'Call to `{function_name}` took {timer.elapsed()}; {tile_cache}')
+
+
+class CurrentBackgroundRender:
+    """Keeps the background render in progress, so that a new click on "Go!", or on "Abort", cancels it. The renderers
+    keeping state between calls are run one at a time."""
+
+    def __init__(self) -> None:
+        self.render: BackgroundRender | None = None
+        self.compute_lock = threading.Lock()
+
+    def abort(self) -> None:
+        if self.render is not None:
+            self.render.cancel()
+
+
+current_background_render: Final = CurrentBackgroundRender()
+poll_interval_ms: Final = 50
+
+
+def poll_background_render(render: BackgroundRender, view: FractalView, array_colors: tuple[str, ...],
+                           photo_image: tk.PhotoImage, tiles_to_cache: set[Tile], common_vars: CommonVars,
+                           canvas: tk.Canvas, function_name: str) -> None:
+    """Paints the tiles posted by the worker thread since the last call, and then polls again later, until the render
+    is finished. It runs in the Tk thread (through `after`), hence it never blocks the GUI for long."""
+    for message in render.poll():
+        if isinstance(message, RenderedTile) and not render.is_cancelled():
+            j_0, j_1, i_0, i_1 = message.tile
+            int_colors = get_int_colors(message.iterations, len(array_colors) - 1)
+            photo_image.put(get_photo_image_data(int_colors, array_colors), to=(i_0, j_0))
+            if message.tile in tiles_to_cache:
+                tile_cache.put(get_tile_key(view, message.tile), message.iterations)
+                tiles_to_cache.discard(message.tile)
+    if render.finished is None:
+        if not render.is_cancelled():
+            common_vars.progress.set(f'{100. * render.get_progress():.0f}%')
+        canvas.after(poll_interval_ms, poll_background_render, render, view, array_colors, photo_image,
+                     tiles_to_cache, common_vars, canvas, function_name)
+        return
+    if render.finished.error is not None:
+        print(f'Call to `{function_name}` failed: {render.finished.error}')
+        common_vars.progress.set('Failed')
+    elif render.finished.cancelled:
+        print(f'Call to `{function_name}` was aborted after {render.finished.seconds:.1f} seconds')
+        if current_background_render.render is render:
+            common_vars.progress.set('Aborted')
+    else:
+        for tile in tiles_to_cache:  # those not posted as such, for instance the mirrored ones of `get_symmetry`
+            j_0, j_1, i_0, i_1 = tile
+            tile_cache.put(get_tile_key(view, tile), render.iterations[j_0:j_1, i_0:i_1].copy())
+        last_render.iterations = render.iterations
+        if not common_vars.use_photo_image.get():
+            paint(get_int_colors(render.iterations, len(array_colors) - 1), array_colors, False, canvas,
+                  common_vars.merge_rectangles.get())
+        common_vars.progress.set('100%')
+        print(f'Call to `{function_name}` took {render.finished.seconds:.1f} seconds in the background; {tile_cache}')
+
+
+def render_in_background(view: FractalView, settings: RenderSettings, common_vars: CommonVars, canvas: tk.Canvas,
+                         function_name: str) -> None:
+    """Same as `render`, but the iterations are computed in a worker thread, whose tiles are painted as they arrive."""
+    current_background_render.abort()
+    render_cancellation.restart()
+    array_colors: Final = get_array_colors(common_vars)
+    tiles_to_cache: Final[set[Tile]] = set()
+    if uses_the_tile_cache(view, settings):
+        cached_tiles, missing_tiles = get_cached_and_missing_tiles(view, tile_cache)
+        tiles_to_cache.update(missing_tiles)
+        generate_tiles = get_cached_and_parallel_tiles_generator(view, cached_tiles, missing_tiles,
+                                                                 default_cache_tile_shape)
+    else:
+        def generate_tiles_of_the_renderer() -> Iterator[tuple[Tile, IterationsArray]]:
+            return generate_iterations(view, settings)
+
+        generate_tiles = generate_tiles_of_the_renderer
+
+    render: Final = BackgroundRender(view.res_xy, generate_tiles)
+    current_background_render.render = render
+    photo_image: Final = create_photo_image(view.res_xy[0], view.res_xy[1], canvas)
+    common_vars.progress.set('0%')
+    render.start()
+    poll_background_render(render, view, array_colors, photo_image, tiles_to_cache, common_vars, canvas,
+                           function_name)
+
+
+def abort_background_render(common_vars: CommonVars) -> None:
+    current_background_render.abort()
+    render_cancellation.restart()  # a progressive render, if any
+    common_vars.progress.set('Aborting...')
+
+
+def recolor(common_vars: CommonVars, canvas: tk.Canvas) -> None:
+    """Repaints the last render with the current colors (C, SC, card{S}, card{V}), without iterating again."""
+    if last_render.iterations is None:
+        print('Nothing to recolor yet: click on "Go!" first')
+        return
+    timer: Final = Timer()
+    paint_rgb_image(colorize(last_render.iterations, get_rgb_palette(common_vars)), canvas)
+    print(f'Call to `{recolor.__name__}` took {timer.elapsed()}')
 
-    for q in range(0, resolution_j):
-        for p in range(0, resolution_i):
-            k: int = 0
-            p_0 = p_min + p * inc_p
-            q_0 = q_max + q * inc_q  # beware!
-            x_k = 0.
-            y_k = 0.
-            finished = False
-            while not finished:
-                x_k_plus_1 = x_k * x_k - y_k * y_k + p_0
-                y_k_plus_1 = 2. * x_k * y_k + q_0
-                k += 1
-                x_k = x_k_plus_1
-                y_k = y_k_plus_1
-                r = x_k * x_k + y_k * y_k
-                if r > magnitude:
-                    int_color = k % num_colors + 1
-                    finished = True
-                elif k == k_max:
-                    int_color = 0
-                    finished = True
-
-            color = array_colors[int_color]  # DEBUGGING: color = array_colors[(1 + i + j) % num_colors]
 
-            # paint pixel
-            if use_photo_image:
-                assert photo_image is not None  # prevents mypy from generating a [union-attr] error for the line below
-                photo_image.put(color, (p, q))
-            else:
-                canvas.create_rectangle(
-                    p + 2, q + 2, p + 2, q + 2,  # Experimentally we found out we need + 2 to paint ALL pixels
-                    fill=color, outline='')  # faster than canvas.create_oval
+def go(view: FractalView, settings: RenderSettings, common_vars: CommonVars, canvas: tk.Canvas,
+       function_name: str) -> None:
+    last_render.view = view
+    last_render.deep_zoom_view = settings.deep_zoom_view
+    if common_vars.background.get() and not is_progressive(view, settings, common_vars):
+        render_in_background(view, settings, common_vars, canvas, function_name)
+    else:
+        render(view, settings, common_vars, canvas, function_name)
 
-            if row_column > informer:
-                print(f"{informer_out}", end='', flush=True)
-                informer_out += 1
-                informer = int(math.floor(informer_out * resolution_i * resolution_j) / 10.)
-                if not use_photo_image:
-                    canvas.update()
-            row_column += 1
-    print('')
 
-    if use_photo_image:
-        # canvas.create_image(0, 0, anchor=tk.NW, image=new_photo, tags="image")
-        canvas.create_image((2 + res_xy[0] / 2, 2 + res_xy[1] / 2), image=photo_image, state="normal")
-        canvas.image = photo_image  # type: ignore[attr-defined]  # Keep a reference to the image
-        canvas.update()
+def go_julia(common_vars: CommonVars, julia_set_vars: JuliaSetVars, canvas: tk.Canvas) -> None:
+    go(get_julia_view(common_vars, julia_set_vars), get_render_settings(common_vars), common_vars, canvas,
+       go_julia.__name__)
 
-    function_name: Final = go_mandelbrot.__name__
-    print(f'Call to `{function_name}` took {timer.elapsed()}')
+
+def go_mandelbrot(common_vars: CommonVars, mandelbrot_set_vars: MandelbrotSetVars, canvas: tk.Canvas) -> None:
+    deep_zoom_view: DeepZoomView | None = None
+    if common_vars.deep_zoom.get():
+        try:
+            deep_zoom_view = get_mandelbrot_deep_zoom_view(common_vars, mandelbrot_set_vars)
+        except ValueError as error:
+            print(f'Call to `{go_mandelbrot.__name__}` failed: {error}')
+            return
+    go(get_mandelbrot_view(common_vars, mandelbrot_set_vars), get_render_settings(common_vars, deep_zoom_view),
+       common_vars, canvas, go_mandelbrot.__name__)
+
+
+def set_bounds(bounds: tuple[tk.DoubleVar, tk.DoubleVar], values: tuple[float, float]) -> None:
+    bounds[0].set(values[0])
+    bounds[1].set(values[1])
+
+
+def zoom_in(i: int, j: int, common_vars: CommonVars, julia_set_vars: JuliaSetVars,
+            mandelbrot_set_vars: MandelbrotSetVars, canvas: tk.Canvas, factor: int = 2) -> None:
+    """Zooms into the last view by an integer factor around the center of pixel (i, j), writes the new bounds (or the
+    new deep-zoom center and width) back into the entries, and renders it. The window is aligned with the lattice of
+    the last view (see `get_zoomed_view`), so that the zoom-lattice reuse applies."""
+    view: Final = last_render.view
+    if view is None:
+        print('Nothing to zoom into yet: click on "Go!" first')
+        return
+    if not (0 <= i < view.res_xy[0] and 0 <= j < view.res_xy[1]):
+        return
+    deep_zoom_view: Final = last_render.deep_zoom_view
+    if deep_zoom_view is not None:
+        res_i, res_j = deep_zoom_view.res_xy
+        inc: Final = decimal.Decimal(deep_zoom_view.get_increment())
+        with decimal.localcontext() as context:
+            context.prec = deep_zoom_view.get_precision()  # enough digits to tell the pixels of the new view apart
+            center_re = deep_zoom_view.center_re + (i - decimal.Decimal(res_i - 1) / 2) * inc
+            center_im = deep_zoom_view.center_im + (decimal.Decimal(res_j - 1) / 2 - j) * inc
+        mandelbrot_set_vars.deep_zoom_center[0].set(str(center_re))
+        mandelbrot_set_vars.deep_zoom_center[1].set(str(center_im))
+        mandelbrot_set_vars.deep_zoom_width.set(repr(deep_zoom_view.width / factor))
+        go_mandelbrot(common_vars, mandelbrot_set_vars, canvas)
+        return
+    zoomed_view: Final = get_zoomed_view(view, i, j, factor)
+    if view.kind == FractalKind.julia:
+        set_bounds(julia_set_vars.x_min_max, zoomed_view.re_min_max)
+        set_bounds(julia_set_vars.y_min_max, zoomed_view.im_min_max)
+        go_julia(common_vars, julia_set_vars, canvas)
+    else:
+        set_bounds(mandelbrot_set_vars.p_min_max, zoomed_view.re_min_max)
+        set_bounds(mandelbrot_set_vars.q_min_max, zoomed_view.im_min_max)
+        go_mandelbrot(common_vars, mandelbrot_set_vars, canvas)
 
 
 def set_up_fully_operational_gui(size: int) -> None:
@@ -380,8 +668,48 @@ def set_up_fully_operational_gui(size: int) -> None:
     controls_use_photo_image_checkbutton = tk.Checkbutton(args_common_controls, text="Use photo_image",
                                                           variable=use_photo_image, relief="flat", anchor="w",
                                                           command='')
+    merge_rectangles = tk.BooleanVar(master=root, value=True)
+    controls_merge_rectangles_checkbutton = tk.Checkbutton(args_common_controls,
+                                                           text="Merge same-color pixels (without photo_image)",
+                                                           variable=merge_rectangles, relief="flat", anchor="w",
+                                                           command='')
+    progressive = tk.BooleanVar(master=root, value=False)
+    controls_progressive_checkbutton = tk.Checkbutton(args_common_controls, text="Progressive (coarse to fine)",
+                                                      variable=progressive, relief="flat", anchor="w", command='')
+    subdivision = tk.BooleanVar(master=root, value=False)
+    controls_subdivision_checkbutton = tk.Checkbutton(args_common_controls, text="Subdivision (Mariani–Silver)",
+                                                      variable=subdivision, relief="flat", anchor="w", command='')
+    interior_checks = tk.BooleanVar(master=root, value=False)
+    controls_interior_checks_checkbutton = tk.Checkbutton(args_common_controls,
+                                                          text="Interior checks (cardioid/bulb, periodicity)",
+                                                          variable=interior_checks, relief="flat", anchor="w",
+                                                          command='')
+    deepening = tk.BooleanVar(master=root, value=False)
+    controls_deepening_checkbutton = tk.Checkbutton(args_common_controls, text="Resumable k_max deepening",
+                                                    variable=deepening, relief="flat", anchor="w", command='')
+    lattice_reuse = tk.BooleanVar(master=root, value=False)
+    controls_lattice_reuse_checkbutton = tk.Checkbutton(args_common_controls,
+                                                        text="Zoom-lattice reuse (integer zooms, whole-pixel pans)",
+                                                        variable=lattice_reuse, relief="flat", anchor="w", command='')
+    deep_zoom = tk.BooleanVar(master=root, value=False)
+    controls_deep_zoom_checkbutton = tk.Checkbutton(args_common_controls,
+                                                    text="Deep zoom (perturbation, Mandelbrot set center and width)",
+                                                    variable=deep_zoom, relief="flat", anchor="w", command='')
+    background = tk.BooleanVar(master=root, value=True)
+    controls_background_checkbutton = tk.Checkbutton(args_common_controls,
+                                                     text="Background rendering (responsive, abortable)",
+                                                     variable=background, relief="flat", anchor="w", command='')
+    controls_progress_frame = tk.Frame(args_common_controls)
+    controls_progress_label = tk.Label(controls_progress_frame, text="Progress")
+    progress = tk.StringVar(master=root, value='')
+    controls_progress_value_label = tk.Label(controls_progress_frame, width=10, textvariable=progress)
     common_vars = CommonVars(magnitude, k_max, c_max, step_colors, controls_card_sv_s, controls_card_sv_v,
-                             (res_x, res_y), use_photo_image)
+                             (res_x, res_y), use_photo_image, merge_rectangles, progressive, subdivision,
+                             interior_checks, deepening, lattice_reuse, deep_zoom, background, progress)
+    controls_abort_button = tk.Button(controls_progress_frame, text="Abort",
+                                      command=lambda: abort_background_render(common_vars))
+    controls_recolor_button = tk.Button(args_common_controls, text="Recolor",
+                                        command=lambda: recolor(common_vars, canvas))
 
     # Julia set
     julia_label = tk.Label(args_julia, text="Julia set", font=font_for_titles)
@@ -443,11 +771,36 @@ def set_up_fully_operational_gui(size: int) -> None:
     mandelbrot_q_max_entry = tk.Entry(mandelbrot_q_max_frame, width=12, relief="sunken", textvariable=q_max)
     mandelbrot_q_max_entry.bind("<Return>", lambda event: None)
 
-    mandelbrot_set_vars = MandelbrotSetVars((p_min, p_max), (q_min, q_max))
+    mandelbrot_deep_zoom_label = tk.Label(args_mandelbrot, text="Deep zoom (exact decimal center)")
+    mandelbrot_deep_zoom_re_frame = tk.Frame(args_mandelbrot)
+    mandelbrot_deep_zoom_re_label = tk.Label(mandelbrot_deep_zoom_re_frame, text="Re(center)")
+    deep_zoom_re = tk.StringVar(master=root, value='-0.75')
+    mandelbrot_deep_zoom_re_entry = tk.Entry(mandelbrot_deep_zoom_re_frame, width=24, relief="sunken",
+                                             textvariable=deep_zoom_re)
+    mandelbrot_deep_zoom_re_entry.bind("<Return>", lambda event: None)
+    mandelbrot_deep_zoom_im_frame = tk.Frame(args_mandelbrot)
+    mandelbrot_deep_zoom_im_label = tk.Label(mandelbrot_deep_zoom_im_frame, text="Im(center)")
+    deep_zoom_im = tk.StringVar(master=root, value='0')
+    mandelbrot_deep_zoom_im_entry = tk.Entry(mandelbrot_deep_zoom_im_frame, width=24, relief="sunken",
+                                             textvariable=deep_zoom_im)
+    mandelbrot_deep_zoom_im_entry.bind("<Return>", lambda event: None)
+    mandelbrot_deep_zoom_width_frame = tk.Frame(args_mandelbrot)
+    mandelbrot_deep_zoom_width_label = tk.Label(mandelbrot_deep_zoom_width_frame, text="width")
+    deep_zoom_width = tk.StringVar(master=root, value='3')
+    mandelbrot_deep_zoom_width_entry = tk.Entry(mandelbrot_deep_zoom_width_frame, width=24, relief="sunken",
+                                                textvariable=deep_zoom_width)
+    mandelbrot_deep_zoom_width_entry.bind("<Return>", lambda event: None)
+
+    mandelbrot_set_vars = MandelbrotSetVars((p_min, p_max), (q_min, q_max), (deep_zoom_re, deep_zoom_im),
+                                            deep_zoom_width)
 
     mandelbrot_go_button = tk.Button(args_mandelbrot, text="Go!",
                                      command=lambda: go_mandelbrot(common_vars, mandelbrot_set_vars, canvas))
 
+    # Click to zoom in 2x around the pixel; experimentally we found out the pixels are painted from (2, 2)
+    canvas.bind("<Button-1>", lambda event: zoom_in(event.x - 2, event.y - 2, common_vars, julia_set_vars,
+                                                    mandelbrot_set_vars, canvas))
+
     #
     # Pack the widgets
     #
@@ -477,6 +830,19 @@ def set_up_fully_operational_gui(size: int) -> None:
     controls_res_x_and_y_y_entry.pack(side="right")
     controls_res_x_and_y_y_label.pack(side="right")
     controls_use_photo_image_checkbutton.pack()
+    controls_merge_rectangles_checkbutton.pack()
+    controls_progressive_checkbutton.pack()
+    controls_subdivision_checkbutton.pack()
+    controls_interior_checks_checkbutton.pack()
+    controls_deepening_checkbutton.pack()
+    controls_lattice_reuse_checkbutton.pack()
+    controls_deep_zoom_checkbutton.pack()
+    controls_background_checkbutton.pack()
+    controls_recolor_button.pack(pady="1m")
+    controls_progress_frame.pack()
+    controls_progress_label.pack(side="left")
+    controls_progress_value_label.pack(side="left")
+    controls_abort_button.pack(side="left")
 
     julia_label.pack()
     julia_re_c_frame.pack(anchor="e")
@@ -512,6 +878,16 @@ def set_up_fully_operational_gui(size: int) -> None:
     mandelbrot_q_max_frame.pack(anchor="se")
     mandelbrot_q_max_label.pack(side="left", padx="1m")
     mandelbrot_q_max_entry.pack(side="left", padx="1m")
+    mandelbrot_deep_zoom_label.pack()
+    mandelbrot_deep_zoom_re_frame.pack(anchor="e")
+    mandelbrot_deep_zoom_re_label.pack(side="left", padx="1m")
+    mandelbrot_deep_zoom_re_entry.pack(side="left", padx="1m")
+    mandelbrot_deep_zoom_im_frame.pack(anchor="e")
+    mandelbrot_deep_zoom_im_label.pack(side="left", padx="1m")
+    mandelbrot_deep_zoom_im_entry.pack(side="left", padx="1m")
+    mandelbrot_deep_zoom_width_frame.pack(anchor="e")
+    mandelbrot_deep_zoom_width_label.pack(side="left", padx="1m")
+    mandelbrot_deep_zoom_width_entry.pack(side="left", padx="1m")
     mandelbrot_go_button.pack(pady="1m")
 
     root.config()
@@ -0,0 +1,263 @@
+"""Zoom animations: a path of keyframes (center, width and k_max of the view) is turned into a sequence of frames, which
+a pool of processes renders in parallel, and which are written in order as they come, either as numbered PNG files
+(say, `frames/zoom_%05d.png`, as ffmpeg reads them) or as a raw RGB video stream (a `.rgb` file, or `-` for the
+standard output, to be piped into `ffmpeg -f rawvideo -pix_fmt rgb24 -s <X>x<Y> -i - zoom.mp4`).
+
+Between two keyframes, the width changes geometrically (a zoom at constant speed), the center moves in proportion to
+the width change (so that a zoom towards a point keeps it still on the screen), and k_max goes linearly from one value
+to the other. At most two frames per worker are pending at any time (rendered, or being rendered, out of order while
+an earlier one is not ready yet), so that the memory remains flat whatever the number of frames.
+
+After each frame, a small progress file (the output plus `.progress.json`) records the next frame to write, so that an
+interrupted animation resumes from there when run again with the same parameters. The progress file is removed once the
+animation is complete. A stream written to the standard output cannot be resumed.
+
+The animation is described by a JSON file like this one (c is only for the Julia set; frames is the number of frames
+from a keyframe to the next one):
+
+  {"fractal": "mandelbrot", "magnitude": 100,
+   "keyframes": [{"center": [-0.75, 0.0], "width": 3.0, "k_max": 64, "frames": 120},
+                 {"center": [-0.7453, 0.1127], "width": 0.0003, "k_max": 512}]}
+"""
+
+import argparse
+import hashlib
+import json
+import math
+import numpy as np
+import numpy.typing as npt
+import os
+import sys
+
+from fractals_colors import generate_rgb_palette, get_lookup_table
+from fractals_engine import FractalKind, FractalView
+from fractals_io import save_as_png, save_json_atomically
+from fractals_out_of_core import get_progress_path
+from fractals_parallel import generate_results_in_order
+from fractals_precision import ArbitraryPrecisionView, needs_arbitrary_precision
+from timer import Timer
+from typing import Any, BinaryIO, Final, Generator, Sequence
+
+default_frames_per_segment: Final[int] = 60
+standard_output: Final[str] = '-'
+
+
+class Keyframe(object):
+    """The view at a point of the path, and the number of frames until the next keyframe (ignored for the last one)."""
+
+    def __new__(cls, center: complex, width: float, k_max: int,
+                frames: int = default_frames_per_segment) -> 'Keyframe':
+        if not width > 0.:
+            raise ValueError(f'Keyframe width {width} is out of range')
+        if k_max < 1:
+            raise ValueError(f'Keyframe k_max {k_max} is out of range')
+        if frames < 1:
+            raise ValueError(f'Keyframe number of frames {frames} is out of range')
+        return object.__new__(cls)
+
+    def __init__(self, center: complex, width: float, k_max: int, frames: int = default_frames_per_segment) -> None:
+        self.center = center
+        self.width = width
+        self.k_max = k_max
+        self.frames = frames
+
+    def __repr__(self) -> str:
+        return f'Keyframe(center={self.center}, width={self.width}, k_max={self.k_max}, frames={self.frames})'
+
+
+def get_interpolated_keyframe(start: Keyframe, end: Keyframe, t: float) -> Keyframe:
+    """Returns the keyframe at t in [0, 1] of the way from start to end (see the module docstring)."""
+    width: Final = start.width ** (1. - t) * end.width ** t
+    s: Final = t if start.width == end.width else (start.width - width) / (start.width - end.width)
+    k_max: Final = round(start.k_max + t * (end.k_max - start.k_max))
+    return Keyframe(start.center + s * (end.center - start.center), width, k_max, 1)
+
+
+def get_frame_views(view: FractalView, keyframes: Sequence[Keyframe]) -> list[FractalView]:
+    """Returns the views of the frames along the keyframes, with the kind, resolution, magnitude and c of the given
+    view. The pixels are square: the height of the frames follows from their width and resolution. The frames too deep
+    for float64 are `ArbitraryPrecisionView`s."""
+    if not keyframes:
+        raise ValueError('At least one keyframe is needed')
+    frame_keyframes: Final[list[Keyframe]] = []
+    for start, end in zip(keyframes[:-1], keyframes[1:]):
+        frame_keyframes.extend(get_interpolated_keyframe(start, end, n / start.frames) for n in range(start.frames))
+    frame_keyframes.append(keyframes[-1])
+
+    res_x, res_y = view.res_xy
+    aspect_ratio: Final = (res_y - 1) / max(res_x - 1, 1)
+    views: Final[list[FractalView]] = []
+    for keyframe in frame_keyframes:
+        half_width, half_height = keyframe.width / 2., keyframe.width * aspect_ratio / 2.
+        frame_view = FractalView(view.kind, (keyframe.center.real - half_width, keyframe.center.real + half_width),
+                                 (keyframe.center.imag - half_height, keyframe.center.imag + half_height), view.res_xy,
+                                 view.magnitude, keyframe.k_max, view.c, view.use_interior_checks, view.kernel_backend)
+        views.append(ArbitraryPrecisionView(frame_view) if needs_arbitrary_precision(frame_view) else frame_view)
+    return views
+
+
+def load_animation(path: str, res_xy: tuple[int, int]) -> tuple[FractalView, list[Keyframe]]:
+    """Returns the view (with the first keyframe) and the keyframes of the JSON file (see the module docstring)."""
+    with open(path) as file:
+        animation: Final = json.load(file)
+    keyframes: Final = [Keyframe(complex(*keyframe['center']), float(keyframe['width']), int(keyframe['k_max']),
+                                 int(keyframe.get('frames', default_frames_per_segment)))
+                        for keyframe in animation['keyframes']]
+    if not keyframes:
+        raise ValueError(f'There are no keyframes in {path}')
+    view: Final = get_frame_views(FractalView(FractalKind(animation['fractal']), (-1., 1.), (-1., 1.), res_xy,
+                                              float(animation.get('magnitude', 100.)), keyframes[0].k_max,
+                                              complex(*animation.get('c', (-.39054, -.58679)))),
+                                  keyframes[:1])[0]
+    return view, keyframes
+
+
+def get_frame_image(view: FractalView, rgb_palette: npt.NDArray[np.uint8]) -> npt.NDArray[np.uint8]:
+    """Returns the colored frame. The colors of the iteration counts do not depend on k_max, so they do not flicker
+    when k_max changes from a frame to the next."""
+    return get_lookup_table(rgb_palette, view.k_max)[view.get_iterations()]
+
+
+def generate_frame_images(views: Sequence[FractalView], rgb_palette: npt.NDArray[np.uint8], first_frame: int = 0,
+                          num_workers: int | None = None) \
+        -> Generator[tuple[int, npt.NDArray[np.uint8]], None, None]:
+    """Yields (index, image) of the frames from the first one on, in order. At most two frames per worker are pending at
+    any time (the reorder buffer), so that the memory remains bounded however slowly the frames are consumed."""
+    indices: Final = range(first_frame, len(views))
+    yield from zip(indices, generate_results_in_order(get_frame_image,
+                                                      [(views[index], rgb_palette) for index in indices], num_workers))
+
+
+class PngFramesWriter(object):
+    """Writes each frame into its own PNG file, named after a printf-style pattern such as `frames/zoom_%05d.png`. The
+    files are written under a temporary name and then renamed, so that an interruption never leaves a partial frame."""
+
+    def __init__(self, pattern: str) -> None:
+        if '%' not in pattern:
+            raise ValueError(f'The frame file pattern {pattern} has no placeholder for the frame number, like %05d')
+        self.pattern = pattern
+        directory: Final = os.path.dirname(pattern % 0)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+
+    def write(self, index: int, rgb_image: npt.NDArray[np.uint8]) -> None:
+        path: Final = self.pattern % index
+        save_as_png(rgb_image, path + '.tmp')
+        os.replace(path + '.tmp', path)
+
+    def close(self) -> None:
+        pass
+
+
+class RawVideoWriter(object):
+    """Writes the frames one after the other as raw RGB bytes (rgb24), into a file, which is truncated back to the last
+    finished frame when resuming, or into the standard output."""
+
+    def __init__(self, path: str, first_frame: int, frame_bytes: int) -> None:
+        self.file: BinaryIO
+        if path == standard_output:
+            self.file = sys.stdout.buffer
+            self.must_close = False
+        else:
+            self.file = open(path, 'r+b' if first_frame > 0 else 'wb')
+            self.file.truncate(first_frame * frame_bytes)
+            self.file.seek(first_frame * frame_bytes)
+            self.must_close = True
+
+    def write(self, index: int, rgb_image: npt.NDArray[np.uint8]) -> None:
+        self.file.write(np.ascontiguousarray(rgb_image).tobytes())
+        self.file.flush()
+
+    def close(self) -> None:
+        if self.must_close:
+            self.file.close()
+
+
+def get_animation_key(views: Sequence[FractalView], rgb_palette: npt.NDArray[np.uint8]) -> str:
+    """Identifies an animation, so that only an identical one is resumed."""
+    digest: Final = hashlib.sha256(np.ascontiguousarray(rgb_palette).tobytes())
+    for view in views:
+        digest.update(repr((type(view).__name__, sorted(view.__dict__.items()))).encode())
+    return digest.hexdigest()
+
+
+def load_next_frame(output: str, key: str, frame_bytes: int) -> int:
+    """Returns the frame at which the animation identified by key resumes, 0 if it does not."""
+    try:
+        with open(get_progress_path(output)) as file:
+            progress: Final[dict[str, Any]] = json.load(file)
+    except (OSError, ValueError):
+        return 0
+    if progress.get('key') != key:
+        return 0
+    next_frame: Final = int(progress['next_frame'])
+    if output.lower().endswith('.png'):
+        return next_frame if all(os.path.exists(output % index) for index in range(next_frame)) else 0
+    return next_frame if os.path.exists(output) and os.path.getsize(output) >= next_frame * frame_bytes else 0
+
+
+def save_next_frame(output: str, key: str, next_frame: int) -> None:
+    save_json_atomically(get_progress_path(output), {'key': key, 'next_frame': next_frame})
+
+
+def render_animation(views: Sequence[FractalView], output: str, rgb_palette: npt.NDArray[np.uint8],
+                     num_workers: int | None = None, resume: bool = True) -> int:
+    """Renders the frames of the views into output: numbered PNG files if it ends with .png (then it is a pattern such
+    as `frames/zoom_%05d.png`), a raw RGB stream otherwise (`-` for the standard output). An interrupted animation of
+    the same parameters is resumed unless resume is False. Returns the number of frames rendered by this call."""
+    if not views:
+        raise ValueError('There are no frames to render')
+    frame_bytes: Final = 3 * views[0].res_xy[0] * views[0].res_xy[1]
+    if any(view.res_xy != views[0].res_xy for view in views):
+        raise ValueError('The frames should all have the same resolution')
+    checkpoints: Final = output != standard_output
+    key: Final = get_animation_key(views, rgb_palette)
+    first_frame: Final = load_next_frame(output, key, frame_bytes) if checkpoints and resume else 0
+
+    writer: Final = PngFramesWriter(output) if output.lower().endswith('.png') \
+        else RawVideoWriter(output, first_frame, frame_bytes)
+    try:
+        if checkpoints:
+            save_next_frame(output, key, first_frame)
+        for index, rgb_image in generate_frame_images(views, rgb_palette, first_frame, num_workers):
+            writer.write(index, rgb_image)
+            if checkpoints:
+                save_next_frame(output, key, index + 1)
+    finally:
+        writer.close()
+    if checkpoints:
+        os.remove(get_progress_path(output))
+    return len(views) - first_frame
+
+
+def create_parser() -> argparse.ArgumentParser:
+    parser: Final = argparse.ArgumentParser(description='Renderer of zoom animations along a path of keyframes.')
+    parser.add_argument('animation', metavar='<animation.json>', help='the fractal and its keyframes')
+    parser.add_argument('-o', '--output', metavar='<output>', required=True,
+                        help='numbered PNG files (a pattern such as frames/zoom_%%05d.png), a raw RGB video file, or '
+                             f'{standard_output} for a raw RGB video stream on the standard output')
+    parser.add_argument('--resolution', metavar=('<X>', '<Y>'), type=int, nargs=2, default=(640, 360))
+    parser.add_argument('-C', '--c-max', type=int, default=64, help='C (max. #colors)')
+    parser.add_argument('--step-colors', type=int, default=7, help='SC (step colors)')
+    parser.add_argument('--card-s', type=int, choices=range(0, 11), default=1, help='card{S} in HSV (0 to 10)')
+    parser.add_argument('--card-v', type=int, choices=range(0, 11), default=1, help='card{V} in HSV (0 to 10)')
+    parser.add_argument('--workers', type=int, default=None, help='number of processes (default: one per CPU)')
+    parser.add_argument('--restart', action='store_true', help='do not resume an interrupted animation')
+    return parser
+
+
+def main(argv: Sequence[str] | None = None) -> int:
+    args: Final = create_parser().parse_args(argv)
+    timer: Final = Timer()
+    view, keyframes = load_animation(args.animation, tuple(args.resolution))
+    views: Final = get_frame_views(view, keyframes)
+    rgb_palette: Final = generate_rgb_palette(args.c_max, args.step_colors, args.card_s, args.card_v)
+    num_frames: Final = render_animation(views, args.output, rgb_palette, args.workers, not args.restart)
+    zoom: Final = keyframes[0].width / min(keyframe.width for keyframe in keyframes)
+    print(f'{num_frames} of {len(views)} frames (zoom up to {zoom:.3g}x, or 2^{math.log2(zoom):.1f}) rendered into '
+          f'{args.output} in {timer.elapsed()}', file=sys.stderr)
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
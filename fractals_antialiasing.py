@@ -0,0 +1,114 @@
+"""Adaptive anti-aliasing: instead of supersampling every pixel (n x n times the cost), only the pixels whose color
+differs from that of any of their 8 neighbors (the discontinuities, where aliasing shows) are supersampled, on an n x n
+grid within the pixel, and get the average color of their samples. The flat areas keep their single sample.
+
+The extra samples are bounded by a budget, expressed as the total cost relative to one sample per pixel: when there are
+more edge pixels than the budget allows, those with the strongest color contrast with their neighbors are chosen."""
+
+import numpy as np
+import numpy.typing as npt
+
+from fractals_colors import generate_rgb_palette, get_lookup_table
+from fractals_engine import ComplexArray, FractalKind, FractalView, IterationsArray
+from fractals_io import save_as_png
+from timer import Timer
+from typing import Final
+
+default_samples_per_axis: Final[int] = 4
+default_max_cost: Final[float] = 3.  # samples per pixel, on average, including the first one
+max_points_per_pass: Final[int] = 1 << 20  # bounds the memory of the supersampling
+
+
+class AntiAliasingStats(object):
+    """What `get_antialiased_image` did: the cost is the number of samples per pixel, on average."""
+
+    def __init__(self, num_pixels: int, num_edge_pixels: int, num_supersampled_pixels: int,
+                 samples_per_axis: int) -> None:
+        self.num_pixels = num_pixels
+        self.num_edge_pixels = num_edge_pixels
+        self.num_supersampled_pixels = num_supersampled_pixels
+        self.num_samples = num_pixels + num_supersampled_pixels * samples_per_axis**2
+
+    def get_cost(self) -> float:
+        return self.num_samples / self.num_pixels
+
+    def __str__(self) -> str:
+        return (f'AntiAliasingStats({self.num_supersampled_pixels} of {self.num_edge_pixels} edge pixels supersampled '
+                f'among {self.num_pixels}, cost {self.get_cost():.2f}x)')
+
+
+def get_edge_contrast(rgb_image: npt.NDArray[np.uint8]) -> npt.NDArray[np.int32]:
+    """Returns, for each pixel, the largest color difference (sum of the absolute differences of R, G and B) with its 8
+    neighbors; 0 for the pixels of flat areas."""
+    colors: Final = rgb_image.astype(np.int32)
+    padded: Final = np.pad(colors, ((1, 1), (1, 1), (0, 0)), mode='edge')
+    res_j, res_i = colors.shape[:2]
+    contrast: Final = np.zeros((res_j, res_i), dtype=np.int32)
+    for d_j in -1, 0, 1:
+        for d_i in -1, 0, 1:
+            if d_j != 0 or d_i != 0:
+                neighbors = padded[1 + d_j:1 + d_j + res_j, 1 + d_i:1 + d_i + res_i]
+                np.maximum(contrast, np.abs(colors - neighbors).sum(axis=2), out=contrast)
+    return contrast
+
+
+def get_pixels_to_supersample(contrast: npt.NDArray[np.int32], max_pixels: int) -> npt.NDArray[np.intp]:
+    """Returns the flat indices of the edge pixels (contrast > 0), or of the max_pixels ones with the highest contrast
+    if there are more."""
+    edges: Final = np.flatnonzero(contrast)
+    if edges.size <= max_pixels or max_pixels <= 0:
+        return edges[:max(max_pixels, 0)]
+    strongest: Final = np.argpartition(contrast.ravel()[edges], edges.size - max_pixels)[edges.size - max_pixels:]
+    return np.sort(edges[strongest])
+
+
+def get_subpixel_offsets(view: FractalView, samples_per_axis: int) -> ComplexArray:
+    """Returns the n x n offsets, from the center of a pixel, of the samples evenly spread within it."""
+    inc_re, inc_im = view.get_increments()
+    fractions: Final = (np.arange(samples_per_axis) + .5) / samples_per_axis - .5
+    return ((fractions * inc_re)[np.newaxis, :] + 1j * (fractions * inc_im)[:, np.newaxis]).ravel()
+
+
+def get_antialiased_image(view: FractalView, rgb_palette: npt.NDArray[np.uint8],
+                          iterations: IterationsArray | None = None,
+                          samples_per_axis: int = default_samples_per_axis,
+                          max_cost: float = default_max_cost) -> tuple[npt.NDArray[np.uint8], AntiAliasingStats]:
+    """Returns the (rows, columns, 3) image of the view colored with the palette, with its edge pixels supersampled
+    (within max_cost samples per pixel, on average), and the stats. The iterations of the view can be given if already
+    computed."""
+    if samples_per_axis < 2:
+        raise ValueError(f'Number of samples per axis {samples_per_axis} is out of range')
+    if max_cost < 1.:
+        raise ValueError(f'Maximum cost {max_cost} is out of range')
+    pixel_iterations: Final = view.get_iterations() if iterations is None else iterations
+    lookup_table: Final = get_lookup_table(rgb_palette, view.k_max)
+    rgb_image: Final = lookup_table[pixel_iterations]
+    samples_per_pixel: Final = samples_per_axis * samples_per_axis
+    max_pixels: Final = int((max_cost - 1.) * pixel_iterations.size / samples_per_pixel)
+    contrast: Final = get_edge_contrast(rgb_image)
+    pixels: Final = get_pixels_to_supersample(contrast, max_pixels)
+
+    grid: Final = view.get_grid().ravel()
+    offsets: Final = get_subpixel_offsets(view, samples_per_axis)
+    flat_image: Final = rgb_image.reshape(-1, 3)
+    pixels_per_pass: Final = max(1, max_points_per_pass // samples_per_pixel)
+    for start in range(0, pixels.size, pixels_per_pass):
+        chunk = pixels[start:start + pixels_per_pass]
+        points = (grid[chunk][:, np.newaxis] + offsets[np.newaxis, :]).astype(np.complex128)
+        sample_colors = lookup_table[view.get_iterations_of_points(points)].astype(np.float64)
+        flat_image[chunk] = np.rint(sample_colors.mean(axis=1)).astype(np.uint8)
+    stats: Final = AntiAliasingStats(pixel_iterations.size, int(np.count_nonzero(contrast)), pixels.size,
+                                     samples_per_axis)
+    return rgb_image, stats
+
+
+def main():
+    view: Final = FractalView(FractalKind.mandelbrot, (-2.25, .75), (-1.5, 1.5), (1024, 1024), 100., 256)
+    timer: Final = Timer()
+    rgb_image, stats = get_antialiased_image(view, generate_rgb_palette(64, 7, 1, 1))
+    save_as_png(rgb_image, 'mandelbrot_antialiased.png')
+    print(f'{view}: {stats}, mandelbrot_antialiased.png written in {timer.elapsed()}')
+
+
+if __name__ == '__main__':
+    main()
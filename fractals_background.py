@@ -0,0 +1,146 @@
+"""Background rendering: the iterations are computed in a worker thread, which posts each finished tile to a queue, and
+the GUI thread drains that queue periodically (with `root.after`) to paint the tiles, so that the Tk mainloop is never
+blocked. The heavy lifting happens in NumPy (which releases the GIL) or in worker processes, so the GUI thread stays
+responsive. A render can be aborted at any time; the worker then stops at the next tile, so the renderers that
+compute the whole image at once post it in bands of rows instead."""
+
+import multiprocessing
+import numpy as np
+import queue
+import threading
+
+from fractals_cache import default_cache_tile_shape
+from fractals_engine import CancellationToken, FractalKind, FractalView, IterationsArray, Tile, TupleOf2Ints
+from fractals_parallel import generate_iterations_in_parallel
+from fractals_symmetry import generate_iterations_with_symmetry
+from timer import Timer
+from timeit import default_timer
+from typing import Callable, Final, Iterable, Iterator
+
+TileGenerator = Callable[[], Iterable[tuple[Tile, IterationsArray]]]
+
+default_band_rows: Final[int] = 16
+worker_context: Final = multiprocessing.get_context('spawn')  # forking the multi-threaded GUI process is unsafe
+
+
+class RenderedTile(object):
+    def __init__(self, tile: Tile, iterations: IterationsArray) -> None:
+        self.tile = tile
+        self.iterations = iterations
+
+
+class RenderFinished(object):
+    """Last message of a render: whether it was cancelled, and the error that stopped it, if any."""
+
+    def __init__(self, cancelled: bool, seconds: float, error: str | None = None) -> None:
+        self.cancelled = cancelled
+        self.seconds = seconds
+        self.error = error
+
+
+class BackgroundRender(object):
+    """Runs generate_tiles in a worker thread. The messages (`RenderedTile`, and `RenderFinished` at the end) are read
+    with `poll`, from the thread that owns the GUI, which also gets the iterations assembled so far."""
+    res_xy: Final[TupleOf2Ints]
+
+    def __init__(self, res_xy: TupleOf2Ints, generate_tiles: TileGenerator) -> None:
+        self.res_xy = res_xy
+        self.iterations: Final = np.zeros((res_xy[1], res_xy[0]), dtype=np.int32)
+        self.num_rendered_pixels = 0
+        self.finished: RenderFinished | None = None
+        self._generate_tiles = generate_tiles
+        self._token = CancellationToken()
+        self._messages: queue.Queue[RenderedTile | RenderFinished] = queue.Queue()
+        self._thread = threading.Thread(target=self._run, daemon=True)
+
+    def start(self) -> 'BackgroundRender':
+        self._thread.start()
+        return self
+
+    def cancel(self) -> None:
+        self._token.cancel()
+
+    def is_cancelled(self) -> bool:
+        return self._token.is_cancelled()
+
+    def join(self, timeout: float | None = None) -> None:
+        self._thread.join(timeout)
+
+    def get_progress(self) -> float:
+        """Fraction (0 to 1) of the pixels already received through `poll`."""
+        return self.num_rendered_pixels / (self.res_xy[0] * self.res_xy[1])
+
+    def _run(self) -> None:
+        start: Final = default_timer()
+        error: str | None = None
+        tiles: Iterator[tuple[Tile, IterationsArray]] | None = None
+        try:
+            tiles = iter(self._generate_tiles())
+            for tile, iterations in tiles:
+                if self._token.is_cancelled():
+                    break
+                self._messages.put(RenderedTile(tile, np.array(iterations)))  # a copy: it may be a shared buffer
+        except Exception as e:
+            error = repr(e)
+        finally:
+            close = getattr(tiles, 'close', None)
+            if close is not None:
+                close()  # for instance, to terminate the worker processes of an abandoned generator
+        self._messages.put(RenderFinished(self._token.is_cancelled(), default_timer() - start, error))
+
+    def poll(self) -> list[RenderedTile | RenderFinished]:
+        """Returns the messages posted since the last call, without blocking, after copying the tiles into
+        self.iterations."""
+        messages: Final[list[RenderedTile | RenderFinished]] = []
+        while True:
+            try:
+                message = self._messages.get_nowait()
+            except queue.Empty:
+                return messages
+            if isinstance(message, RenderedTile):
+                j_0, j_1, i_0, i_1 = message.tile
+                self.iterations[j_0:j_1, i_0:i_1] = message.iterations
+                self.num_rendered_pixels += (j_1 - j_0) * (i_1 - i_0)
+            else:
+                self.finished = message
+            messages.append(message)
+
+
+def get_whole_image_generator(res_xy: TupleOf2Ints, compute: Callable[[], IterationsArray]) -> TileGenerator:
+    """For the renderers that compute the whole image at once: a single tile."""
+    return lambda: [((0, res_xy[1], 0, res_xy[0]), compute())]
+
+
+def get_cached_and_parallel_tiles_generator(view: FractalView, cached_tiles: dict[Tile, IterationsArray],
+                                            missing_tiles: list[Tile],
+                                            tile_shape: TupleOf2Ints = default_cache_tile_shape) -> TileGenerator:
+    """For the tile cache (see `get_cached_and_missing_tiles`): first the cached tiles, then the missing ones, computed
+    in parallel. A view without any cached tile is computed with its symmetry instead, and its tiles are mirrored."""
+    def generate_tiles() -> Iterator[tuple[Tile, IterationsArray]]:
+        if not cached_tiles:
+            yield from generate_iterations_with_symmetry(view, tile_shape=tile_shape, context=worker_context)
+            return
+        yield from cached_tiles.items()
+        if missing_tiles:
+            yield from generate_iterations_in_parallel(view, tile_shape=tile_shape, regions=missing_tiles,
+                                                       context=worker_context)
+    return generate_tiles
+
+
+def get_parallel_tiles_generator(view: FractalView, num_workers: int | None = None) -> TileGenerator:
+    return lambda: generate_iterations_in_parallel(view, num_workers, context=worker_context)
+
+
+def main():
+    view: Final = FractalView(FractalKind.mandelbrot, (-2.25, .75), (-1.5, 1.5), (1024, 1024), 100., 256)
+    timer: Final = Timer()
+    render: Final = BackgroundRender(view.res_xy, get_parallel_tiles_generator(view)).start()
+    while render.finished is None:
+        render.join(.1)
+        render.poll()
+        print(f'{100. * render.get_progress():.0f}% ', end='', flush=True)
+    print(f'\n{view} rendered in the background in {timer.elapsed()}')
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,224 @@
+"""
+Benchmark suite of the escape-time engine: it renders a grid of cases (resolution x k_max x view x kernel backend x
+number of workers), reports their throughput in Mpixel/s and Giter/s, saves the results as a JSON baseline, and
+compares them with a previous baseline, flagging the cases whose throughput dropped beyond a threshold.
+
+The iterations counted are those of the original per-pixel loop: k for a pixel escaping at iteration k, and k_max for
+a pixel that never escapes (even if the interior checks stop it earlier), so that Giter/s measures the work done, not
+the work avoided.
+
+Usage examples:
+  $ python fractals_benchmark.py --quick --save baseline.json
+  $ python fractals_benchmark.py --quick --baseline baseline.json --threshold .2
+"""
+
+import argparse
+import itertools
+import json
+import numpy as np
+import platform
+import sys
+
+from fractals_engine import FractalKind, FractalView, IterationsArray, KernelBackend, get_available_kernel_backends, \
+    get_kernel_backend
+from fractals_io import save_json_atomically
+from fractals_parallel import get_default_num_workers, get_iterations_in_parallel
+from timeit import default_timer
+from typing import Any, Final, Sequence
+
+baseline_version: Final[int] = 1
+default_threshold: Final[float] = .1  # relative drop of Mpixel/s flagged as a regression
+max_pure_pixels: Final[int] = 128 * 128  # the pure-Python backend is skipped for larger resolutions
+
+benchmark_views: Final[dict[str, tuple[FractalKind, tuple[float, float], tuple[float, float], complex]]] = {
+    'interior': (FractalKind.mandelbrot, (-1.25, .5), (-.875, .875), 0j),  # mostly the main cardioid and bulbs
+    'boundary': (FractalKind.mandelbrot, (-.75, -.73), (.1, .12), 0j),  # Seahorse Valley
+    'julia': (FractalKind.julia, (-1.5, 1.5), (-1.5, 1.5), complex(-.39054, -.58679))
+}
+full_resolutions: Final[tuple[int, ...]] = 128, 512, 1024, 2048, 4096
+full_k_maxs: Final[tuple[int, ...]] = 256, 1024
+quick_resolutions: Final[tuple[int, ...]] = 128, 256
+quick_k_maxs: Final[tuple[int, ...]] = 256,
+
+
+class BenchmarkCase(object):
+    """One square view to render, with a given kernel backend and number of workers."""
+
+    def __init__(self, view_name: str, resolution: int, k_max: int, backend: KernelBackend, num_workers: int) -> None:
+        self.view_name = view_name
+        self.resolution = resolution
+        self.k_max = k_max
+        self.backend = backend
+        self.num_workers = num_workers
+
+    def get_name(self) -> str:
+        return (f'{self.view_name}-{self.resolution}x{self.resolution}-k{self.k_max}-{self.backend.value}'
+                f'-w{self.num_workers}')
+
+    def get_view(self) -> FractalView:
+        kind, re_min_max, im_min_max, c = benchmark_views[self.view_name]
+        return FractalView(kind, re_min_max, im_min_max, (self.resolution, self.resolution), 100., self.k_max, c,
+                           kernel_backend=self.backend)
+
+
+class BenchmarkResult(object):
+    """Best time of a case over the repeats, and the work done."""
+
+    def __init__(self, name: str, num_pixels: int, num_iterations: int, seconds: float) -> None:
+        self.name = name
+        self.num_pixels = num_pixels
+        self.num_iterations = num_iterations
+        self.seconds = seconds
+
+    def get_mpixels_per_second(self) -> float:
+        return self.num_pixels / self.seconds / 1e6
+
+    def get_giterations_per_second(self) -> float:
+        return self.num_iterations / self.seconds / 1e9
+
+    def __str__(self) -> str:
+        return (f'{self.name}: {self.seconds:.3f} s, {self.get_mpixels_per_second():.2f} Mpixel/s, '
+                f'{self.get_giterations_per_second():.3f} Giter/s')
+
+    def to_dict(self) -> dict[str, Any]:
+        return {'num_pixels': self.num_pixels, 'num_iterations': self.num_iterations, 'seconds': self.seconds,
+                'mpixels_per_second': self.get_mpixels_per_second(),
+                'giterations_per_second': self.get_giterations_per_second()}
+
+
+class Regression(object):
+    def __init__(self, name: str, baseline_mpixels_per_second: float, mpixels_per_second: float) -> None:
+        self.name = name
+        self.baseline_mpixels_per_second = baseline_mpixels_per_second
+        self.mpixels_per_second = mpixels_per_second
+
+    def get_slowdown(self) -> float:
+        """Relative drop of the throughput, from 0 (as fast as the baseline) to 1."""
+        return 1. - self.mpixels_per_second / self.baseline_mpixels_per_second
+
+    def __str__(self) -> str:
+        return (f'{self.name}: {self.mpixels_per_second:.2f} Mpixel/s instead of '
+                f'{self.baseline_mpixels_per_second:.2f} ({100. * self.get_slowdown():.0f}% slower)')
+
+
+def get_num_iterations(iterations: IterationsArray, k_max: int) -> int:
+    """Returns the number of iterations of the original per-pixel loop (k_max for the non-escaping pixels)."""
+    return int(np.where(iterations > 0, iterations, k_max).sum(dtype=np.int64))
+
+
+def get_benchmark_cases(resolutions: Sequence[int], k_maxs: Sequence[int], view_names: Sequence[str],
+                        backends: Sequence[KernelBackend], workers: Sequence[int]) -> list[BenchmarkCase]:
+    """Returns all the combinations, but those of the pure-Python backend larger than max_pure_pixels."""
+    for view_name in view_names:
+        if view_name not in benchmark_views:
+            raise ValueError(f'Benchmark view {view_name!r} is unknown')
+    return [BenchmarkCase(view_name, resolution, k_max, backend, num_workers)
+            for resolution, k_max, view_name, backend, num_workers
+            in itertools.product(resolutions, k_maxs, view_names, backends, workers)
+            if backend != KernelBackend.pure or resolution * resolution <= max_pure_pixels]
+
+
+def run_benchmark_case(case: BenchmarkCase, repeats: int = 3) -> BenchmarkResult:
+    if repeats < 1:
+        raise ValueError(f'Number of repeats {repeats} is out of range')
+    view: Final = case.get_view()
+    best_seconds = float('inf')
+    for _ in range(repeats):
+        start = default_timer()
+        iterations = get_iterations_in_parallel(view, case.num_workers, min_pixels=0)
+        best_seconds = min(best_seconds, default_timer() - start)
+    return BenchmarkResult(case.get_name(), iterations.size, get_num_iterations(iterations, view.k_max), best_seconds)
+
+
+def get_baseline(results: Sequence[BenchmarkResult]) -> dict[str, Any]:
+    return {'version': baseline_version, 'python': platform.python_version(), 'machine': platform.machine(),
+            'processor': platform.processor(), 'num_cpus': get_default_num_workers(),
+            'results': {result.name: result.to_dict() for result in results}}
+
+
+def save_baseline(path: str, results: Sequence[BenchmarkResult]) -> None:
+    save_json_atomically(path, get_baseline(results), indent=2)  # an interrupted run never truncates a baseline
+
+
+def load_baseline(path: str) -> dict[str, Any]:
+    with open(path) as file:
+        baseline: Final = json.load(file)
+    if baseline.get('version') != baseline_version:
+        raise ValueError(f'Baseline version {baseline.get("version")} of {path} is not supported')
+    return baseline
+
+
+def get_regressions(results: Sequence[BenchmarkResult], baseline: dict[str, Any],
+                    threshold: float = default_threshold) -> list[Regression]:
+    """Returns the results whose Mpixel/s dropped more than threshold (relative) below the baseline. The cases missing
+    from the baseline are ignored."""
+    if not 0. <= threshold < 1.:
+        raise ValueError(f'Threshold {threshold} is out of range')
+    regressions: Final[list[Regression]] = []
+    for result in results:
+        baseline_result = baseline['results'].get(result.name)
+        if baseline_result is None:
+            continue
+        baseline_mpixels_per_second = baseline_result['mpixels_per_second']
+        if result.get_mpixels_per_second() < (1. - threshold) * baseline_mpixels_per_second:
+            regressions.append(Regression(result.name, baseline_mpixels_per_second, result.get_mpixels_per_second()))
+    return regressions
+
+
+def create_parser() -> argparse.ArgumentParser:
+    parser: Final = argparse.ArgumentParser(description='Benchmark suite of the escape-time engine.')
+    parser.add_argument('--quick', action='store_true',
+                        help=f'resolutions {quick_resolutions} and k_max {quick_k_maxs} (instead of '
+                             f'{full_resolutions} and {full_k_maxs})')
+    parser.add_argument('--resolutions', type=int, nargs='+', default=None, help='square resolutions')
+    parser.add_argument('--k-max', dest='k_maxs', type=int, nargs='+', default=None, help='k_max values')
+    parser.add_argument('--views', type=str, nargs='+', choices=tuple(benchmark_views), default=tuple(benchmark_views))
+    parser.add_argument('--backends', type=str, nargs='+', choices=tuple(backend.value for backend in KernelBackend),
+                        default=None, help='kernel backends (default: all the available ones)')
+    parser.add_argument('--workers', type=int, nargs='+', default=None,
+                        help='numbers of workers (default: 1 and one per CPU)')
+    parser.add_argument('--repeats', type=int, default=3, help='the best time of the repeats is kept')
+    parser.add_argument('--save', metavar='<path>', default=None, help='save the results as a JSON baseline')
+    parser.add_argument('--baseline', metavar='<path>', default=None, help='compare with a JSON baseline')
+    parser.add_argument('--threshold', type=float, default=default_threshold,
+                        help=f'relative drop of Mpixel/s flagged as a regression (default: {default_threshold})')
+    return parser
+
+
+def main(argv: Sequence[str] | None = None) -> int:
+    """Returns the exit code: 1 if regressions were found, 2 if the arguments are invalid, 0 otherwise."""
+    args: Final = create_parser().parse_args(argv)
+    resolutions: Final = args.resolutions or (quick_resolutions if args.quick else full_resolutions)
+    k_maxs: Final = args.k_maxs or (quick_k_maxs if args.quick else full_k_maxs)
+    workers: Final = args.workers or sorted({1, get_default_num_workers()})
+    try:
+        backends = get_available_kernel_backends() if args.backends is None \
+            else tuple(get_kernel_backend(name) for name in args.backends)
+        for num_workers in workers:
+            if num_workers < 1:
+                raise ValueError(f'Number of workers {num_workers} is out of range')
+        get_regressions([], {'results': {}}, args.threshold)  # checks the threshold before the long runs
+        baseline = None if args.baseline is None else load_baseline(args.baseline)
+    except ValueError as e:
+        print(f'❌  ERROR: {e}')
+        return 2
+
+    results: Final[list[BenchmarkResult]] = []
+    for case in get_benchmark_cases(resolutions, k_maxs, args.views, backends, workers):
+        results.append(run_benchmark_case(case, args.repeats))
+        print(results[-1], flush=True)
+    if args.save is not None:
+        save_baseline(args.save, results)
+        print(f'Baseline saved to {args.save}')
+    if baseline is None:
+        return 0
+    regressions: Final = get_regressions(results, baseline, args.threshold)
+    for regression in regressions:
+        print(f'❌  REGRESSION: {regression}')
+    if not regressions:
+        print(f'✅  No regression beyond {100. * args.threshold:.0f}% with respect to {args.baseline}')
+    return 1 if regressions else 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,112 @@
+"""Iteration-count tile cache with least-recently-used eviction bounded by size in bytes, so that re-clicking "Go!" with
+unchanged parameters, or going back to an already visited view, only computes the tiles not already cached."""
+
+import numpy as np
+
+from collections import OrderedDict
+from fractals_engine import FractalKind, FractalView, IterationsArray, Tile, TupleOf2Ints, get_tiles
+from fractals_parallel import get_iterations_in_parallel
+from fractals_symmetry import get_iterations_with_symmetry
+from typing import Any, Final, Hashable
+
+default_cache_tile_shape: Final[TupleOf2Ints] = 64, 64  # rows, columns
+default_cache_max_bytes: Final[int] = 256 * 1024 * 1024
+
+
+def get_num_bytes(value: Any) -> int:
+    return value.nbytes if hasattr(value, 'nbytes') else len(value)
+
+
+class TileCache(object):
+    """LRU cache whose values are NumPy arrays (or bytes), bounded by the sum of their sizes."""
+    max_bytes: Final[int]
+
+    def __new__(cls, max_bytes: int = default_cache_max_bytes) -> 'TileCache':
+        if max_bytes <= 0:
+            raise ValueError(f'Maximum number of bytes {max_bytes} is out of range')
+        return object.__new__(cls)
+
+    def __init__(self, max_bytes: int = default_cache_max_bytes) -> None:
+        self.max_bytes = max_bytes
+        self.num_bytes = 0
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self._entries: OrderedDict[Hashable, Any] = OrderedDict()
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def __contains__(self, key: Hashable) -> bool:
+        return key in self._entries
+
+    def __str__(self) -> str:
+        lookups: Final = self.hits + self.misses
+        hit_rate: Final = f'{100. * self.hits / lookups:.1f}%' if lookups > 0 else 'n/a'
+        return (f'TileCache({len(self)} tiles, {self.num_bytes} of {self.max_bytes} bytes, hits={self.hits}, '
+                f'misses={self.misses} (hit rate {hit_rate}), evictions={self.evictions})')
+
+    def get(self, key: Hashable) -> Any | None:
+        value: Final = self._entries.get(key)
+        if value is None:
+            self.misses += 1
+            return None
+        self.hits += 1
+        self._entries.move_to_end(key)
+        return value
+
+    def put(self, key: Hashable, value: Any) -> None:
+        num_bytes: Final = get_num_bytes(value)
+        if key in self._entries:
+            self.num_bytes -= get_num_bytes(self._entries.pop(key))
+        if num_bytes > self.max_bytes:
+            return  # it would evict everything else and not fit anyway
+        self._entries[key] = value
+        self.num_bytes += num_bytes
+        while self.num_bytes > self.max_bytes:
+            _, evicted = self._entries.popitem(last=False)
+            self.num_bytes -= get_num_bytes(evicted)
+            self.evictions += 1
+
+    def clear(self) -> None:
+        self._entries.clear()
+        self.num_bytes = 0
+
+
+def get_tile_key(view: FractalView, tile: Tile) -> tuple:
+    """Key of a tile: the fractal kind, c (for Julia sets), magnitude, k_max, interior checks, region (ranges and
+    resolution) and the tile itself."""
+    c: Final = view.c if view.kind == FractalKind.julia else None
+    return (view.kind.value, c, view.magnitude, view.k_max, view.use_interior_checks, view.re_min_max, view.im_min_max,
+            view.res_xy, tile)
+
+
+def get_cached_and_missing_tiles(view: FractalView, cache: TileCache,
+                                 tile_shape: TupleOf2Ints = default_cache_tile_shape) \
+        -> tuple[dict[Tile, IterationsArray], list[Tile]]:
+    """Splits the view in tiles, and returns those found in the cache (with their iterations) and the missing ones."""
+    cached_tiles: Final[dict[Tile, IterationsArray]] = {}
+    missing_tiles: Final[list[Tile]] = []
+    for tile in get_tiles(view.res_xy, tile_shape):
+        cached_tile = cache.get(get_tile_key(view, tile))
+        if cached_tile is None:
+            missing_tiles.append(tile)
+        else:
+            cached_tiles[tile] = cached_tile
+    return cached_tiles, missing_tiles
+
+
+def get_iterations_with_cache(view: FractalView, cache: TileCache, num_workers: int | None = None,
+                              tile_shape: TupleOf2Ints = default_cache_tile_shape) -> IterationsArray:
+    """Returns the same as `view.get_iterations()`, taking from the cache the tiles already computed and storing in it
+    the new ones. A view seen for the first time is computed with symmetry awareness."""
+    cached_tiles, missing_tiles = get_cached_and_missing_tiles(view, cache, tile_shape)
+    if not cached_tiles:
+        iterations = get_iterations_with_symmetry(view, num_workers)[0]
+    else:
+        iterations = get_iterations_in_parallel(view, num_workers, tile_shape, missing_tiles)
+    for j_0, j_1, i_0, i_1 in missing_tiles:
+        cache.put(get_tile_key(view, (j_0, j_1, i_0, i_1)), np.array(iterations[j_0:j_1, i_0:i_1]))
+    for (j_0, j_1, i_0, i_1), cached_tile in cached_tiles.items():
+        iterations[j_0:j_1, i_0:i_1] = cached_tile
+    return iterations
@@ -0,0 +1,355 @@
+"""
+Headless (batch) renderer of the Julia and Mandelbrot sets of `fractals.py`. It takes the same parameters as the GUI
+and writes PNG/PPM images and/or raw iteration arrays (.npy) to disk. It does not import tkinter, so it starts fast and
+runs on display-less machines.
+"""
+
+import argparse
+import os
+import sys
+
+from fractals_antialiasing import default_max_cost, get_antialiased_image
+from fractals_colors import colorize, generate_rgb_palette
+from fractals_distributed import Coordinator, parse_address
+from fractals_engine import FractalKind, FractalView, IterationsArray, KernelBackend, get_kernel_backend
+from fractals_io import OutputFormat, get_output_format, save_as_png, save_as_ppm, save_iterations
+from fractals_out_of_core import render_out_of_core, write_out_of_core
+from fractals_perturbation import DeepZoomView, get_iterations_by_perturbation
+from fractals_precision import ArbitraryPrecisionView, get_iterations_in_arbitrary_precision, \
+    get_view_with_float32, needs_arbitrary_precision
+from fractals_symmetry import get_iterations_with_symmetry
+from timer import Timer
+from typing import Final, Sequence
+
+default_re_min_max: Final[dict[FractalKind, tuple[float, float]]] = {
+    FractalKind.julia: (-1.5, 1.5),
+    FractalKind.mandelbrot: (-2.25, .75)
+}
+default_im_min_max: Final[tuple[float, float]] = -1.5, 1.5
+iterations_suffix: Final[str] = '.iterations.npy'  # of the temporary file of --distributed --out-of-core
+
+prog_name: Final[str] = os.path.basename(__file__)
+
+epilog_text: Final[str] = \
+    (f'Render a Julia or Mandelbrot set without any GUI, writing the files given with -o,\n'
+     'whose format depends on their extension (.png, .ppm, or .npy for the raw iteration array).\n\n'
+     'Usage examples:\n'
+     f'1) python {prog_name} {FractalKind.mandelbrot.value} -o mandelbrot.png\n'
+     f'2) python {prog_name} {FractalKind.julia.value} -c -.39054 -.58679 -k 256 --resolution 1024 1024'
+     f' -o julia.png -o julia.npy\n'
+     f'3) python {prog_name} {FractalKind.mandelbrot.value} --re-min-max -.75 -.73 --im-min-max .1 .12 -k 1024'
+     f' --card-s 0 --card-v 0 -o zoom.ppm\n'
+     f'4) python {prog_name} {FractalKind.mandelbrot.value} --deep-zoom'
+     f' -.7455221565179204709115 .0945736544911671085962 1e-18 -k 12000 -o deep.png\n'
+     f'5) python {prog_name} {FractalKind.mandelbrot.value} --resolution 65536 65536 --out-of-core -o poster.png\n'
+     f'6) python {prog_name} {FractalKind.mandelbrot.value} --resolution 32768 32768 --distributed 0.0.0.0:5555'
+     f' --out-of-core -o poster.npy -o poster.png\n'
+     '   (then, on each host: python fractals_distributed.py <coordinator host>:5555;\n'
+     '   only on a trusted network, as the port accepts any worker and stores its results as they are)\n')
+
+
+def positive_integer(value: str) -> int:
+    try:
+        int_value = int(value)
+    except ValueError:
+        raise argparse.ArgumentTypeError(f"{value} is not an integer")
+    if int_value <= 0:
+        raise argparse.ArgumentTypeError(f"{value} is not a positive integer")
+    return int_value
+
+
+def create_parser() -> argparse.ArgumentParser:
+    # Create ArgumentParser instance
+    parser = argparse.ArgumentParser(
+        add_help=False,  # disable the default help argument provided by argparse
+        allow_abbrev=False,
+        description='Headless renderer of the Julia and Mandelbrot sets.',
+        formatter_class=argparse.RawTextHelpFormatter,  # to preserve newlines and other formatting
+        fromfile_prefix_chars='@',
+        epilog=epilog_text)
+
+    # 1) Positional arguments (mandatory)
+    #
+    positional = parser.add_argument_group('1) Positional arguments (mandatory)')
+    positional.add_argument('fractal', choices=tuple(member.value for member in FractalKind), type=str)
+
+    # 2) File selection (mandatory)
+    #
+    file_selection = parser.add_argument_group('2) File selection (mandatory)')
+    file_selection.add_argument(
+        '-o', '--output-file', metavar='<file>', dest='output_files',
+        type=str, action='append',
+        required=True,
+        help='write output to <file> (.png, .ppm or .npy), can be repeated')
+
+    # 3) Fractal parameters
+    #
+    fractal_parameters = parser.add_argument_group('3) Fractal parameters (optional)')
+    fractal_parameters.add_argument(
+        '-M', '--magnitude', metavar='<float>', dest='magnitude',
+        type=float, default=100.,
+        help='M (magnitude)')
+    fractal_parameters.add_argument(
+        '-k', '--k-max', metavar='<integer>', dest='k_max',
+        type=positive_integer, default=16,
+        help='k_max (max. #iterations)')
+    fractal_parameters.add_argument(
+        '-C', '--c-max', metavar='<integer>', dest='c_max',
+        type=positive_integer, default=16,
+        help='C (max. #colors)')
+    fractal_parameters.add_argument(
+        '--step-colors', metavar='<integer>', dest='step_colors',
+        type=int, default=1,
+        help='SC (step colors)')
+    fractal_parameters.add_argument(
+        '--card-s', metavar='<integer>', dest='card_s',
+        type=int, choices=range(0, 11), default=1,
+        help='card{S} in HSV (0 to 10)')
+    fractal_parameters.add_argument(
+        '--card-v', metavar='<integer>', dest='card_v',
+        type=int, choices=range(0, 11), default=1,
+        help='card{V} in HSV (0 to 10, 0 for gray)')
+    fractal_parameters.add_argument(
+        '--resolution', metavar=('<X>', '<Y>'), dest='resolution',
+        type=positive_integer, nargs=2, default=(128, 128),
+        help='resolution_X and resolution_Y')
+    fractal_parameters.add_argument(
+        '-c', metavar=('<Re(c)>', '<Im(c)>'), dest='c',
+        type=float, nargs=2, default=(-.39054, -.58679),
+        help='complex c number of the Julia set')
+    fractal_parameters.add_argument(
+        '--re-min-max', metavar=('<min>', '<max>'), dest='re_min_max',
+        type=float, nargs=2, default=None,
+        help='xMin xMax (Julia set) or pMin pMax (Mandelbrot set)')
+    fractal_parameters.add_argument(
+        '--im-min-max', metavar=('<min>', '<max>'), dest='im_min_max',
+        type=float, nargs=2, default=default_im_min_max,
+        help='yMin yMax (Julia set) or qMin qMax (Mandelbrot set)')
+    fractal_parameters.add_argument(
+        '--deep-zoom', metavar=('<Re(center)>', '<Im(center)>', '<width>'), dest='deep_zoom',
+        type=str, nargs=3, default=None,
+        help='Mandelbrot set only: center (with as many digits as needed) and width of a deep zoom,\n'
+             'rendered with perturbation theory (instead of --re-min-max and --im-min-max)')
+    fractal_parameters.add_argument(
+        '--workers', metavar='<integer>', dest='workers',
+        type=positive_integer, default=None,
+        help='number of worker processes (default: one per CPU)')
+    fractal_parameters.add_argument(
+        '--float32', dest='float32', action='store_true',
+        help='iterate in float32 if the pixel spacing allows it and if a sample of pixels\n'
+             'gets the same iteration counts as in float64 (faster, but some counts may differ)')
+    fractal_parameters.add_argument(
+        '--antialiasing', metavar='<n>', dest='antialiasing',
+        type=positive_integer, default=None,
+        help='supersample the pixels on color edges with n x n samples (n >= 2, for .png and .ppm files;\n'
+             'not with --deep-zoom, --out-of-core, nor views needing arbitrary precision)')
+    fractal_parameters.add_argument(
+        '--antialiasing-max-cost', metavar='<float>', dest='antialiasing_max_cost',
+        type=float, default=default_max_cost,
+        help=f'maximum number of samples per pixel, on average (default: {default_max_cost})')
+    fractal_parameters.add_argument(
+        '--out-of-core', dest='out_of_core', action='store_true',
+        help='compute and write the files band by band, with bounded memory whatever the resolution,\n'
+             'resuming an interrupted render of the same parameters (not with --deep-zoom)')
+    fractal_parameters.add_argument(
+        '--backend', dest='backend',
+        choices=('auto',) + tuple(member.value for member in KernelBackend), type=str, default='auto',
+        help=f'escape-time kernel (default: auto, the fastest available;\n'
+             f'{KernelBackend.jit.value} needs Numba)')
+    fractal_parameters.add_argument(
+        '--distributed', metavar='<host>:<port>', dest='distributed',
+        type=str, default=None,
+        help='listen on <host>:<port> and hand out the tiles to the workers of fractals_distributed.py\n'
+             'that connect to it, possibly from other hosts (not with --deep-zoom, --float32, nor views\n'
+             'needing arbitrary precision; with --out-of-core, the tiles are assembled on disk, into the\n'
+             '.npy file, if any, and the images are written band by band). There is no authentication:\n'
+             'never expose <port> to untrusted networks')
+
+    # 4) Informative output
+    #
+    informative_output = parser.add_argument_group('4) Informative output (optional)')
+    informative_output.add_argument('-h', '--help', action='help', help='show this help message and exit')
+    informative_output.add_argument(
+        '-q', '--quiet', dest='quiet', action='store_true',
+        help='do not print anything but errors')
+
+    return parser
+
+
+def deal_with_the_cli_parsing(argv: Sequence[str] | None = None) -> argparse.Namespace:
+    parser = create_parser()
+    try:
+        args: Final = parser.parse_args(argv)
+    except SystemExit:
+        sys.exit(1)
+    except argparse.ArgumentError as e:
+        print(f'❌  ERROR: Caught `argparse.ArgumentError` {e}')
+        parser.print_help()
+        sys.exit(1)
+
+    for output_file in args.output_files:
+        try:
+            get_output_format(output_file)
+        except ValueError as e:
+            print(f'❌  ERROR: {e}')
+            sys.exit(1)
+    try:
+        get_view(args)  # also checks the backend
+    except ValueError as e:
+        print(f'❌  ERROR: {e}')
+        sys.exit(1)
+    if args.deep_zoom is not None and args.out_of_core:
+        print('❌  ERROR: --deep-zoom and --out-of-core cannot be combined')
+        sys.exit(1)
+    if args.antialiasing is not None:
+        if args.antialiasing < 2 or args.antialiasing_max_cost < 1.:
+            print('❌  ERROR: --antialiasing needs at least 2 samples per axis, and a maximum cost of at least 1')
+            sys.exit(1)
+        if args.deep_zoom is not None or args.out_of_core or needs_arbitrary_precision(get_view(args)):
+            print('❌  ERROR: --antialiasing is not available with --deep-zoom, --out-of-core, or views needing'
+                  ' arbitrary precision')
+            sys.exit(1)
+    if args.distributed is not None:
+        try:
+            parse_address(args.distributed)
+        except ValueError as e:
+            print(f'❌  ERROR: {e}')
+            sys.exit(1)
+        if args.deep_zoom is not None or args.float32 or needs_arbitrary_precision(get_view(args)):
+            print('❌  ERROR: --distributed is not available with --deep-zoom, --float32, or views needing arbitrary'
+                  ' precision')
+            sys.exit(1)
+    if args.deep_zoom is not None:
+        if args.fractal != FractalKind.mandelbrot.value:
+            print(f'❌  ERROR: --deep-zoom is only available for the {FractalKind.mandelbrot.value} set')
+            sys.exit(1)
+        try:
+            get_deep_zoom_view(args)
+        except ValueError as e:
+            print(f'❌  ERROR: {e}')
+            sys.exit(1)
+    return args
+
+
+def get_deep_zoom_view(args: argparse.Namespace) -> DeepZoomView:
+    center_re, center_im, width = args.deep_zoom
+    return DeepZoomView(center_re, center_im, float(width), args.resolution, args.magnitude, args.k_max)
+
+
+def get_view(args: argparse.Namespace) -> FractalView:
+    kind: Final = FractalKind(args.fractal)
+    re_min_max: Final = default_re_min_max[kind] if args.re_min_max is None else args.re_min_max
+    return FractalView(kind, re_min_max, args.im_min_max, args.resolution, args.magnitude, args.k_max,
+                       complex(args.c[0], args.c[1]), kernel_backend=get_kernel_backend(args.backend))
+
+
+def get_float32_view_if_allowed(view: FractalView, args: argparse.Namespace) -> FractalView:
+    if not args.float32:
+        return view
+    float32_view, check = get_view_with_float32(view)
+    if not args.quiet:
+        print(check)
+    return float32_view
+
+
+def render_the_files_out_of_core(args: argparse.Namespace) -> None:
+    view: Final = get_view(args)
+    view_to_render: Final = ArbitraryPrecisionView(view) if needs_arbitrary_precision(view) \
+        else get_float32_view_if_allowed(view, args)
+    rgb_palette: Final = generate_rgb_palette(args.c_max, args.step_colors, args.card_s, args.card_v)
+    for output_file in args.output_files:
+        num_rows = render_out_of_core(view_to_render, output_file, rgb_palette, args.workers)
+        if not args.quiet:
+            resumed = '' if num_rows == view.res_xy[1] else f' (resumed, {num_rows} rows computed)'
+            print(f'{output_file} written{resumed}')
+
+
+def get_iterations_from_the_workers(view: FractalView, args: argparse.Namespace,
+                                    iterations_path: str | None = None) -> IterationsArray:
+    coordinator: Final = Coordinator(view, parse_address(args.distributed), iterations_path=iterations_path)
+    if not args.quiet:
+        host, port = coordinator.address
+        print(f'Waiting for the workers of fractals_distributed.py on {host}:{port}')
+    iterations: Final = coordinator.run()
+    if not args.quiet:
+        print(coordinator)
+    return iterations
+
+
+def render_the_files_distributed_out_of_core(args: argparse.Namespace) -> None:
+    """The workers' tiles are assembled into the first .npy file (or a temporary one next to the first file), through
+    a memory map, and the other files are written from it band by band."""
+    view: Final = get_view(args)
+    npy_files: Final = [path for path in args.output_files if get_output_format(path) == OutputFormat.npy]
+    iterations_path: Final = npy_files[0] if npy_files else args.output_files[0] + iterations_suffix
+    iterations = get_iterations_from_the_workers(view, args, iterations_path)
+    rgb_palette: Final = generate_rgb_palette(args.c_max, args.step_colors, args.card_s, args.card_v)
+    try:
+        for output_file in args.output_files:
+            if output_file != iterations_path:
+                write_out_of_core(view, iterations, output_file, rgb_palette)
+            if not args.quiet:
+                print(f'{output_file} written')
+    finally:
+        del iterations  # closes the memory map
+        if not npy_files:
+            os.remove(iterations_path)
+
+
+def do_the_actual_work(args: argparse.Namespace) -> None:
+    if args.out_of_core:
+        if args.distributed is not None:
+            render_the_files_distributed_out_of_core(args)
+        else:
+            render_the_files_out_of_core(args)
+        return
+    float_view: FractalView | None = None  # the view computed in float64 or float32, if so
+    if args.deep_zoom is None:
+        view: Final = get_view(args)
+        if args.distributed is not None:
+            float_view = view
+            iterations = get_iterations_from_the_workers(view, args)
+        elif needs_arbitrary_precision(view):
+            iterations, report = get_iterations_in_arbitrary_precision(view, num_workers=args.workers)
+            if not args.quiet:
+                print(report)
+        else:
+            float_view = get_float32_view_if_allowed(view, args)
+            iterations, _ = get_iterations_with_symmetry(float_view, args.workers)
+    else:
+        iterations, stats = get_iterations_by_perturbation(get_deep_zoom_view(args))
+        if not args.quiet:
+            print(stats)
+
+    rgb_palette: Final = generate_rgb_palette(args.c_max, args.step_colors, args.card_s, args.card_v)
+    if args.antialiasing is not None and float_view is not None:
+        rgb_image, antialiasing_stats = get_antialiased_image(float_view, rgb_palette, iterations, args.antialiasing,
+                                                              args.antialiasing_max_cost)
+        if not args.quiet:
+            print(antialiasing_stats)
+    else:
+        rgb_image = colorize(iterations, rgb_palette)
+    for output_file in args.output_files:
+        output_format = get_output_format(output_file)
+        if output_format == OutputFormat.png:
+            save_as_png(rgb_image, output_file)
+        elif output_format == OutputFormat.ppm:
+            save_as_ppm(rgb_image, output_file)
+        else:
+            save_iterations(iterations, output_file)
+        if not args.quiet:
+            print(f'{output_file} written')
+
+
+def main(argv: Sequence[str] | None = None) -> None:
+    timer = Timer()
+
+    args: Final = deal_with_the_cli_parsing(argv)
+    do_the_actual_work(args)
+
+    if not args.quiet:
+        print(f'{prog_name} finished in {timer.elapsed()}.')
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,103 @@
+"""Color helpers of `fractals.py`, kept apart from tkinter so that headless renderers can use them too."""
+
+import colorsys
+import numpy as np
+import numpy.typing as npt
+import random
+
+from formatting import format_float
+from typing import Final, TypeAlias
+
+
+TupleOf3Ints: TypeAlias = tuple[int, int, int]
+TupleOf3Floats: TypeAlias = tuple[float, float, float]
+
+
+def get_random_rgb() -> TupleOf3Floats:
+    return random.random(), random.random(), random.random()
+
+
+def hsv2rgb(hsv: TupleOf3Floats) -> TupleOf3Floats:
+    """Converts a color specification from the hsv model to the rgb model. As input, h ranges from 0. to 360. (not
+    included), and s and v range from 0 to 1. [Baker]328.-"""
+    (h, s, v) = hsv
+    return colorsys.hsv_to_rgb(h/360., s, v)  # h must be normalized for the call to this particular function
+
+
+def to_str(rgb: TupleOf3Floats) -> str:
+    return '(' + format_float(rgb[0]) + ', ' + format_float(rgb[1]) + ', ' + format_float(rgb[2]) + ')'
+
+
+def rgb_to_hex(rgb: TupleOf3Floats) -> str:
+    return '#{:02x}{:02x}{:02x}'.format(int(rgb[0]*255), int(rgb[1]*255), int(rgb[2]*255))
+
+
+def hsv2rgb_arrays(h: npt.NDArray[np.float64], s: npt.NDArray[np.float64],
+                   v: npt.NDArray[np.float64]) -> npt.NDArray[np.float64]:
+    """Vectorized `hsv2rgb`: returns the (n, 3) rgb colors of the n hsv ones. The arithmetic is the same as that of
+    `colorsys.hsv_to_rgb`, hence the results are identical."""
+    h_6: Final = (h / 360.) * 6.
+    i: Final = h_6.astype(np.int64)  # truncation, as int() does; h is never negative here
+    f: Final = h_6 - i
+    p: Final = v * (1. - s)
+    q: Final = v * (1. - s * f)
+    t: Final = v * (1. - s * (1. - f))
+    sector: Final = i % 6
+    r: Final = np.choose(sector, (v, q, p, p, t, v))
+    g: Final = np.choose(sector, (t, v, v, q, p, p))
+    b: Final = np.choose(sector, (p, p, t, v, v, q))
+    gray: Final = s == 0.
+    return np.stack((np.where(gray, v, r), np.where(gray, v, g), np.where(gray, v, b)), axis=-1)
+
+
+def generate_rgb_palette(num_colors: int, step_colors: int, card_s: int, card_v: int) -> npt.NDArray[np.uint8]:
+    """Returns the (num_colors + 1, 3) palette whose entries are those of `generate_array_colors`, as RGB bytes,
+    computed for all the entries at once. Entry 0 is the color associated with the 'no finished iterations' state."""
+    i: Final = np.arange(num_colors)
+    h: Final = (((i * step_colors) % num_colors) * (360. / num_colors)).astype(np.float64)
+    s: Final = (i % card_s + 1.) / card_s if card_s > 0 else np.zeros(num_colors)
+    v: Final = (i % card_v + 1.) / card_v if card_v > 0 else (i + 1.) / num_colors  # else -> gray scale
+    palette: Final = np.zeros((num_colors + 1, 3), dtype=np.uint8)
+    palette[1:] = (hsv2rgb_arrays(h, s, v) * 255).astype(np.uint8)  # truncation, as in `rgb_to_hex`
+    return palette
+
+
+_hex_digits: Final = np.array([f'{byte:02x}' for byte in range(256)])
+
+
+def get_hex_colors(rgb_palette: npt.NDArray[np.uint8]) -> tuple[str, ...]:
+    """Converts an (n, 3) palette into n '#rrggbb' colors."""
+    hex_digits: Final = _hex_digits[rgb_palette]
+    return tuple(np.char.add(np.char.add(np.char.add('#', hex_digits[:, 0]), hex_digits[:, 1]),
+                             hex_digits[:, 2]).tolist())
+
+
+def generate_array_colors(num_colors: int, step_colors: int, card_s: int, card_v: int) -> tuple[str, ...]:
+    """We reserve num_colors + 1 entries to save in position 0 the color associated with 'no finished iterations'
+    state."""
+    return get_hex_colors(generate_rgb_palette(num_colors, step_colors, card_s, card_v))
+
+
+def get_lookup_table(rgb_palette: npt.NDArray[np.uint8], k_max: int) -> npt.NDArray[np.uint8]:
+    """Returns the (k_max + 1, 3) table of the colors of the iteration counts 0 to k_max, so that coloring an image is a
+    single lookup (see `get_int_colors`)."""
+    num_colors: Final = len(rgb_palette) - 1
+    k: Final = np.arange(k_max + 1)
+    return rgb_palette[np.where(k > 0, k % num_colors + 1, 0)]
+
+
+def colorize(iterations: npt.NDArray[np.int32], rgb_palette: npt.NDArray[np.uint8]) -> npt.NDArray[np.uint8]:
+    """Returns the (rows, columns, 3) image of the iteration counts, colored with the palette. The iteration counts
+    are kept apart from the colors, so a palette change only calls for this, not for a new render."""
+    k_max: Final = int(iterations.max()) if iterations.size > 0 else 0
+    return get_lookup_table(rgb_palette, k_max)[iterations]
+
+
+def get_rgb_array_colors(array_colors: tuple[str, ...]) -> npt.NDArray[np.uint8]:
+    """Converts the '#rrggbb' colors returned by `generate_array_colors` into a (len(array_colors), 3) array."""
+    return np.array([[int(color[i:i + 2], 16) for i in (1, 3, 5)] for color in array_colors], dtype=np.uint8)
+
+
+def get_rgb_image(int_colors: npt.NDArray[np.intp], array_colors: tuple[str, ...]) -> npt.NDArray[np.uint8]:
+    """Returns the (rows, columns, 3) image resulting from looking up the int_colors in array_colors."""
+    return get_rgb_array_colors(array_colors)[int_colors]
@@ -0,0 +1,73 @@
+"""Resumable k_max deepening: when the only change between two renders is a larger k_max, the orbits of the pixels
+that had already escaped are final, and those of the still-active ones are resumed from where the previous render left
+them, instead of iterating every pixel again from z_0. The iteration counts are identical to those of a render from
+scratch, since the escape-time loop of `continue_escape_iterations` is simply carried on."""
+
+import numpy as np
+
+from fractals_engine import EscapeTimeState, FractalKind, FractalView, IterationsArray, Tile, \
+    continue_escape_iterations, get_tiles
+from timer import Timer
+from typing import Final, Generator
+
+
+def get_view_key_but_k_max(view: FractalView) -> tuple:
+    c: Final = view.c if view.kind == FractalKind.julia else None
+    return (view.kind.value, c, view.magnitude, view.use_interior_checks, view.re_min_max, view.im_min_max,
+            view.res_xy)
+
+
+class DeepeningRenderer(object):
+    """Keeps the orbit states of the bands of rows of the last rendered view, to resume them if the next view only has
+    a larger k_max."""
+
+    def __init__(self) -> None:
+        self._key: tuple | None = None
+        self._states: dict[Tile, EscapeTimeState] = {}
+        self.num_resumed_pixels = 0  # number of pixels iterated further in the last call, if resumed
+
+    def can_resume(self, view: FractalView, band_rows: int | None = None) -> bool:
+        return (bool(self._states) and self._key == (get_view_key_but_k_max(view), band_rows)
+                and all(view.k_max >= state.k for state in self._states.values()))
+
+    def get_iterations(self, view: FractalView, band_rows: int | None = None) -> IterationsArray:
+        """Returns the same as `view.get_iterations()`."""
+        iterations: Final = np.empty((view.res_xy[1], view.res_xy[0]), dtype=np.int32)
+        for (j_0, j_1, i_0, i_1), band_iterations in self.generate_iterations(view, band_rows):
+            iterations[j_0:j_1, i_0:i_1] = band_iterations
+        return iterations
+
+    def generate_iterations(self, view: FractalView, band_rows: int | None = None) \
+            -> Generator[tuple[Tile, IterationsArray], None, None]:
+        """Yields (tile, iterations of the tile) for the bands of band_rows rows (by default, a single band), in order,
+        each of them resumed if it can be."""
+        key: Final = get_view_key_but_k_max(view), band_rows
+        if self._key != key:
+            self._key = key
+            self._states = {}
+        self.num_resumed_pixels = 0
+        for tile in get_tiles(view.res_xy, (view.res_xy[1] if band_rows is None else band_rows, view.res_xy[0])):
+            state = self._states.get(tile)
+            if state is None or view.k_max < state.k:
+                state = self._states[tile] = view.get_escape_time_state(*tile)
+            else:
+                self.num_resumed_pixels += state.active.size
+            continue_escape_iterations(state, view.k_max)
+            yield tile, state.get_iterations().copy()
+
+    def clear(self) -> None:
+        self._key = None
+        self._states = {}
+
+
+def main():
+    renderer: Final = DeepeningRenderer()
+    for k_max in 64, 256, 1024:
+        view = FractalView(FractalKind.mandelbrot, (-.75, -.73), (.1, .12), (1024, 1024), 100., k_max)
+        timer = Timer()
+        renderer.get_iterations(view)
+        print(f'{view}: {renderer.num_resumed_pixels} resumed pixels, computed in {timer.elapsed()}')
+
+
+if __name__ == '__main__':
+    main()
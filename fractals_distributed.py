@@ -0,0 +1,301 @@
+"""Distributed rendering over TCP, for images too large for one machine (say, gigapixel posters): a coordinator splits
+the view into tiles and hands them out, one at a time, to the worker processes connected to it, which may run on other
+hosts, and assembles their iteration counts. The load is balanced dynamically, as in `fractals_parallel`: a worker that
+finishes early simply asks for the next pending tile.
+
+A tile whose worker fails (its connection drops, or it does not answer within task_timeout seconds) is put back at the
+front of the queue for another worker; a tile that fails max_attempts times aborts the render with RuntimeError.
+Workers can join at any time, even in the middle of a render.
+
+The messages are a JSON header, with the view parameters and the tile, followed by the raw little-endian int32
+iteration counts of the results; nothing received from the network is unpickled. For images larger than the memory,
+the coordinator assembles the tiles into a .npy file, through a memory map, instead of an array.
+
+There is no authentication nor encryption: the coordinator stores the results of any worker as they are (only their
+size is checked), and the workers compute whatever views the coordinator sends. So never expose the port to untrusted
+networks; listen on 127.0.0.1, or on the address of a private network behind a firewall. Start the workers with
+
+  $ python fractals_distributed.py <coordinator host>:<port> --processes <number of processes>
+
+and the coordinator with the `--distributed <host>:<port>` option of `fractals_cli.py`."""
+
+import argparse
+import collections
+import json
+import multiprocessing
+import numpy as np
+import os
+import socket
+import struct
+import sys
+import threading
+import time
+
+from fractals_engine import FractalKind, FractalView, IterationsArray, KernelBackend, Tile, TupleOf2Ints, \
+    get_available_kernel_backends, get_tiles
+from fractals_parallel import get_default_num_workers
+from timer import Timer
+from typing import Any, Final, Sequence
+
+protocol_version: Final[int] = 1
+default_tile_shape: Final[TupleOf2Ints] = 256, 256  # rows, columns
+default_task_timeout: Final[float] = 600.  # seconds
+default_max_attempts: Final[int] = 3
+default_connect_timeout: Final[float] = 60.  # seconds
+max_header_bytes: Final[int] = 1 << 16
+message_prefix: Final = struct.Struct('>II')  # the sizes of the JSON header and of the payload
+polling_interval: Final[float] = .1  # seconds
+
+Message = dict[str, Any]
+
+
+def send_message(connection: socket.socket, header: Message, payload: bytes = b'') -> None:
+    header_bytes: Final = json.dumps(header).encode()
+    connection.sendall(message_prefix.pack(len(header_bytes), len(payload)) + header_bytes + payload)
+
+
+def receive_exactly(connection: socket.socket, num_bytes: int) -> bytes:
+    data: Final = bytearray()
+    while len(data) < num_bytes:
+        chunk = connection.recv(min(num_bytes - len(data), 1 << 20))
+        if not chunk:
+            raise ConnectionError('The connection was closed')
+        data.extend(chunk)
+    return bytes(data)
+
+
+def receive_message(connection: socket.socket) -> tuple[Message, bytes]:
+    header_size, payload_size = message_prefix.unpack(receive_exactly(connection, message_prefix.size))
+    if header_size > max_header_bytes:
+        raise ValueError(f'Message header of {header_size} bytes is too large')
+    header: Final = json.loads(receive_exactly(connection, header_size))
+    if not isinstance(header, dict):
+        raise ValueError('The message header is not a JSON object')
+    return header, receive_exactly(connection, payload_size)
+
+
+def get_view_message(view: FractalView) -> Message:
+    return {'kind': view.kind.value, 're_min_max': view.re_min_max, 'im_min_max': view.im_min_max,
+            'res_xy': view.res_xy, 'magnitude': view.magnitude, 'k_max': view.k_max, 'c': (view.c.real, view.c.imag),
+            'use_interior_checks': view.use_interior_checks, 'kernel_backend': view.kernel_backend.value}
+
+
+def get_view_from_message(message: Message) -> FractalView:
+    """Inverse of `get_view_message`. A kernel backend not available here is replaced by NumPy's, which gets the same
+    iteration counts."""
+    kernel_backend = KernelBackend(message['kernel_backend'])
+    if kernel_backend not in get_available_kernel_backends():
+        kernel_backend = KernelBackend.numpy
+    return FractalView(FractalKind(message['kind']), tuple(message['re_min_max']), tuple(message['im_min_max']),
+                       tuple(message['res_xy']), float(message['magnitude']), int(message['k_max']),
+                       complex(*message['c']), bool(message['use_interior_checks']), kernel_backend)
+
+
+def parse_address(address: str) -> tuple[str, int]:
+    """Returns (host, port) of 'host:port'."""
+    host, separator, port = address.rpartition(':')
+    if not separator or not host or not port.isdigit():
+        raise ValueError(f'Address "{address}" is not of the form <host>:<port>')
+    return host, int(port)
+
+
+class Coordinator(object):
+    """Listens for workers on address (port 0 for any free port; see self.address) and, once `run` is called, hands
+    them the tiles of the view. The iterations are assembled in memory or, if iterations_path is given, into that .npy
+    file, through a memory map."""
+
+    def __new__(cls, view: FractalView, address: tuple[str, int] = ('127.0.0.1', 0),
+                tile_shape: TupleOf2Ints = default_tile_shape, task_timeout: float = default_task_timeout,
+                max_attempts: int = default_max_attempts, iterations_path: str | None = None) -> 'Coordinator':
+        if type(view) is not FractalView:
+            raise ValueError(f'Only plain FractalView instances can be distributed, not {type(view).__name__}')
+        if not task_timeout > 0.:
+            raise ValueError(f'Task timeout {task_timeout} is out of range')
+        if max_attempts < 1:
+            raise ValueError(f'Maximum number of attempts {max_attempts} is out of range')
+        return object.__new__(cls)
+
+    def __init__(self, view: FractalView, address: tuple[str, int] = ('127.0.0.1', 0),
+                 tile_shape: TupleOf2Ints = default_tile_shape, task_timeout: float = default_task_timeout,
+                 max_attempts: int = default_max_attempts, iterations_path: str | None = None) -> None:
+        self.view = view
+        self.view_message = get_view_message(view)
+        self.tiles = get_tiles(view.res_xy, tile_shape)
+        self.task_timeout = task_timeout
+        self.max_attempts = max_attempts
+        shape: Final = view.res_xy[1], view.res_xy[0]
+        self.iterations = np.zeros(shape, dtype=np.int32) if iterations_path is None \
+            else np.lib.format.open_memmap(iterations_path, mode='w+', dtype=np.int32, shape=shape)
+        self.pending_tiles: collections.deque[Tile] = collections.deque(self.tiles)
+        self.attempts: dict[Tile, int] = {}
+        self.condition = threading.Condition()
+        self.num_done = 0
+        self.num_requeued = 0
+        self.num_workers = 0
+        self.failure: str | None = None
+        self.finished = threading.Event()
+        self.server_socket = socket.create_server(address)
+        self.server_socket.settimeout(polling_interval)  # so that the accepting thread notices the end of the render
+        self.address: tuple[str, int] = self.server_socket.getsockname()[:2]
+
+    def __str__(self) -> str:
+        return (f'Coordinator({self.num_done} of {len(self.tiles)} tiles done by {self.num_workers} workers, '
+                f'{self.num_requeued} re-queued)')
+
+    def run(self) -> IterationsArray:
+        """Returns the iterations of the view once all the tiles are done. Raises RuntimeError if a tile failed
+        max_attempts times."""
+        accepting_thread: Final = threading.Thread(target=self.accept_workers, daemon=True)
+        accepting_thread.start()
+        try:
+            with self.condition:
+                self.condition.wait_for(lambda: self.num_done == len(self.tiles) or self.failure is not None)
+        finally:
+            self.finished.set()
+            accepting_thread.join()
+            self.server_socket.close()
+        if self.failure is not None:
+            raise RuntimeError(self.failure)
+        if isinstance(self.iterations, np.memmap):
+            self.iterations.flush()
+        return self.iterations
+
+    def accept_workers(self) -> None:
+        while not self.finished.is_set():
+            try:
+                connection, address = self.server_socket.accept()
+            except socket.timeout:
+                continue
+            threading.Thread(target=self.serve_worker, args=(connection, address), daemon=True).start()
+
+    def serve_worker(self, connection: socket.socket, address: tuple[str, int]) -> None:
+        with connection:
+            connection.settimeout(self.task_timeout)
+            try:
+                hello, _ = receive_message(connection)
+                if hello.get('type') != 'hello' or hello.get('version') != protocol_version:
+                    raise ValueError(f'Unexpected greeting {hello}')
+            except (OSError, ValueError):
+                return
+            with self.condition:
+                self.num_workers += 1
+            while (tile := self.get_next_tile()) is not None:
+                try:
+                    send_message(connection, {'type': 'tile', 'view': self.view_message, 'tile': tile})
+                    self.store(tile, self.receive_result(connection, tile))
+                except (OSError, ValueError) as error:
+                    self.requeue(tile, f'{address[0]}:{address[1]}: {error}')
+                    return
+            try:
+                send_message(connection, {'type': 'done'})
+            except OSError:
+                pass
+
+    def get_next_tile(self) -> Tile | None:
+        """Returns the next pending tile, waiting for one if all of them are being computed (a worker may fail), or None
+        once the render is over."""
+        with self.condition:
+            while not self.finished.is_set():
+                if self.pending_tiles:
+                    return self.pending_tiles.popleft()
+                self.condition.wait(polling_interval)
+        return None
+
+    @staticmethod
+    def receive_result(connection: socket.socket, tile: Tile) -> IterationsArray:
+        header, payload = receive_message(connection)
+        j_0, j_1, i_0, i_1 = tile
+        if header.get('type') != 'result' or tuple(header.get('tile', ())) != tile:
+            raise ValueError(f'Unexpected answer {header} to tile {tile}')
+        if len(payload) != 4 * (j_1 - j_0) * (i_1 - i_0):
+            raise ValueError(f'Unexpected result size {len(payload)} for tile {tile}')
+        return np.frombuffer(payload, dtype='<i4').reshape(j_1 - j_0, i_1 - i_0)
+
+    def store(self, tile: Tile, iterations: IterationsArray) -> None:
+        j_0, j_1, i_0, i_1 = tile
+        with self.condition:
+            self.iterations[j_0:j_1, i_0:i_1] = iterations
+            self.num_done += 1
+            self.condition.notify_all()
+
+    def requeue(self, tile: Tile, reason: str) -> None:
+        with self.condition:
+            self.attempts[tile] = self.attempts.get(tile, 0) + 1
+            if self.attempts[tile] >= self.max_attempts:
+                self.failure = f'Tile {tile} failed {self.attempts[tile]} times, the last one on {reason}'
+            else:
+                self.num_requeued += 1
+                self.pending_tiles.appendleft(tile)  # first, so that a failing tile does not delay the end
+            self.condition.notify_all()
+
+
+def connect(address: tuple[str, int], connect_timeout: float) -> socket.socket:
+    """Connects to the coordinator, retrying until connect_timeout, in case the workers start first."""
+    deadline: Final = time.monotonic() + connect_timeout
+    while True:
+        try:
+            return socket.create_connection(address, timeout=connect_timeout)
+        except OSError:
+            if time.monotonic() >= deadline:
+                raise
+            time.sleep(polling_interval)
+
+
+def run_worker(address: tuple[str, int], connect_timeout: float = default_connect_timeout) -> int:
+    """Computes the tiles handed out by the coordinator at address until it says it is done, or goes away. Returns the
+    number of tiles computed."""
+    num_tiles = 0
+    with connect(address, connect_timeout) as connection:
+        connection.settimeout(None)  # waiting for the next tile can take long, when other workers have failed
+        send_message(connection, {'type': 'hello', 'version': protocol_version, 'host': socket.gethostname(),
+                                  'pid': os.getpid()})
+        view_message: Message | None = None
+        view: FractalView | None = None
+        while True:
+            try:
+                header, _ = receive_message(connection)
+            except ConnectionError:
+                return num_tiles
+            if header.get('type') != 'tile':
+                return num_tiles
+            if header['view'] != view_message:
+                view_message = header['view']
+                view = get_view_from_message(header['view'])
+            assert view is not None  # for mypy
+            j_0, j_1, i_0, i_1 = header['tile']
+            iterations = view.get_iterations(j_0, j_1, i_0, i_1).astype('<i4')
+            send_message(connection, {'type': 'result', 'tile': header['tile']}, iterations.tobytes())
+            num_tiles += 1
+
+
+def run_workers(address: tuple[str, int], num_processes: int,
+                connect_timeout: float = default_connect_timeout) -> int:
+    """Runs num_processes workers, each with its own connection. Returns the number of tiles computed."""
+    if num_processes < 1:
+        raise ValueError(f'Number of processes {num_processes} is out of range')
+    if num_processes == 1:
+        return run_worker(address, connect_timeout)
+    with multiprocessing.Pool(num_processes) as pool:
+        return sum(pool.starmap(run_worker, [(address, connect_timeout)] * num_processes))
+
+
+def create_parser() -> argparse.ArgumentParser:
+    parser: Final = argparse.ArgumentParser(description='Worker of the distributed rendering of the fractals.')
+    parser.add_argument('coordinator', metavar='<host>:<port>', help='address of the coordinator')
+    parser.add_argument('--processes', type=int, default=get_default_num_workers(),
+                        help='number of worker processes (default: one per CPU)')
+    parser.add_argument('--connect-timeout', type=float, default=default_connect_timeout,
+                        help=f'seconds to wait for the coordinator (default: {default_connect_timeout})')
+    return parser
+
+
+def main(argv: Sequence[str] | None = None) -> int:
+    args: Final = create_parser().parse_args(argv)
+    timer: Final = Timer()
+    num_tiles: Final = run_workers(parse_address(args.coordinator), args.processes, args.connect_timeout)
+    print(f'{num_tiles} tiles computed for {args.coordinator} in {timer.elapsed()}')
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,400 @@
+"""Escape-time engine for the Julia and Mandelbrot sets painted by `fractals.py`. It works on whole grids of complex
+numbers with NumPy and does not depend on tkinter, so that both the GUI and any batch job can share it.
+
+The iteration counts returned follow the semantics of the original per-pixel loop: the value stored for a pixel is the
+iteration k at which |z_k|^2 > magnitude, or 0 if that did not happen within k_max iterations (the 'no finished
+iterations' state, painted with color 0)."""
+
+import numpy as np
+import numpy.typing as npt
+import threading
+
+from enum import Enum
+from timer import Timer
+from typing import Callable, Final, Generator, Sequence, TypeAlias
+
+try:
+    from fractals_jit import get_escape_iterations_jit
+except ImportError:  # Numba is not installed
+    get_escape_iterations_jit = None  # type: ignore[assignment]
+
+IterationsArray: TypeAlias = npt.NDArray[np.int32]
+ComplexArray: TypeAlias = npt.NDArray[np.complex128]
+TupleOf2Floats: TypeAlias = tuple[float, float]
+TupleOf2Ints: TypeAlias = tuple[int, int]
+Tile: TypeAlias = tuple[int, int, int, int]  # j_0, j_1, i_0, i_1, that is, rows [j_0, j_1) and columns [i_0, i_1)
+
+
+class FractalKind(Enum):
+    julia = 'julia'
+    mandelbrot = 'mandelbrot'
+
+
+default_periodicity_tolerance: Final[float] = 1e-12
+
+
+def is_in_main_cardioid_or_period_2_bulb(c_x: float | npt.NDArray[np.float64],
+                                         c_y: float | npt.NDArray[np.float64]) -> bool | npt.NDArray[np.bool_]:
+    """Analytic test telling whether c = c_x + i c_y lies inside the main cardioid or the period-2 bulb of the
+    Mandelbrot set, whose orbits (starting at z_0 = 0) never escape. It works for floats and for NumPy arrays alike."""
+    q: Final = (c_x - .25) * (c_x - .25) + c_y * c_y
+    in_main_cardioid: Final = q * (q + (c_x - .25)) <= .25 * c_y * c_y
+    in_period_2_bulb: Final = (c_x + 1.) * (c_x + 1.) + c_y * c_y <= .0625
+    return in_main_cardioid | in_period_2_bulb
+
+
+def get_escape_iterations_of_point(z_0: complex, c: complex, magnitude: float, k_max: int,
+                                   periodicity_tolerance: float = 0.) -> int:
+    """Scalar reference version of `get_escape_iterations`, literally the loop of the original `go_julia` and
+    `go_mandelbrot`, plus the optional periodicity detection."""
+    k: int = 0
+    x_k = z_0.real
+    y_k = z_0.imag
+    x_saved, y_saved = x_k, y_k
+    next_saving_k: int = 1
+    while True:
+        x_k_plus_1 = x_k * x_k - y_k * y_k + c.real
+        y_k_plus_1 = 2. * x_k * y_k + c.imag
+        k += 1
+        x_k = x_k_plus_1
+        y_k = y_k_plus_1
+        r = x_k * x_k + y_k * y_k
+        if r > magnitude:
+            return k
+        elif k == k_max:
+            return 0
+        elif periodicity_tolerance > 0.:
+            if k == next_saving_k:
+                x_saved, y_saved = x_k, y_k
+                next_saving_k *= 2
+            elif abs(x_k - x_saved) < periodicity_tolerance and abs(y_k - y_saved) < periodicity_tolerance:
+                return 0  # the orbit has fallen into an attracting cycle, so it will never escape
+
+
+class EscapeTimeState(object):
+    """Orbit state (x_k, y_k, and c) of the still-active elements after k iterations, plus the iteration counts of the
+    already finished ones, so that iterating can be resumed later on with a larger k_max."""
+
+    def __init__(self, z_0: ComplexArray | complex, c: ComplexArray | complex, magnitude: float,
+                 periodicity_tolerance: float = 0., known_interior: npt.NDArray[np.bool_] | None = None,
+                 dtype: type[np.floating] = np.float64) -> None:
+        z_0_array: Final = np.asarray(z_0, dtype=np.complex128)
+        c_array: Final = np.asarray(c, dtype=np.complex128)
+        self.shape: Final = np.broadcast_shapes(z_0_array.shape, c_array.shape)
+        self.magnitude: Final = magnitude
+        self.periodicity_tolerance: Final = periodicity_tolerance
+        self.k = 0
+        self.iterations: Final = np.zeros(int(np.prod(self.shape)), dtype=np.int32)
+        self.active: npt.NDArray[np.intp] = np.arange(self.iterations.size) if known_interior is None \
+            else np.flatnonzero(~np.broadcast_to(known_interior, self.shape))
+
+        self.x = np.broadcast_to(z_0_array.real, self.shape).ravel()[self.active].astype(dtype, copy=False)
+        self.y = np.broadcast_to(z_0_array.imag, self.shape).ravel()[self.active].astype(dtype, copy=False)
+        self.c_is_constant: Final = c_array.ndim == 0
+        self.c_x: float | npt.NDArray[np.floating] = float(dtype(c_array.real)) if self.c_is_constant \
+            else np.broadcast_to(c_array.real, self.shape).ravel()[self.active].astype(dtype, copy=False)
+        self.c_y: float | npt.NDArray[np.floating] = float(dtype(c_array.imag)) if self.c_is_constant \
+            else np.broadcast_to(c_array.imag, self.shape).ravel()[self.active].astype(dtype, copy=False)
+
+        self.x_saved, self.y_saved = self.x, self.y  # for the periodicity detection
+        self.next_saving_k: int = 1
+
+    def get_iterations(self) -> IterationsArray:
+        return self.iterations.reshape(self.shape)
+
+    def keep(self, still_active: npt.NDArray[np.bool_]) -> None:
+        self.active = self.active[still_active]
+        self.x, self.y = self.x[still_active], self.y[still_active]
+        if self.periodicity_tolerance > 0.:
+            self.x_saved, self.y_saved = self.x_saved[still_active], self.y_saved[still_active]
+        if not self.c_is_constant:
+            assert isinstance(self.c_x, np.ndarray) and isinstance(self.c_y, np.ndarray)  # for mypy
+            self.c_x, self.c_y = self.c_x[still_active], self.c_y[still_active]
+
+
+def continue_escape_iterations(state: EscapeTimeState, k_max: int) -> None:
+    """Iterates z -> z^2 + c the still-active elements of the state from its k up to k_max, keeping only the
+    still-active elements, so that the work per iteration shrinks as the orbits escape. The arithmetic is the same (and
+    performed in the same order) as in `get_escape_iterations_of_point`, hence the results are identical, and so they
+    are if the iterations are split in several calls with increasing k_max values.
+
+    If the periodicity tolerance of the state is positive, orbits are also checked for periodicity, Brent-style: z is
+    saved at the iterations that are powers of 2, and the orbits that come back within the tolerance of their saved z
+    are stopped as non-escaping ones."""
+    check_periodicity: Final = state.periodicity_tolerance > 0.
+    tolerance: Final = state.periodicity_tolerance
+    magnitude: Final = state.magnitude
+    x, y, c_x, c_y = state.x, state.y, state.c_x, state.c_y
+    x_2 = x * x
+    y_2 = y * y
+    with np.errstate(over='ignore', invalid='ignore'):  # orbits going to infinity are simply not escaped ones
+        for k in range(state.k + 1, k_max + 1):
+            if state.active.size == 0:
+                break
+            y = 2. * x * y + c_y
+            x = x_2 - y_2 + c_x
+            x_2 = x * x
+            y_2 = y * y
+            state.k = k
+            escaped = x_2 + y_2 > magnitude
+            finished = escaped
+            if check_periodicity and k != state.next_saving_k:
+                finished = escaped | ((np.abs(x - state.x_saved) < tolerance) & (np.abs(y - state.y_saved) < tolerance))
+            if finished.any():
+                state.iterations[state.active[escaped]] = k
+                still_active = ~finished
+                state.x, state.y = x, y
+                state.keep(still_active)
+                x, y, c_x, c_y = state.x, state.y, state.c_x, state.c_y
+                x_2, y_2 = x_2[still_active], y_2[still_active]
+            if check_periodicity and k == state.next_saving_k:
+                state.x_saved, state.y_saved = x, y
+                state.next_saving_k *= 2
+    state.x, state.y = x, y
+    state.k = max(state.k, k_max)
+
+
+def get_escape_iterations(z_0: ComplexArray | complex, c: ComplexArray | complex,
+                          magnitude: float, k_max: int, periodicity_tolerance: float = 0.,
+                          dtype: type[np.floating] = np.float64) -> IterationsArray:
+    """Iterates z -> z^2 + c from z_0 for all the elements of the (broadcast) input arrays at once (see
+    `continue_escape_iterations`), with floats of the given type."""
+    state: Final = EscapeTimeState(z_0, c, magnitude, periodicity_tolerance, dtype=dtype)
+    continue_escape_iterations(state, k_max)
+    return state.get_iterations()
+
+
+def get_escape_iterations_point_by_point(z_0: ComplexArray | complex, c: ComplexArray | complex, magnitude: float,
+                                         k_max: int, periodicity_tolerance: float = 0.) -> IterationsArray:
+    """Same as `get_escape_iterations`, calling `get_escape_iterations_of_point` for each element (pure Python)."""
+    z_0_array, c_array = np.broadcast_arrays(np.asarray(z_0, dtype=np.complex128), np.asarray(c, dtype=np.complex128))
+    iterations: Final = np.empty(z_0_array.shape, dtype=np.int32)
+    for index, (z_0_element, c_element) in enumerate(zip(z_0_array.ravel().tolist(), c_array.ravel().tolist())):
+        iterations.flat[index] = get_escape_iterations_of_point(z_0_element, c_element, magnitude, k_max,
+                                                                periodicity_tolerance)
+    return iterations
+
+
+EscapeTimeKernel: TypeAlias = Callable[[ComplexArray | complex, ComplexArray | complex, float, int, float],
+                                       IterationsArray]
+
+
+class KernelBackend(Enum):
+    """Implementations of the escape-time loop, all of them returning identical iteration counts, from the slowest to
+    the fastest."""
+    pure = 'pure'
+    numpy = 'numpy'
+    jit = 'jit'  # only if Numba is installed
+
+
+def get_available_kernel_backends() -> tuple[KernelBackend, ...]:
+    return tuple(backend for backend in KernelBackend
+                 if backend != KernelBackend.jit or get_escape_iterations_jit is not None)
+
+
+def get_kernel_backend(name: str | None = None) -> KernelBackend:
+    """Returns the backend of the given name or, if name is None or 'auto', the fastest one available."""
+    available_backends: Final = get_available_kernel_backends()
+    if name is None or name == 'auto':
+        return available_backends[-1]
+    try:
+        backend: Final = KernelBackend(name)
+    except ValueError:
+        raise ValueError(f'Kernel backend {name!r} is unknown')
+    if backend not in available_backends:
+        raise ValueError(f'Kernel backend {name!r} is not available')
+    return backend
+
+
+def get_kernel(backend: KernelBackend) -> EscapeTimeKernel:
+    if backend == KernelBackend.pure:
+        return get_escape_iterations_point_by_point
+    if backend == KernelBackend.numpy:
+        return get_escape_iterations
+    if get_escape_iterations_jit is None:
+        raise ValueError(f'Kernel backend {backend.value!r} is not available')
+    return get_escape_iterations_jit
+
+
+def get_int_colors(iterations: IterationsArray, num_colors: int) -> npt.NDArray[np.intp]:
+    """Maps iteration counts to indices into the tuple returned by `generate_array_colors`: `k % num_colors + 1` for
+    the escaped points, and 0 for the rest."""
+    return np.where(iterations > 0, iterations % num_colors + 1, 0).astype(np.intp)
+
+
+def get_tiles(res_xy: TupleOf2Ints, tile_shape: TupleOf2Ints, region: Tile | None = None) -> list[Tile]:
+    """Splits a res_xy[0] x res_xy[1] image (or only the given region of it) in tiles of (at most) tile_shape[0] rows
+    and tile_shape[1] columns, in row-major order."""
+    if tile_shape[0] < 1 or tile_shape[1] < 1:
+        raise ValueError(f'Tile shape {tile_shape} is out of range')
+    j_start, j_end, i_start, i_end = (0, res_xy[1], 0, res_xy[0]) if region is None else region
+    tiles: Final[list[Tile]] = []
+    for j_0 in range(j_start, j_end, tile_shape[0]):
+        for i_0 in range(i_start, i_end, tile_shape[1]):
+            tiles.append((j_0, min(j_0 + tile_shape[0], j_end), i_0, min(i_0 + tile_shape[1], i_end)))
+    return tiles
+
+
+class FractalView(object):
+    """All the parameters needed to compute a fractal image, independently of any GUI. For the Julia set, the real and
+    imaginary ranges are those of x and y; for the Mandelbrot set, those of p and q. As in the original code, the
+    first row of the image corresponds to the maximum imaginary value."""
+    kind: Final[FractalKind]
+    c: Final[complex]
+    re_min_max: Final[TupleOf2Floats]
+    im_min_max: Final[TupleOf2Floats]
+    res_xy: Final[TupleOf2Ints]
+    magnitude: Final[float]
+    k_max: Final[int]
+    use_interior_checks: Final[bool]
+    kernel_backend: Final[KernelBackend]
+
+    def __new__(cls, kind: FractalKind, re_min_max: TupleOf2Floats, im_min_max: TupleOf2Floats, res_xy: TupleOf2Ints,
+                magnitude: float, k_max: int, c: complex = 0j, use_interior_checks: bool = False,
+                kernel_backend: KernelBackend = KernelBackend.numpy) -> 'FractalView':
+        if res_xy[0] < 2 or res_xy[1] < 2:
+            raise ValueError(f'Resolution {res_xy[0]}x{res_xy[1]} is out of range')
+        if magnitude <= 0:
+            raise ValueError(f'Magnitude {magnitude} is out of range')
+        if k_max < 1:
+            raise ValueError(f'k_max {k_max} is out of range')
+        if kernel_backend not in get_available_kernel_backends():
+            raise ValueError(f'Kernel backend {kernel_backend.value!r} is not available')
+        return object.__new__(cls)
+
+    def __init__(self, kind: FractalKind, re_min_max: TupleOf2Floats, im_min_max: TupleOf2Floats, res_xy: TupleOf2Ints,
+                 magnitude: float, k_max: int, c: complex = 0j, use_interior_checks: bool = False,
+                 kernel_backend: KernelBackend = KernelBackend.numpy) -> None:
+        self.kind = kind
+        self.c = complex(c)
+        self.re_min_max = float(re_min_max[0]), float(re_min_max[1])
+        self.im_min_max = float(im_min_max[0]), float(im_min_max[1])
+        self.res_xy = int(res_xy[0]), int(res_xy[1])
+        self.magnitude = float(magnitude)
+        self.k_max = int(k_max)
+        self.use_interior_checks = use_interior_checks
+        self.kernel_backend = kernel_backend
+
+    def __getnewargs__(self) -> tuple:
+        """Lets the views be pickled, as needed to hand them to worker processes that are spawned (not forked)."""
+        return (self.kind, self.re_min_max, self.im_min_max, self.res_xy, self.magnitude, self.k_max, self.c,
+                self.use_interior_checks, self.kernel_backend)
+
+    def __str__(self) -> str:
+        c_str: Final = f', c={self.c}' if self.kind == FractalKind.julia else ''
+        return (f'FractalView({self.kind.value}{c_str}, re={self.re_min_max}, im={self.im_min_max}, '
+                f'res={self.res_xy[0]}x{self.res_xy[1]}, M={self.magnitude}, k_max={self.k_max})')
+
+    def get_kernel(self) -> EscapeTimeKernel:
+        return get_kernel(self.kernel_backend)
+
+    def get_increments(self) -> TupleOf2Floats:
+        """Returns (inc_x, inc_y), or (inc_p, inc_q), the latter being negative ('beware!' in the original code)."""
+        inc_re: Final = (self.re_min_max[1] - self.re_min_max[0])/(self.res_xy[0] - 1.)
+        inc_im: Final = (self.im_min_max[0] - self.im_min_max[1])/(self.res_xy[1] - 1.)
+        return inc_re, inc_im
+
+    def get_grid(self, j_0: int = 0, j_1: int | None = None, i_0: int = 0, i_1: int | None = None) -> ComplexArray:
+        """Returns the complex numbers of the pixels of rows [j_0, j_1) and columns [i_0, i_1)."""
+        j_end: Final = self.res_xy[1] if j_1 is None else j_1
+        i_end: Final = self.res_xy[0] if i_1 is None else i_1
+        inc_re, inc_im = self.get_increments()
+        re: Final = self.re_min_max[0] + np.arange(i_0, i_end) * inc_re
+        im: Final = self.im_min_max[1] + np.arange(j_0, j_end) * inc_im
+        grid: Final = np.empty((j_end - j_0, i_end - i_0), dtype=np.complex128)
+        grid.real = re[np.newaxis, :]
+        grid.imag = im[:, np.newaxis]
+        return grid
+
+    def get_iterations_of_points(self, points: ComplexArray) -> IterationsArray:
+        """Returns the escape iterations of arbitrary points of the complex plane (z_0 for the Julia set, c for the
+        Mandelbrot set). With use_interior_checks, the points known to be interior (the main cardioid and the period-2
+        bulb of the Mandelbrot set, and the orbits detected as periodic) are not iterated up to k_max. The escape-time
+        loop is that of `get_kernel`."""
+        tolerance: Final = default_periodicity_tolerance if self.use_interior_checks else 0.
+        kernel: Final = self.get_kernel()
+        if self.kind == FractalKind.julia:
+            return kernel(points, self.c, self.magnitude, self.k_max, tolerance)
+        if not self.use_interior_checks:
+            return kernel(0j, points, self.magnitude, self.k_max, 0.)
+        iterations: Final = np.zeros(points.shape, dtype=np.int32)
+        outside: Final = ~is_in_main_cardioid_or_period_2_bulb(points.real, points.imag)
+        iterations[outside] = kernel(0j, points[outside], self.magnitude, self.k_max, tolerance)
+        return iterations
+
+    def get_iterations(self, j_0: int = 0, j_1: int | None = None, i_0: int = 0,
+                       i_1: int | None = None) -> IterationsArray:
+        """Returns the escape iterations of the pixels of rows [j_0, j_1) and columns [i_0, i_1)."""
+        return self.get_iterations_of_points(self.get_grid(j_0, j_1, i_0, i_1))
+
+    def get_escape_time_state(self, j_0: int = 0, j_1: int | None = None, i_0: int = 0,
+                              i_1: int | None = None) -> EscapeTimeState:
+        """Returns the orbit state of the pixels of rows [j_0, j_1) and columns [i_0, i_1) before any iteration, to be
+        advanced with `continue_escape_iterations` (up to self.k_max or beyond)."""
+        tolerance: Final = default_periodicity_tolerance if self.use_interior_checks else 0.
+        grid: Final = self.get_grid(j_0, j_1, i_0, i_1)
+        if self.kind == FractalKind.julia:
+            return EscapeTimeState(grid, self.c, self.magnitude, tolerance)
+        known_interior: Final = np.asarray(is_in_main_cardioid_or_period_2_bulb(grid.real, grid.imag)) \
+            if self.use_interior_checks else None
+        return EscapeTimeState(0j, grid, self.magnitude, tolerance, known_interior)
+
+
+class CancellationToken(object):
+    """Lets a render be cancelled from elsewhere (for instance, by a new click on "Go!"), even from another thread."""
+
+    def __init__(self) -> None:
+        self._event = threading.Event()
+
+    def cancel(self) -> None:
+        self._event.set()
+
+    def is_cancelled(self) -> bool:
+        return self._event.is_set()
+
+
+progressive_steps: Final[tuple[int, ...]] = 8, 4, 2, 1  # i.e., 1/8, 1/4, 1/2 and then full resolution
+progressive_chunk_size: Final[int] = 1 << 16  # points computed between two calls to is_cancelled
+
+
+def generate_progressive_iterations(view: FractalView, is_cancelled: Callable[[], bool] = lambda: False,
+                                    steps: Sequence[int] = progressive_steps) \
+        -> Generator[tuple[int, IterationsArray], None, None]:
+    """Yields (step, preview) pairs, the preview being a full-resolution image where each computed sample (one pixel
+    out of step x step) is replicated over its step x step block. Each step must divide the previous one, so that the
+    samples of the coarser levels are reused and never computed again. The function is_cancelled is called between
+    chunks of points (a GUI may process its pending events in it); once it returns True, no more levels are
+    yielded."""
+    for previous_step, step in zip(steps, steps[1:]):
+        if previous_step % step != 0:
+            raise ValueError(f'Progressive steps {tuple(steps)} are not successive divisors')
+    res_i, res_j = view.res_xy
+    iterations: Final = np.zeros((res_j, res_i), dtype=np.int32)
+    computed: Final = np.zeros((res_j, res_i), dtype=bool)
+    grid: Final = view.get_grid()
+    for step in steps:
+        lattice = np.s_[::step, ::step]
+        rows, columns = np.nonzero(~computed[lattice])
+        rows *= step
+        columns *= step
+        for start in range(0, rows.size, progressive_chunk_size):
+            if is_cancelled():
+                return
+            chunk = np.s_[start:start + progressive_chunk_size]
+            iterations[rows[chunk], columns[chunk]] = view.get_iterations_of_points(grid[rows[chunk], columns[chunk]])
+        if is_cancelled():
+            return
+        computed[lattice] = True
+        samples = iterations[lattice]
+        yield step, np.repeat(np.repeat(samples, step, axis=0), step, axis=1)[:res_j, :res_i]
+
+
+def main():
+    view: Final = FractalView(FractalKind.mandelbrot, (-2.25, .75), (-1.5, 1.5), (1024, 1024), 100., 256)
+    timer: Final = Timer()
+    iterations: Final = view.get_iterations()
+    print(f'{view}: {np.count_nonzero(iterations == 0)} interior pixels, computed in {timer.elapsed()}')
+
+
+if __name__ == '__main__':
+    main()
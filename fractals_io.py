@@ -0,0 +1,74 @@
+"""Writers of fractal images (PNG and PPM) and iteration arrays (NumPy's .npy) that need neither tkinter nor any
+imaging library: the PNG encoder only uses `zlib` from the standard library. Also, an atomic writer of JSON files."""
+
+import json
+import numpy as np
+import numpy.typing as npt
+import os
+import struct
+import zlib
+
+from enum import Enum
+from pathlib import Path
+from typing import Any, Final
+
+
+class OutputFormat(Enum):
+    png = '.png'
+    ppm = '.ppm'
+    npy = '.npy'
+
+
+def get_output_format(path: str | Path) -> OutputFormat:
+    suffix: Final = Path(path).suffix.lower()
+    for output_format in OutputFormat:
+        if output_format.value == suffix:
+            return output_format
+    raise ValueError(f'Unsupported output file extension "{suffix}" (use one of .png, .ppm or .npy)')
+
+
+def check_rgb_image(rgb_image: npt.NDArray[np.uint8]) -> None:
+    if rgb_image.ndim != 3 or rgb_image.shape[2] != 3 or rgb_image.dtype != np.uint8:
+        raise ValueError('The image should be a (rows, columns, 3) array of uint8')
+
+
+def get_ppm_bytes(rgb_image: npt.NDArray[np.uint8]) -> bytes:
+    check_rgb_image(rgb_image)
+    height, width, _ = rgb_image.shape
+    return f'P6\n{width} {height}\n255\n'.encode('ascii') + np.ascontiguousarray(rgb_image).tobytes()
+
+
+def get_png_chunk(chunk_type: bytes, data: bytes) -> bytes:
+    return struct.pack('>I', len(data)) + chunk_type + data + struct.pack('>I', zlib.crc32(chunk_type + data))
+
+
+def get_png_bytes(rgb_image: npt.NDArray[np.uint8], compression_level: int = 6) -> bytes:
+    check_rgb_image(rgb_image)
+    height, width, _ = rgb_image.shape
+    header: Final = struct.pack('>IIBBBBB', width, height, 8, 2, 0, 0, 0)  # 8-bit depth, truecolor, no interlace
+    rows: Final = np.zeros((height, 1 + 3*width), dtype=np.uint8)  # each row is preceded by its filter type, 0 (None)
+    rows[:, 1:] = rgb_image.reshape(height, 3*width)
+    return (b'\x89PNG\r\n\x1a\n' + get_png_chunk(b'IHDR', header)
+            + get_png_chunk(b'IDAT', zlib.compress(rows.tobytes(), compression_level))
+            + get_png_chunk(b'IEND', b''))
+
+
+def save_as_ppm(rgb_image: npt.NDArray[np.uint8], path: str | Path) -> None:
+    with open(path, 'wb') as file_out:
+        file_out.write(get_ppm_bytes(rgb_image))
+
+
+def save_as_png(rgb_image: npt.NDArray[np.uint8], path: str | Path) -> None:
+    with open(path, 'wb') as file_out:
+        file_out.write(get_png_bytes(rgb_image))
+
+
+def save_iterations(iterations: npt.NDArray[np.int32], path: str | Path) -> None:
+    np.save(path, iterations, allow_pickle=False)
+
+
+def save_json_atomically(path: str, data: dict[str, Any], indent: int | None = None) -> None:
+    """Writes data to a temporary file renamed to path, atomically, so that an interruption leaves a valid file."""
+    with open(path + '.tmp', 'w') as file:
+        json.dump(data, file, indent=indent)
+    os.replace(path + '.tmp', path)
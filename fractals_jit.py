@@ -0,0 +1,53 @@
+"""Optional JIT-compiled escape-time kernel, used by `fractals_engine` when Numba is installed (importing this module
+raises ImportError otherwise). The loop is that of `get_escape_iterations_of_point`, compiled without fast-math, so that
+the floating-point operations (and hence the iteration counts) are exactly those of the other kernels."""
+
+import numba  # type: ignore[import-not-found]
+import numpy as np
+import numpy.typing as npt
+
+from typing import Final
+
+
+@numba.njit(cache=True, nogil=True)
+def _get_escape_iterations_of_points(x_0: npt.NDArray[np.float64], y_0: npt.NDArray[np.float64],
+                                     c_x: npt.NDArray[np.float64], c_y: npt.NDArray[np.float64], magnitude: float,
+                                     k_max: int, periodicity_tolerance: float,
+                                     iterations: npt.NDArray[np.int32]) -> None:
+    for n in range(x_0.size):
+        iterations[n] = 0
+        k = 0
+        x_k = x_0[n]
+        y_k = y_0[n]
+        x_saved, y_saved = x_k, y_k
+        next_saving_k = 1
+        while True:
+            x_k_plus_1 = x_k * x_k - y_k * y_k + c_x[n]
+            y_k_plus_1 = 2. * x_k * y_k + c_y[n]
+            k += 1
+            x_k = x_k_plus_1
+            y_k = y_k_plus_1
+            if x_k * x_k + y_k * y_k > magnitude:
+                iterations[n] = k
+                break
+            elif k == k_max:
+                break
+            elif periodicity_tolerance > 0.:
+                if k == next_saving_k:
+                    x_saved, y_saved = x_k, y_k
+                    next_saving_k *= 2
+                elif abs(x_k - x_saved) < periodicity_tolerance and abs(y_k - y_saved) < periodicity_tolerance:
+                    break
+
+
+def get_escape_iterations_jit(z_0: npt.NDArray[np.complex128] | complex, c: npt.NDArray[np.complex128] | complex,
+                              magnitude: float, k_max: int, periodicity_tolerance: float = 0.) -> npt.NDArray[np.int32]:
+    """Same as `fractals_engine.get_escape_iterations`, with the compiled loop."""
+    z_0_array, c_array = np.broadcast_arrays(np.asarray(z_0, dtype=np.complex128), np.asarray(c, dtype=np.complex128))
+    iterations: Final = np.empty(z_0_array.shape, dtype=np.int32)
+    _get_escape_iterations_of_points(np.ascontiguousarray(z_0_array.real).ravel(),
+                                     np.ascontiguousarray(z_0_array.imag).ravel(),
+                                     np.ascontiguousarray(c_array.real).ravel(),
+                                     np.ascontiguousarray(c_array.imag).ravel(),
+                                     float(magnitude), int(k_max), float(periodicity_tolerance), iterations.reshape(-1))
+    return iterations
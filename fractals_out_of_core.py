@@ -0,0 +1,242 @@
+"""Out-of-core rendering, for images far larger than the memory (say, 65536x65536 pixels for a poster print): the view
+is computed in bands of full rows, in parallel but consumed in order, and each band is written to disk as soon as it is
+available, into a .npy iteration buffer (through `numpy.memmap`) or streamed into a PNG or PPM file. At most two bands
+per worker are in memory at any time, whatever the resolution.
+
+After each band, a small progress file (the output path plus `.progress.json`) records the rows already written (and,
+for PNG files, the state of the compressed stream), so that an interrupted render resumes from the last finished band
+when called again with the same parameters. The progress file is removed once the image is complete."""
+
+import json
+import numpy as np
+import numpy.typing as npt
+import os
+import struct
+import zlib
+
+from fractals_colors import generate_rgb_palette, get_lookup_table
+from fractals_engine import FractalKind, FractalView, IterationsArray
+from fractals_io import OutputFormat, get_output_format, get_png_chunk, save_json_atomically
+from fractals_parallel import generate_results_in_order
+from timer import Timer
+from typing import Any, Final, Generator
+
+default_band_pixels: Final[int] = 1 << 20  # pixels per band (4 MiB of iterations)
+progress_suffix: Final[str] = '.progress.json'
+png_signature: Final[bytes] = b'\x89PNG\r\n\x1a\n'
+zlib_header: Final[bytes] = b'\x78\x9c'  # deflate with a 32 KiB window, default compression
+
+
+def get_band_rows(view: FractalView, band_pixels: int = default_band_pixels) -> int:
+    return max(1, band_pixels // view.res_xy[0])
+
+
+def get_band_iterations(view: FractalView, j_0: int, j_1: int) -> IterationsArray:
+    return view.get_iterations(j_0, j_1)
+
+
+def generate_bands(view: FractalView, first_row: int, band_rows: int, num_workers: int | None = None) \
+        -> Generator[tuple[int, IterationsArray], None, None]:
+    """Yields (j_0, iterations of the rows [j_0, j_0 + band_rows)) from the first row on, in order. At most two bands
+    per worker are pending at any time, so that the memory remains bounded however slowly the bands are consumed."""
+    if band_rows < 1:
+        raise ValueError(f'Number of rows per band {band_rows} is out of range')
+    res_y: Final = view.res_xy[1]
+    starts: Final = range(first_row, res_y, band_rows)
+    yield from zip(starts, generate_results_in_order(get_band_iterations,
+                                                     [(view, j_0, min(j_0 + band_rows, res_y)) for j_0 in starts],
+                                                     num_workers))
+
+
+def get_render_key(view: FractalView, band_rows: int, rgb_palette: npt.NDArray[np.uint8] | None) -> str:
+    """Identifies a render, so that only an identical one is resumed."""
+    palette_crc: Final = None if rgb_palette is None else zlib.crc32(np.ascontiguousarray(rgb_palette).tobytes())
+    return repr((type(view).__name__, sorted(view.__dict__.items()), band_rows, palette_crc))
+
+
+class IterationsWriter(object):
+    """Writes the bands into a .npy file through a memory map."""
+
+    def __init__(self, path: str, view: FractalView, state: dict[str, Any] | None) -> None:
+        shape: Final = view.res_xy[1], view.res_xy[0]
+        self.iterations = np.lib.format.open_memmap(path, mode='w+', dtype=np.int32, shape=shape) if state is None \
+            else np.lib.format.open_memmap(path, mode='r+')
+        if self.iterations.shape != shape:
+            raise ValueError(f'The iterations in {path} have shape {self.iterations.shape} instead of {shape}')
+
+    def write(self, j_0: int, iterations: IterationsArray) -> None:
+        self.iterations[j_0:j_0 + len(iterations)] = iterations
+        self.iterations.flush()
+
+    def get_state(self) -> dict[str, Any]:
+        return {}
+
+    def finish(self) -> None:
+        self.close()
+
+    def close(self) -> None:
+        self.iterations.flush()
+        del self.iterations  # closes the memory map
+
+
+class ImageWriter(object):
+    """Base of the writers that stream rows of colors into a file, which is truncated back to the last finished band
+    when resuming."""
+
+    def __init__(self, path: str, view: FractalView, rgb_palette: npt.NDArray[np.uint8],
+                 state: dict[str, Any] | None) -> None:
+        self.width = view.res_xy[0]
+        self.lookup_table = get_lookup_table(rgb_palette, view.k_max)
+        if state is None:
+            self.file = open(path, 'w+b')
+            self.file.write(self.get_header(view))
+        else:
+            self.file = open(path, 'r+b')
+            self.file.truncate(state['offset'])
+            self.file.seek(state['offset'])
+
+    def get_header(self, view: FractalView) -> bytes:
+        raise NotImplementedError
+
+    def write(self, j_0: int, iterations: IterationsArray) -> None:
+        raise NotImplementedError
+
+    def get_rows(self, iterations: IterationsArray) -> npt.NDArray[np.uint8]:
+        return self.lookup_table[iterations]
+
+    def get_state(self) -> dict[str, Any]:
+        return {'offset': self.file.tell()}
+
+    def finish(self) -> None:
+        self.close()
+
+    def close(self) -> None:
+        self.file.close()
+
+
+class PpmWriter(ImageWriter):
+
+    def get_header(self, view: FractalView) -> bytes:
+        return f'P6\n{view.res_xy[0]} {view.res_xy[1]}\n255\n'.encode('ascii')
+
+    def write(self, j_0: int, iterations: IterationsArray) -> None:
+        self.file.write(self.get_rows(iterations).tobytes())
+        self.file.flush()
+
+
+class PngWriter(ImageWriter):
+    """Each band goes to its own IDAT chunk, compressed as raw deflate blocks ending with a full flush, which does not
+    depend on the data before, so that a new compressor can go on after an interruption. The zlib header and trailer
+    (the Adler-32 checksum of all the rows, carried over in the progress file) are written by hand."""
+
+    def __init__(self, path: str, view: FractalView, rgb_palette: npt.NDArray[np.uint8],
+                 state: dict[str, Any] | None) -> None:
+        self.adler32 = 1 if state is None else int(state['adler32'])
+        super().__init__(path, view, rgb_palette, state)
+
+    def get_header(self, view: FractalView) -> bytes:
+        header: Final = struct.pack('>IIBBBBB', view.res_xy[0], view.res_xy[1], 8, 2, 0, 0, 0)
+        return png_signature + get_png_chunk(b'IHDR', header) + get_png_chunk(b'IDAT', zlib_header)
+
+    def write(self, j_0: int, iterations: IterationsArray) -> None:
+        rows: Final = np.zeros((len(iterations), 1 + 3*self.width), dtype=np.uint8)  # filter type 0 (None) first
+        rows[:, 1:] = self.get_rows(iterations).reshape(len(iterations), 3*self.width)
+        data: Final = rows.tobytes()
+        self.adler32 = zlib.adler32(data, self.adler32)
+        compressor: Final = zlib.compressobj(wbits=-15)
+        self.file.write(get_png_chunk(b'IDAT', compressor.compress(data) + compressor.flush(zlib.Z_FULL_FLUSH)))
+        self.file.flush()
+
+    def get_state(self) -> dict[str, Any]:
+        return {'offset': self.file.tell(), 'adler32': self.adler32}
+
+    def finish(self) -> None:
+        final_block: Final = zlib.compressobj(wbits=-15).flush(zlib.Z_FINISH)  # empty, with the last-block bit set
+        self.file.write(get_png_chunk(b'IDAT', final_block + struct.pack('>I', self.adler32)))
+        self.file.write(get_png_chunk(b'IEND', b''))
+        self.close()
+
+
+def get_progress_path(path: str) -> str:
+    return path + progress_suffix
+
+
+def load_progress(path: str, key: str) -> dict[str, Any] | None:
+    """Returns the progress of the render of path, if any, and if it is that of the render identified by key."""
+    try:
+        with open(get_progress_path(path)) as file:
+            progress: Final = json.load(file)
+    except (OSError, ValueError):
+        return None
+    return progress if progress.get('key') == key and os.path.exists(path) else None
+
+
+def save_progress(path: str, key: str, next_row: int, state: dict[str, Any]) -> None:
+    save_json_atomically(get_progress_path(path), {'key': key, 'next_row': next_row, **state})
+
+
+def get_writer(view: FractalView, path: str, rgb_palette: npt.NDArray[np.uint8] | None,
+               state: dict[str, Any] | None) -> IterationsWriter | ImageWriter:
+    """Returns the writer of path, according to its extension, resuming from state (see `get_state`) if not None."""
+    output_format: Final = get_output_format(path)
+    if output_format == OutputFormat.npy:
+        return IterationsWriter(path, view, state)
+    if rgb_palette is None:
+        raise ValueError(f'A palette is needed to write {path}')
+    writer_class: Final = PngWriter if output_format == OutputFormat.png else PpmWriter
+    return writer_class(path, view, rgb_palette, state)
+
+
+def render_out_of_core(view: FractalView, path: str, rgb_palette: npt.NDArray[np.uint8] | None = None,
+                       num_workers: int | None = None, band_rows: int | None = None, resume: bool = True) -> int:
+    """Renders the view into path (.npy for the iteration counts, or .png or .ppm, colored with rgb_palette) band by
+    band, resuming an interrupted render of the same parameters unless resume is False. Returns the number of rows
+    computed, that is, those that were not already written by a previous call."""
+    output_format: Final = get_output_format(path)
+    if output_format != OutputFormat.npy and rgb_palette is None:
+        raise ValueError(f'A palette is needed to write {path}')
+    rows_per_band: Final = get_band_rows(view) if band_rows is None else band_rows
+    key: Final = get_render_key(view, rows_per_band, None if output_format == OutputFormat.npy else rgb_palette)
+    progress: Final = load_progress(path, key) if resume else None
+    first_row: Final = 0 if progress is None else int(progress['next_row'])
+
+    writer: Final = get_writer(view, path, rgb_palette, progress)
+    try:
+        save_progress(path, key, first_row, writer.get_state())
+        for j_0, iterations in generate_bands(view, first_row, rows_per_band, num_workers):
+            writer.write(j_0, iterations)
+            save_progress(path, key, j_0 + len(iterations), writer.get_state())
+    except BaseException:
+        writer.close()
+        raise
+    writer.finish()
+    os.remove(get_progress_path(path))
+    return view.res_xy[1] - first_row
+
+
+def write_out_of_core(view: FractalView, iterations: IterationsArray, path: str,
+                      rgb_palette: npt.NDArray[np.uint8] | None = None, band_rows: int | None = None) -> None:
+    """Writes the iterations of the view, already computed (typically, a memory map of a .npy file, see
+    `np.load(path, mmap_mode='r')`), into path, band by band, so that only a band of colors is in memory at any time."""
+    rows_per_band: Final = get_band_rows(view) if band_rows is None else band_rows
+    if rows_per_band < 1:
+        raise ValueError(f'Number of rows per band {rows_per_band} is out of range')
+    writer: Final = get_writer(view, path, rgb_palette, None)
+    try:
+        for j_0 in range(0, view.res_xy[1], rows_per_band):
+            writer.write(j_0, np.asarray(iterations[j_0:j_0 + rows_per_band]))
+    except BaseException:
+        writer.close()
+        raise
+    writer.finish()
+
+
+def main():
+    view: Final = FractalView(FractalKind.mandelbrot, (-2.25, .75), (-1.5, 1.5), (8192, 8192), 100., 256)
+    timer: Final = Timer()
+    num_rows: Final = render_out_of_core(view, 'mandelbrot_out_of_core.png', generate_rgb_palette(64, 7, 1, 1))
+    print(f'{view}: {num_rows} rows rendered into mandelbrot_out_of_core.png in {timer.elapsed()}')
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,142 @@
+"""Multi-core rendering of a `FractalView`: the image is split into tiles that a pool of processes computes, writing
+straight into a single shared-memory iteration buffer, so that no result is pickled back to the parent process.
+
+Near the boundary of the sets the cost of the rows is very unequal, so the tiles are small (many more tiles than
+workers) and handed out one at a time, which balances the load dynamically: a worker that finishes early simply takes
+the next pending tile."""
+
+import collections
+import multiprocessing
+import numpy as np
+import os
+
+from fractals_engine import FractalKind, FractalView, IterationsArray, Tile, TupleOf2Ints, get_tiles
+from multiprocessing.shared_memory import SharedMemory
+from timer import Timer
+from typing import Callable, Final, Generator, Sequence, TypeVar
+
+default_tile_shape: Final[TupleOf2Ints] = 16, 256  # rows, columns
+min_pixels_for_parallelism: Final[int] = 256*256  # below this, spawning the pool costs more than it saves
+
+Result = TypeVar('Result')
+
+# Per-worker state, set up once by `_initialize_worker`
+_worker_view: FractalView | None = None
+_worker_shared_memory: SharedMemory | None = None
+_worker_iterations: IterationsArray | None = None
+
+
+def get_default_num_workers() -> int:
+    return os.cpu_count() or 1
+
+
+def _initialize_worker(view: FractalView, shared_memory_name: str) -> None:
+    global _worker_view, _worker_shared_memory, _worker_iterations
+    _worker_view = view
+    _worker_shared_memory = SharedMemory(name=shared_memory_name)
+    _worker_iterations = np.ndarray((view.res_xy[1], view.res_xy[0]), dtype=np.int32, buffer=_worker_shared_memory.buf)
+
+
+def _compute_tile(tile: Tile) -> Tile:
+    assert _worker_view is not None and _worker_iterations is not None  # set by `_initialize_worker`
+    j_0, j_1, i_0, i_1 = tile
+    _worker_iterations[j_0:j_1, i_0:i_1] = _worker_view.get_iterations(j_0, j_1, i_0, i_1)
+    return tile
+
+
+def get_tiles_to_compute(view: FractalView, tile_shape: TupleOf2Ints = default_tile_shape,
+                         regions: Sequence[Tile] | None = None) -> list[Tile]:
+    return get_tiles(view.res_xy, tile_shape) if regions is None \
+        else [tile for region in regions for tile in get_tiles(view.res_xy, tile_shape, region)]
+
+
+def generate_iterations_in_parallel(view: FractalView, num_workers: int | None = None,
+                                    tile_shape: TupleOf2Ints = default_tile_shape,
+                                    regions: Sequence[Tile] | None = None,
+                                    min_pixels: int = min_pixels_for_parallelism,
+                                    context: multiprocessing.context.BaseContext | None = None) \
+        -> Generator[tuple[Tile, IterationsArray], None, None]:
+    """Yields (tile, iterations of the tile) as soon as each tile (of the regions, or of the whole view) is computed,
+    in completion order, so that a caller can show the progress or stop early (closing the generator terminates the
+    workers). The iterations yielded may be a view of a shared buffer, only valid until the next tile is requested.
+    The pool is started with the given multiprocessing context (by default, the platform's one)."""
+    workers: Final = get_default_num_workers() if num_workers is None else num_workers
+    if workers < 1:
+        raise ValueError(f'Number of workers {workers} is out of range')
+    tiles: Final = get_tiles_to_compute(view, tile_shape, regions)
+    num_pixels: Final = view.res_xy[0] * view.res_xy[1]
+    if workers == 1 or num_pixels < min_pixels:
+        for tile in tiles:
+            yield tile, view.get_iterations(*tile)
+        return
+
+    shared_memory: Final = SharedMemory(create=True, size=num_pixels * np.dtype(np.int32).itemsize)
+    try:
+        pool_context: Final = multiprocessing.get_context() if context is None else context
+        with pool_context.Pool(max(1, min(workers, len(tiles))), initializer=_initialize_worker,
+                               initargs=(view, shared_memory.name)) as pool:
+            shared_iterations: Final = np.ndarray((view.res_xy[1], view.res_xy[0]), dtype=np.int32,
+                                                  buffer=shared_memory.buf)
+            try:
+                for j_0, j_1, i_0, i_1 in pool.imap_unordered(_compute_tile, tiles, chunksize=1):
+                    yield (j_0, j_1, i_0, i_1), shared_iterations[j_0:j_1, i_0:i_1]
+            finally:
+                del shared_iterations  # release the buffer before closing the shared memory
+    finally:
+        shared_memory.close()
+        shared_memory.unlink()
+
+
+def get_iterations_in_parallel(view: FractalView, num_workers: int | None = None,
+                               tile_shape: TupleOf2Ints = default_tile_shape,
+                               regions: Sequence[Tile] | None = None,
+                               min_pixels: int = min_pixels_for_parallelism) -> IterationsArray:
+    """Returns the same as `view.get_iterations()`, computed by num_workers processes (by default, one per CPU). If
+    regions are given, only their pixels are computed, the rest of the returned array being left as 0. Views with
+    fewer than min_pixels pixels are computed in this process."""
+    workers: Final = get_default_num_workers() if num_workers is None else num_workers
+    if workers < 1:
+        raise ValueError(f'Number of workers {workers} is out of range')
+    if regions is None and (workers == 1 or view.res_xy[0] * view.res_xy[1] < min_pixels):
+        return view.get_iterations()  # in one go
+    iterations: Final = np.zeros((view.res_xy[1], view.res_xy[0]), dtype=np.int32)
+    for (j_0, j_1, i_0, i_1), tile_iterations in generate_iterations_in_parallel(view, workers, tile_shape, regions,
+                                                                                 min_pixels):
+        iterations[j_0:j_1, i_0:i_1] = tile_iterations
+    return iterations
+
+
+def generate_results_in_order(function: Callable[..., Result], arguments: Sequence[tuple],
+                              num_workers: int | None = None) -> Generator[Result, None, None]:
+    """Yields function(*arguments[n]) for each n, in order, computed by num_workers processes (by default, one per CPU;
+    in this process if there is a single one, or a single call). At most two calls per worker are pending at any time
+    (computed, or being computed, while an earlier one is not ready yet), so that the memory remains bounded however
+    slowly the results are consumed."""
+    workers: Final = get_default_num_workers() if num_workers is None else num_workers
+    if workers < 1:
+        raise ValueError(f'Number of workers {workers} is out of range')
+    if workers == 1 or len(arguments) <= 1:
+        for call_arguments in arguments:
+            yield function(*call_arguments)
+        return
+
+    with multiprocessing.Pool(min(workers, len(arguments))) as pool:
+        pending: Final[collections.deque] = collections.deque()
+        for call_arguments in arguments:
+            pending.append(pool.apply_async(function, call_arguments))
+            if len(pending) >= 2 * workers:
+                yield pending.popleft().get()
+        while pending:
+            yield pending.popleft().get()
+
+
+def main():
+    view: Final = FractalView(FractalKind.mandelbrot, (-2.25, .75), (-1.5, 1.5), (2048, 2048), 100., 256)
+    for num_workers in 1, get_default_num_workers():
+        timer = Timer()
+        get_iterations_in_parallel(view, num_workers)
+        print(f'{view} with {num_workers} worker(s) took {timer.elapsed()}')
+
+
+if __name__ == '__main__':
+    main()
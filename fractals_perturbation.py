@@ -0,0 +1,228 @@
+"""Perturbation-theory deep-zoom engine for the Mandelbrot set. Past zoom widths of about 1e-13, neighboring pixels are
+no longer distinct float64 numbers. Instead, a single reference orbit Z_n is computed in high precision (at the center
+of the view, with `decimal`), and each pixel c = C + dc only iterates its float64 delta dz_n = z_n - Z_n:
+
+  dz_{n+1} = 2 Z_n dz_n + dz_n^2 + dc
+
+which involves small numbers only, so the cost per pixel is that of the plain float64 engine.
+
+Glitches (pixels whose orbit drifts too far from the reference one for float64 to keep track of it) are detected, as
+usual, when |z_n| < |dz_n|, and rebased: the delta becomes the full value z_n and the reference index restarts at 0
+(Z_0 = 0), which lets a single reference orbit serve the whole image. The same is done when a pixel outlives the
+reference orbit. Optionally, a third-order series approximation (dz_n ~ A_n dc + B_n dc^2 + C_n dc^3) skips the first
+iterations, common to all the pixels, while it remains accurate over the whole view."""
+
+import decimal
+import math
+import numpy as np
+
+from decimal import Decimal
+from fractals_engine import ComplexArray, FractalKind, FractalView, IterationsArray, Tile, TupleOf2Ints, get_tiles
+from timer import Timer
+from typing import Final, Generator
+
+extra_precision_digits: Final[int] = 15  # beyond those needed to tell neighboring pixels apart
+default_series_tolerance: Final[float] = 1e-9  # relative weight of the third-order term allowed when skipping
+
+SeriesApproximation = tuple[int, complex, complex, complex]  # n, A_n, B_n, C_n
+
+
+class DeepZoomView(object):
+    """Parameters of a deep zoom into the Mandelbrot set: the center, given as decimal strings so that it keeps all its
+    digits, the width of the real range, and square pixels. As in `FractalView`, the first row of the image corresponds
+    to the maximum imaginary value."""
+    center_re: Final[Decimal]
+    center_im: Final[Decimal]
+    width: Final[float]
+    res_xy: Final[TupleOf2Ints]
+    magnitude: Final[float]
+    k_max: Final[int]
+
+    def __new__(cls, center_re: str, center_im: str, width: float, res_xy: TupleOf2Ints, magnitude: float,
+                k_max: int) -> 'DeepZoomView':
+        for value in center_re, center_im:
+            try:
+                Decimal(value)
+            except decimal.InvalidOperation:
+                raise ValueError(f'Center coordinate {value!r} is not a decimal number')
+        if width <= 0:
+            raise ValueError(f'Width {width} is out of range')
+        if res_xy[0] < 2 or res_xy[1] < 2:
+            raise ValueError(f'Resolution {res_xy[0]}x{res_xy[1]} is out of range')
+        if magnitude <= 0:
+            raise ValueError(f'Magnitude {magnitude} is out of range')
+        if k_max < 1:
+            raise ValueError(f'k_max {k_max} is out of range')
+        return object.__new__(cls)
+
+    def __init__(self, center_re: str, center_im: str, width: float, res_xy: TupleOf2Ints, magnitude: float,
+                 k_max: int) -> None:
+        self.center_re = Decimal(center_re)
+        self.center_im = Decimal(center_im)
+        self.width = float(width)
+        self.res_xy = int(res_xy[0]), int(res_xy[1])
+        self.magnitude = float(magnitude)
+        self.k_max = int(k_max)
+
+    def __str__(self) -> str:
+        return (f'DeepZoomView(center=({self.center_re}, {self.center_im}), width={self.width:g}, '
+                f'res={self.res_xy[0]}x{self.res_xy[1]}, M={self.magnitude}, k_max={self.k_max})')
+
+    def get_increment(self) -> float:
+        return self.width / (self.res_xy[0] - 1.)
+
+    def get_precision(self) -> int:
+        """Number of significant decimal digits of the reference orbit."""
+        return max(-math.floor(math.log10(self.get_increment())), 0) + extra_precision_digits
+
+    def get_deltas(self) -> ComplexArray:
+        """Returns the offsets dc of the pixels from the center of the view."""
+        res_i, res_j = self.res_xy
+        inc: Final = self.get_increment()
+        deltas: Final = np.empty((res_j, res_i), dtype=np.complex128)
+        deltas.real = ((np.arange(res_i) - (res_i - 1) / 2.) * inc)[np.newaxis, :]
+        deltas.imag = (((res_j - 1) / 2. - np.arange(res_j)) * inc)[:, np.newaxis]
+        return deltas
+
+    def get_fractal_view(self) -> FractalView:
+        """Returns the float64 `FractalView` closest to this one (which is meaningful only for shallow zooms)."""
+        half_width: Final = self.width / 2.
+        half_height: Final = self.get_increment() * (self.res_xy[1] - 1) / 2.
+        center_re: Final = float(self.center_re)
+        center_im: Final = float(self.center_im)
+        return FractalView(FractalKind.mandelbrot, (center_re - half_width, center_re + half_width),
+                           (center_im - half_height, center_im + half_height), self.res_xy, self.magnitude, self.k_max)
+
+
+def get_deep_zoom_view(view: FractalView) -> DeepZoomView:
+    """Returns the deep-zoom counterpart of a Mandelbrot `FractalView`, whose center is computed exactly."""
+    center_re: Final = (Decimal(view.re_min_max[0]) + Decimal(view.re_min_max[1])) / 2
+    center_im: Final = (Decimal(view.im_min_max[0]) + Decimal(view.im_min_max[1])) / 2
+    return DeepZoomView(str(center_re), str(center_im), view.re_min_max[1] - view.re_min_max[0], view.res_xy,
+                        view.magnitude, view.k_max)
+
+
+def get_reference_orbit(c_re: Decimal, c_im: Decimal, magnitude: float, k_max: int, precision: int) -> ComplexArray:
+    """Returns Z_0 = 0, Z_1, ... of the orbit of C = c_re + i c_im, computed with the given number of decimal digits
+    and then rounded to complex128. It stops at the first Z_n escaping (included) or at Z_{k_max}."""
+    orbit: Final = [0j]
+    with decimal.localcontext() as context:
+        context.prec = precision
+        x, y = Decimal(0), Decimal(0)
+        bound: Final = Decimal(magnitude)
+        for _ in range(k_max):
+            x, y = x * x - y * y + c_re, 2 * x * y + c_im
+            orbit.append(complex(float(x), float(y)))
+            if x * x + y * y > bound:
+                break
+    return np.array(orbit, dtype=np.complex128)
+
+
+def get_series_approximation(reference: ComplexArray, max_delta: float,
+                             tolerance: float = default_series_tolerance) -> SeriesApproximation:
+    """Returns (n, A_n, B_n, C_n) for the largest n such that dz_n ~ A_n dc + B_n dc^2 + C_n dc^3 holds for all the
+    |dc| <= max_delta, in the sense that the third-order term stays below tolerance times the first-order one."""
+    a, b, c = 0j, 0j, 0j
+    n_skip, a_skip, b_skip, c_skip = 0, a, b, c
+    for n in range(len(reference) - 2):  # keep the last reference points for the per-pixel iterations
+        z = complex(reference[n])
+        a, b, c = 2. * z * a + 1., 2. * z * b + a * a, 2. * z * c + 2. * a * b
+        if not abs(c) * max_delta**3 <= tolerance * abs(a) * max_delta:  # also stops on overflow (nan)
+            break
+        n_skip, a_skip, b_skip, c_skip = n + 1, a, b, c
+    return n_skip, a_skip, b_skip, c_skip
+
+
+class PerturbationStats(object):
+    """What `get_iterations_by_perturbation` did, for reporting."""
+
+    def __init__(self, precision: int, reference_length: int, skipped_iterations: int) -> None:
+        self.precision = precision
+        self.reference_length = reference_length
+        self.skipped_iterations = skipped_iterations
+        self.num_rebases = 0
+
+    def __str__(self) -> str:
+        return (f'PerturbationStats(precision={self.precision} digits, reference length={self.reference_length}, '
+                f'skipped iterations={self.skipped_iterations}, rebases={self.num_rebases})')
+
+
+def get_reference_and_series(view: DeepZoomView, deltas: ComplexArray, use_series_approximation: bool = True,
+                             series_tolerance: float = default_series_tolerance) \
+        -> tuple[ComplexArray, SeriesApproximation, PerturbationStats]:
+    """Returns the reference orbit of the view and the series approximation valid for all the deltas, shared by all
+    the pixels, and the stats to be completed by `get_perturbed_iterations`."""
+    precision: Final = view.get_precision()
+    reference: Final = get_reference_orbit(view.center_re, view.center_im, view.magnitude, view.k_max, precision)
+    n_skip, a, b, c = get_series_approximation(reference, float(np.abs(deltas).max()), series_tolerance) \
+        if use_series_approximation else (0, 0j, 0j, 0j)
+    n_skip = min(n_skip, view.k_max - 1)
+    return reference, (n_skip, a, b, c), PerturbationStats(precision, len(reference), n_skip)
+
+
+def get_perturbed_iterations(view: DeepZoomView, reference: ComplexArray, series: SeriesApproximation,
+                             deltas: ComplexArray, stats: PerturbationStats) -> IterationsArray:
+    """Returns the iteration counts (with the semantics of `get_escape_iterations`) of the pixels at the given deltas
+    from the center of the view, counting their rebases in stats."""
+    last: Final = len(reference) - 1
+    dc = deltas.ravel()
+    n_skip, a, b, c = series
+
+    iterations: Final = np.zeros(dc.size, dtype=np.int32)
+    active = np.arange(dc.size)
+    dz = ((c * dc + b) * dc + a) * dc if n_skip > 0 else np.zeros_like(dc)
+    m = np.full(dc.size, n_skip, dtype=np.intp)  # index into the reference orbit, per pixel
+    with np.errstate(over='ignore', invalid='ignore'):
+        for k in range(n_skip + 1, view.k_max + 1):
+            dz = (2. * reference[m] + dz) * dz + dc
+            m += 1
+            z = reference[m] + dz
+            r = z.real * z.real + z.imag * z.imag
+            escaped = r > view.magnitude
+            if escaped.any():
+                iterations[active[escaped]] = k
+                still_active = ~escaped
+                active = active[still_active]
+                if active.size == 0:
+                    break
+                dz, dc, m, z, r = dz[still_active], dc[still_active], m[still_active], z[still_active], r[still_active]
+            glitched = (r < dz.real * dz.real + dz.imag * dz.imag) | (m == last)
+            if glitched.any():
+                dz[glitched] = z[glitched]
+                m[glitched] = 0
+                stats.num_rebases += int(np.count_nonzero(glitched))
+    return iterations.reshape(deltas.shape)
+
+
+def get_iterations_by_perturbation(view: DeepZoomView, use_series_approximation: bool = True,
+                                   series_tolerance: float = default_series_tolerance) \
+        -> tuple[IterationsArray, PerturbationStats]:
+    """Returns the iteration counts of the view (with the semantics of `get_escape_iterations`) and some stats."""
+    deltas: Final = view.get_deltas()
+    reference, series, stats = get_reference_and_series(view, deltas, use_series_approximation, series_tolerance)
+    return get_perturbed_iterations(view, reference, series, deltas, stats), stats
+
+
+def generate_iterations_by_perturbation(view: DeepZoomView, band_rows: int, use_series_approximation: bool = True,
+                                        series_tolerance: float = default_series_tolerance) \
+        -> Generator[tuple[Tile, IterationsArray], None, PerturbationStats]:
+    """Yields (tile, iterations of the tile) for the bands of band_rows rows of the view, in order, all of them sharing
+    the reference orbit and the series approximation of the whole view (hence the same counts as
+    `get_iterations_by_perturbation`), and returns the stats."""
+    deltas: Final = view.get_deltas()
+    reference, series, stats = get_reference_and_series(view, deltas, use_series_approximation, series_tolerance)
+    for j_0, j_1, i_0, i_1 in get_tiles(view.res_xy, (band_rows, view.res_xy[0])):
+        yield (j_0, j_1, i_0, i_1), get_perturbed_iterations(view, reference, series, deltas[j_0:j_1], stats)
+    return stats
+
+
+def main():
+    view: Final = DeepZoomView('-0.745522156517920470911502456571581626577',
+                               '0.094573654491167108596216750120378552379', 1e-18, (256, 256), 100., 12000)
+    timer: Final = Timer()
+    iterations, stats = get_iterations_by_perturbation(view)
+    print(f'{view}: {np.unique(iterations).size} distinct counts, {stats}, computed in {timer.elapsed()}')
+
+
+if __name__ == '__main__':
+    main()
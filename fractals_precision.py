@@ -0,0 +1,244 @@
+"""Precision policy of the escape-time engine, from float32 to arbitrary precision.
+
+For shallow views, float32 is enough and halves the memory traffic of the vectorized kernel: `get_view_with_float32`
+picks it when the pixel spacing is large enough in float32 ulps, and only after checking on a random sample of pixels
+that the iteration counts match those of float64 (it keeps float64 otherwise).
+
+At the other end, the arbitrary-precision fallback: when the pixel spacing of a view gets close to the resolution
+of float64 around its coordinates, neighboring pixels collapse onto the same float64 number (and the orbits drown in
+rounding errors well before that), so the view is computed instead with a multi-precision backend: `decimal` from the
+standard library or, if installed, the (faster) `mpmath` package. The precision is sized to the zoom: enough digits to
+tell neighboring pixels apart, plus a margin for the rounding errors accumulated along the orbits.
+
+This costs orders of magnitude more per pixel than float64, so the work is split in tiles computed in parallel (see
+`fractals_parallel`). For deep zooms into the Mandelbrot set, `fractals_perturbation` is much faster."""
+
+import decimal
+import functools
+import math
+import numpy as np
+
+from decimal import Decimal
+from enum import Enum
+from fractals_engine import EscapeTimeKernel, FractalKind, FractalView, IterationsArray, KernelBackend, TupleOf2Ints, \
+    get_escape_iterations
+from fractals_parallel import get_iterations_in_parallel
+from timeit import default_timer
+from typing import Final
+
+try:
+    import mpmath  # type: ignore[import-not-found]
+except ImportError:
+    mpmath = None
+
+min_ulps_per_pixel: Final[float] = 1024.  # below this pixel spacing (in ulps), switch to a more precise type
+default_float32_sample_size: Final[int] = 4096  # pixels on which float32 is checked against float64
+default_max_mismatch_fraction: Final[float] = .005  # of the sample, for float32 to be used
+extra_precision_digits: Final[int] = 12
+default_precision_tile_shape: Final[TupleOf2Ints] = 16, 16  # rows, columns; pixels are expensive here
+
+
+class PrecisionBackend(Enum):
+    decimal = 'decimal'
+    mpmath = 'mpmath'
+
+
+def get_available_backends() -> tuple[PrecisionBackend, ...]:
+    return (PrecisionBackend.decimal,) if mpmath is None else (PrecisionBackend.decimal, PrecisionBackend.mpmath)
+
+
+def get_default_backend() -> PrecisionBackend:
+    return get_available_backends()[-1]
+
+
+def get_ulps_per_pixel(view: FractalView, dtype: type[np.floating] = np.float64) -> float:
+    """Returns the pixel spacing of the view measured in ulps (of the given float type) of its coordinates (the smaller
+    of the real and imaginary ones)."""
+    inc_re, inc_im = view.get_increments()
+    ulp_re: Final = float(np.spacing(dtype(max(abs(view.re_min_max[0]), abs(view.re_min_max[1])))))
+    ulp_im: Final = float(np.spacing(dtype(max(abs(view.im_min_max[0]), abs(view.im_min_max[1])))))
+    return min(abs(inc_re) / ulp_re, abs(inc_im) / ulp_im)
+
+
+def needs_arbitrary_precision(view: FractalView) -> bool:
+    return get_ulps_per_pixel(view) < min_ulps_per_pixel
+
+
+class Float32View(FractalView):
+    """A `FractalView` whose pixels are iterated in float32 (with the numpy kernel), see `get_view_with_float32`."""
+
+    def __new__(cls, view: FractalView) -> 'Float32View':
+        if view.kernel_backend != KernelBackend.numpy:
+            raise ValueError(f'Kernel backend {view.kernel_backend.value!r} has no float32 version')
+        return object.__new__(cls)
+
+    def __init__(self, view: FractalView) -> None:
+        super().__init__(*view.__getnewargs__())
+
+    def __getnewargs__(self) -> tuple:
+        return FractalView(*super().__getnewargs__()),
+
+    def get_kernel(self) -> EscapeTimeKernel:
+        return functools.partial(get_escape_iterations, dtype=np.float32)
+
+
+class Float32Check(object):
+    """Why `get_view_with_float32` chose float32 or float64."""
+
+    def __init__(self, ulps_per_pixel: float, num_samples: int = 0, num_mismatches: int = 0) -> None:
+        self.ulps_per_pixel = ulps_per_pixel
+        self.num_samples = num_samples
+        self.num_mismatches = num_mismatches
+        self.use_float32 = False
+
+    def __str__(self) -> str:
+        check: Final = f', {self.num_mismatches} of {self.num_samples} sampled pixels differ from float64' \
+            if self.num_samples > 0 else ''
+        return (f'Float32Check({"float32" if self.use_float32 else "float64"}: '
+                f'{self.ulps_per_pixel:.0f} float32 ulps per pixel{check})')
+
+
+def get_view_with_float32(view: FractalView, sample_size: int = default_float32_sample_size,
+                          max_mismatch_fraction: float = default_max_mismatch_fraction,
+                          seed: int = 0) -> tuple[FractalView, Float32Check]:
+    """Returns a `Float32View` of the view if its pixel spacing is at least min_ulps_per_pixel float32 ulps and if, on a
+    random sample of its pixels, at most max_mismatch_fraction of the iteration counts differ from float64 (near the
+    boundary of the set, the rounding errors of float32 do change some counts). Otherwise, returns the view itself."""
+    check: Final = Float32Check(get_ulps_per_pixel(view, np.float32))
+    if check.ulps_per_pixel < min_ulps_per_pixel or view.kernel_backend != KernelBackend.numpy \
+            or type(view) is not FractalView:
+        return view, check
+    float32_view: Final = Float32View(view)
+    grid: Final = view.get_grid().ravel()
+    points: Final = grid if grid.size <= sample_size \
+        else grid[np.random.default_rng(seed).choice(grid.size, sample_size, replace=False)]
+    check.num_samples = points.size
+    check.num_mismatches = int(np.count_nonzero(float32_view.get_iterations_of_points(points)
+                                                != view.get_iterations_of_points(points)))
+    check.use_float32 = check.num_mismatches <= max_mismatch_fraction * check.num_samples
+    return (float32_view if check.use_float32 else view), check
+
+
+def get_precision_digits(view: FractalView) -> int:
+    """Returns the number of significant decimal digits needed for the view."""
+    inc_re, inc_im = view.get_increments()
+    max_coordinate: Final = max(1., *(abs(v) for v in view.re_min_max + view.im_min_max))
+    min_increment: Final = min(abs(inc_re), abs(inc_im))
+    return math.ceil(math.log10(max_coordinate / min_increment)) + extra_precision_digits
+
+
+def get_escape_iterations_in_decimal(z_0: tuple[Decimal, Decimal], c: tuple[Decimal, Decimal], magnitude: float,
+                                     k_max: int, precision: int) -> int:
+    """Same as `get_escape_iterations_of_point`, with the given number of decimal digits."""
+    with decimal.localcontext() as context:
+        context.prec = precision
+        bound: Final = Decimal(magnitude)
+        (x, y), (c_x, c_y) = z_0, c
+        for k in range(1, k_max + 1):
+            x, y = x * x - y * y + c_x, 2 * x * y + c_y
+            if x * x + y * y > bound:
+                return k
+    return 0
+
+
+def get_escape_iterations_in_mpmath(z_0: tuple[Decimal, Decimal], c: tuple[Decimal, Decimal], magnitude: float,
+                                    k_max: int, precision: int) -> int:
+    """Same as `get_escape_iterations_in_decimal`, with mpmath."""
+    with mpmath.workdps(precision):
+        x, y, c_x, c_y = (mpmath.mpf(str(value)) for value in z_0 + c)
+        bound: Final = mpmath.mpf(magnitude)
+        for k in range(1, k_max + 1):
+            x, y = x * x - y * y + c_x, 2 * x * y + c_y
+            if x * x + y * y > bound:
+                return k
+    return 0
+
+
+class ArbitraryPrecisionView(FractalView):
+    """A `FractalView` whose pixels are computed with a multi-precision backend. The pixel coordinates are derived from
+    the (exact) decimal values of the float64 ranges, so that they remain distinct however deep the zoom."""
+    precision: Final[int]
+    backend: Final[PrecisionBackend]
+
+    def __new__(cls, view: FractalView, backend: PrecisionBackend | None = None) -> 'ArbitraryPrecisionView':
+        if backend is not None and backend not in get_available_backends():
+            raise ValueError(f'Precision backend {backend.value} is not available')
+        return object.__new__(cls)
+
+    def __init__(self, view: FractalView, backend: PrecisionBackend | None = None) -> None:
+        super().__init__(view.kind, view.re_min_max, view.im_min_max, view.res_xy, view.magnitude, view.k_max, view.c,
+                         view.use_interior_checks)
+        self.precision = get_precision_digits(view)
+        self.backend = get_default_backend() if backend is None else backend
+
+    def __getnewargs__(self) -> tuple:
+        return FractalView(*super().__getnewargs__()), self.backend
+
+    def get_iterations(self, j_0: int = 0, j_1: int | None = None, i_0: int = 0,
+                       i_1: int | None = None) -> IterationsArray:
+        j_end: Final = self.res_xy[1] if j_1 is None else j_1
+        i_end: Final = self.res_xy[0] if i_1 is None else i_1
+        get_escape_iterations: Final = get_escape_iterations_in_decimal if self.backend == PrecisionBackend.decimal \
+            else get_escape_iterations_in_mpmath
+        iterations: Final = np.zeros((j_end - j_0, i_end - i_0), dtype=np.int32)
+        with decimal.localcontext() as context:
+            context.prec = self.precision
+            re_min, re_max = Decimal(self.re_min_max[0]), Decimal(self.re_min_max[1])
+            im_min, im_max = Decimal(self.im_min_max[0]), Decimal(self.im_min_max[1])
+            inc_re: Final = (re_max - re_min) / (self.res_xy[0] - 1)
+            inc_im: Final = (im_min - im_max) / (self.res_xy[1] - 1)
+            c: Final = Decimal(self.c.real), Decimal(self.c.imag)
+            zero: Final = Decimal(0), Decimal(0)
+            for j in range(j_0, j_end):
+                im = im_max + j * inc_im
+                for i in range(i_0, i_end):
+                    point = re_min + i * inc_re, im
+                    iterations[j - j_0, i - i_0] = \
+                        get_escape_iterations(point, c, self.magnitude, self.k_max, self.precision) \
+                        if self.kind == FractalKind.julia \
+                        else get_escape_iterations(zero, point, self.magnitude, self.k_max, self.precision)
+        return iterations
+
+
+class PrecisionReport(object):
+    """Which precision `get_iterations_in_arbitrary_precision` chose, and what it cost."""
+
+    def __init__(self, backend: PrecisionBackend, precision: int, num_pixels: int, seconds: float) -> None:
+        self.backend = backend
+        self.precision = precision
+        self.num_pixels = num_pixels
+        self.seconds = seconds
+
+    def get_microseconds_per_pixel(self) -> float:
+        return 1e6 * self.seconds / self.num_pixels
+
+    def __str__(self) -> str:
+        return (f'PrecisionReport({self.backend.value} with {self.precision} digits, {self.num_pixels} pixels in '
+                f'{self.seconds:.1f} seconds, {self.get_microseconds_per_pixel():.0f} µs per pixel)')
+
+
+def get_iterations_in_arbitrary_precision(view: FractalView, backend: PrecisionBackend | None = None,
+                                          num_workers: int | None = None,
+                                          tile_shape: TupleOf2Ints = default_precision_tile_shape) \
+        -> tuple[IterationsArray, PrecisionReport]:
+    """Returns the iteration counts of the view, computed in parallel over tiles with a multi-precision backend (by
+    default, the fastest available one), and the report of the precision chosen and its cost."""
+    precision_view: Final = ArbitraryPrecisionView(view, backend)
+    start: Final = default_timer()
+    iterations: Final = get_iterations_in_parallel(precision_view, num_workers, tile_shape, min_pixels=0)
+    report: Final = PrecisionReport(precision_view.backend, precision_view.precision, iterations.size,
+                                    default_timer() - start)
+    return iterations, report
+
+
+def main():
+    view: Final = FractalView(FractalKind.mandelbrot, (-.7436438870371587 - 2e-14, -.7436438870371587 + 2e-14),
+                              (.1318259042053119 - 2e-14, .1318259042053119 + 2e-14), (64, 64), 100., 1024)
+    print(f'{view}: {get_ulps_per_pixel(view):.1f} ulps per pixel, '
+          f'arbitrary precision needed: {needs_arbitrary_precision(view)}')
+    _, report = get_iterations_in_arbitrary_precision(view)
+    print(report)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,50 @@
+"""Same-color rectangles covering an image of color indices exactly, for painting on a Tk canvas without `PhotoImage`:
+one canvas item per rectangle instead of one per pixel. The horizontal runs of equal colors of each row are found with
+NumPy, and the runs identical (same columns and color) in consecutive rows are merged into taller rectangles, which
+divides the number of canvas items (and their memory, and the time of `canvas.delete('all')`) by orders of magnitude
+in the large same-color areas of the fractals, inside and far outside the sets."""
+
+import numpy as np
+import numpy.typing as npt
+
+from typing import Final, TypeAlias
+
+ColorRectangle: TypeAlias = tuple[int, int, int, int, int]  # j_0, j_1, i_0, i_1 (as a Tile), and the color index
+
+
+def get_row_runs(int_colors: npt.NDArray[np.intp]) \
+        -> tuple[npt.NDArray[np.intp], npt.NDArray[np.intp], npt.NDArray[np.intp], npt.NDArray[np.intp]]:
+    """Returns (j, i_0, i_1, color) of the maximal runs of the rows, in row-major order: the pixels [i_0, i_1) of row j
+    have the given color index."""
+    res_j, res_i = int_colors.shape
+    starts: Final = np.ones(int_colors.shape, dtype=bool)
+    starts[:, 1:] = int_colors[:, 1:] != int_colors[:, :-1]
+    flat_starts: Final = np.flatnonzero(starts)
+    flat_ends: Final = np.append(flat_starts[1:], res_j * res_i)  # every row starts a run, so runs end at row ends
+    j: Final = flat_starts // res_i
+    return j, flat_starts - j * res_i, flat_ends - j * res_i, int_colors.ravel()[flat_starts]
+
+
+def get_color_rectangles(int_colors: npt.NDArray[np.intp]) -> list[ColorRectangle]:
+    """Returns rectangles (j_0, j_1, i_0, i_1, color) that cover every pixel exactly once, with its color index: the
+    runs of the rows, merged with the identical runs of the rows right below."""
+    res_j: Final = int_colors.shape[0]
+    j, i_0, i_1, colors = get_row_runs(int_colors)
+    row_bounds: Final = np.searchsorted(j, np.arange(res_j + 1)).tolist()
+    runs: Final = list(zip(i_0.tolist(), i_1.tolist(), colors.tolist()))
+    rectangles: Final[list[ColorRectangle]] = []
+    open_rectangles: dict[tuple[int, int, int], int] = {}  # (i_0, i_1, color) of those reaching the previous row: j_0
+    for row in range(res_j):
+        row_rectangles = {run: open_rectangles.pop(run, row) for run in runs[row_bounds[row]:row_bounds[row + 1]]}
+        rectangles.extend((j_0, row, *run) for run, j_0 in open_rectangles.items())  # not continued in this row
+        open_rectangles = row_rectangles
+    rectangles.extend((j_0, res_j, *run) for run, j_0 in open_rectangles.items())
+    return rectangles
+
+
+def get_int_colors_of_rectangles(rectangles: list[ColorRectangle], res_xy: tuple[int, int]) -> npt.NDArray[np.intp]:
+    """Inverse of `get_color_rectangles`: paints the rectangles."""
+    int_colors: Final = np.full((res_xy[1], res_xy[0]), -1, dtype=np.intp)
+    for j_0, j_1, i_0, i_1, color in rectangles:
+        int_colors[j_0:j_1, i_0:i_1] = color
+    return int_colors
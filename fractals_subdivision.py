@@ -0,0 +1,86 @@
+"""Mariani–Silver subdivision renderer: if all the pixels on the border of a rectangle have the same iteration count,
+the whole rectangle is filled with it without computing its interior; otherwise, the rectangle is split in four and the
+process goes on recursively. Large solid regions (the interior of the sets, or a single escape band) are then never
+computed pixel by pixel.
+
+The rectangles are processed level by level, so that the border pixels of all the rectangles of a level are computed
+in a single vectorized call to the escape-time engine. Note that the method relies on the connectedness of the regions
+of equal count, hence features thinner than a pixel spacing that lie fully inside a solid border might be missed (much
+like by any other sampling of the plane)."""
+
+import numpy as np
+import numpy.typing as npt
+
+from fractals_engine import FractalKind, FractalView, IterationsArray, Tile
+from timer import Timer
+from typing import Final
+
+min_subdivision_size: Final[int] = 10  # rectangles with fewer rows or columns than this are computed in full
+
+
+def split_rectangle(rectangle: Tile) -> list[Tile]:
+    """Splits a rectangle in four, the pieces sharing their borders (which are therefore computed only once)."""
+    j_0, j_1, i_0, i_1 = rectangle
+    j_middle: Final = (j_0 + j_1) // 2
+    i_middle: Final = (i_0 + i_1) // 2
+    return [(j_0, j_middle + 1, i_0, i_middle + 1), (j_0, j_middle + 1, i_middle, i_1),
+            (j_middle, j_1, i_0, i_middle + 1), (j_middle, j_1, i_middle, i_1)]
+
+
+def get_iterations_by_subdivision(view: FractalView, min_size: int = min_subdivision_size,
+                                  region: Tile | None = None) -> tuple[IterationsArray, int]:
+    """Returns the iteration counts of the view, or of a region of it (to be colored, as usual, with `get_int_colors`),
+    and the number of pixels actually computed."""
+    region_j_0, region_j_1, region_i_0, region_i_1 = (0, view.res_xy[1], 0, view.res_xy[0]) if region is None \
+        else region
+    res_i, res_j = region_i_1 - region_i_0, region_j_1 - region_j_0
+    iterations: Final = np.zeros((res_j, res_i), dtype=np.int32)
+    computed: Final = np.zeros((res_j, res_i), dtype=bool)
+    grid: Final = view.get_grid(region_j_0, region_j_1, region_i_0, region_i_1)
+    num_computed_pixels = 0
+
+    def compute(needed: npt.NDArray[np.bool_]) -> None:
+        nonlocal num_computed_pixels
+        rows, columns = np.nonzero(needed & ~computed)
+        iterations[rows, columns] = view.get_iterations_of_points(grid[rows, columns])
+        computed[rows, columns] = True
+        num_computed_pixels += rows.size
+
+    rectangles: list[Tile] = [(0, res_j, 0, res_i)]
+    while rectangles:
+        needed = np.zeros((res_j, res_i), dtype=bool)
+        for j_0, j_1, i_0, i_1 in rectangles:
+            needed[j_0, i_0:i_1] = needed[j_1 - 1, i_0:i_1] = needed[j_0:j_1, i_0] = needed[j_0:j_1, i_1 - 1] = True
+        compute(needed)
+
+        next_rectangles: list[Tile] = []
+        needed[:] = False
+        for rectangle in rectangles:
+            j_0, j_1, i_0, i_1 = rectangle
+            k = iterations[j_0, i_0]
+            if ((iterations[j_0, i_0:i_1] == k).all() and (iterations[j_1 - 1, i_0:i_1] == k).all()
+                    and (iterations[j_0:j_1, i_0] == k).all() and (iterations[j_0:j_1, i_1 - 1] == k).all()):
+                iterations[j_0 + 1:j_1 - 1, i_0 + 1:i_1 - 1] = k
+                computed[j_0 + 1:j_1 - 1, i_0 + 1:i_1 - 1] = True
+            elif j_1 - j_0 < min_size or i_1 - i_0 < min_size:
+                needed[j_0 + 1:j_1 - 1, i_0 + 1:i_1 - 1] = True
+            else:
+                next_rectangles.extend(split_rectangle(rectangle))
+        compute(needed)
+        rectangles = next_rectangles
+
+    return iterations, num_computed_pixels
+
+
+def main():
+    view: Final = FractalView(FractalKind.mandelbrot, (-2.25, .75), (-1.5, 1.5), (1024, 1024), 100., 256)
+    timer: Final = Timer()
+    iterations, num_computed_pixels = get_iterations_by_subdivision(view)
+    print(f'{view}: {num_computed_pixels} of {iterations.size} pixels computed in {timer.elapsed()}')
+    timer.restart()
+    num_different_pixels: Final = np.count_nonzero(iterations != view.get_iterations())
+    print(f'Brute force took {timer.elapsed()}; {num_different_pixels} pixels differ')
+
+
+if __name__ == '__main__':
+    main()
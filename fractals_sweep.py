@@ -0,0 +1,90 @@
+"""Batch Julia parameter sweeps: the Julia sets of many c values over a shared (x, y) window, as a stacked (n_c, res_y,
+res_x) array of iteration counts. The c values are processed in chunks, each chunk being a single vectorized call to the
+escape-time engine (z_0 varying along the last two axes, c along the first one), and the chunks are spread over a pool
+of processes. The chunks can be consumed as they are completed, in order, which lets `save_julia_sweep` stream them to
+a .npy file on disk while keeping only a few of them in memory."""
+
+import numpy as np
+import numpy.typing as npt
+
+from fractals_engine import ComplexArray, FractalKind, FractalView, IterationsArray, default_periodicity_tolerance
+from fractals_parallel import generate_results_in_order
+from timer import Timer
+from typing import Final, Generator
+
+default_sweep_chunk_pixels: Final[int] = 1 << 22  # pixels computed per chunk (all its c values included)
+
+
+def get_c_grid(re_min_max: tuple[float, float], im_min_max: tuple[float, float],
+               num_re_im: tuple[int, int]) -> ComplexArray:
+    """Returns num_re * num_im c values, row by row, the first row having the maximum imaginary part (as the images)."""
+    re: Final = np.linspace(re_min_max[0], re_min_max[1], num_re_im[0])
+    im: Final = np.linspace(im_min_max[1], im_min_max[0], num_re_im[1])
+    return (re[np.newaxis, :] + 1j * im[:, np.newaxis]).ravel().astype(np.complex128)
+
+
+def get_sweep_chunk_size(view: FractalView, chunk_pixels: int = default_sweep_chunk_pixels) -> int:
+    return max(1, chunk_pixels // (view.res_xy[0] * view.res_xy[1]))
+
+
+def get_julia_sweep_chunk(view: FractalView, c_values: ComplexArray) -> IterationsArray:
+    """Returns the (len(c_values), res_y, res_x) iteration counts of the Julia sets of the c values over the window of
+    the view (whose own c is ignored), all of them in a single vectorized pass."""
+    tolerance: Final = default_periodicity_tolerance if view.use_interior_checks else 0.
+    return view.get_kernel()(view.get_grid()[np.newaxis, :, :], c_values[:, np.newaxis, np.newaxis], view.magnitude,
+                             view.k_max, tolerance)
+
+
+def generate_julia_sweep(view: FractalView, c_values: npt.ArrayLike, num_workers: int | None = None,
+                         chunk_size: int | None = None) -> Generator[tuple[int, IterationsArray], None, None]:
+    """Yields (start, iterations) for consecutive chunks of c values, in order, iterations being the counts of
+    c_values[start:start + len(iterations)]. At most two chunks per worker are pending at any time, so that the memory
+    remains bounded however slowly the chunks are consumed."""
+    c_array: Final = np.asarray(c_values, dtype=np.complex128).ravel()
+    size: Final = get_sweep_chunk_size(view) if chunk_size is None else chunk_size
+    if size < 1:
+        raise ValueError(f'Chunk size {size} is out of range')
+    starts: Final = range(0, c_array.size, size)
+    yield from zip(starts, generate_results_in_order(get_julia_sweep_chunk,
+                                                     [(view, c_array[start:start + size]) for start in starts],
+                                                     num_workers))
+
+
+def get_julia_sweep(view: FractalView, c_values: npt.ArrayLike, num_workers: int | None = None,
+                    chunk_size: int | None = None) -> IterationsArray:
+    """Returns the stacked (n_c, res_y, res_x) iteration counts of the Julia sets of the c values (see
+    `generate_julia_sweep`), all of them in memory."""
+    c_array: Final = np.asarray(c_values, dtype=np.complex128).ravel()
+    iterations: Final = np.empty((c_array.size, view.res_xy[1], view.res_xy[0]), dtype=np.int32)
+    for start, chunk in generate_julia_sweep(view, c_array, num_workers, chunk_size):
+        iterations[start:start + len(chunk)] = chunk
+    return iterations
+
+
+def save_julia_sweep(path: str, view: FractalView, c_values: npt.ArrayLike, num_workers: int | None = None,
+                     chunk_size: int | None = None) -> None:
+    """Writes the stacked (n_c, res_y, res_x) iteration counts of the Julia sets of the c values to the .npy file at
+    path, chunk by chunk, so that the whole stack never has to fit in memory (it can be read back lazily with
+    `np.load(path, mmap_mode='r')`)."""
+    c_array: Final = np.asarray(c_values, dtype=np.complex128).ravel()
+    stack: Final = np.lib.format.open_memmap(path, mode='w+', dtype=np.int32,
+                                             shape=(c_array.size, view.res_xy[1], view.res_xy[0]))
+    try:
+        for start, chunk in generate_julia_sweep(view, c_array, num_workers, chunk_size):
+            stack[start:start + len(chunk)] = chunk
+            stack.flush()
+    finally:
+        del stack  # closes the memory map
+
+
+def main():
+    window: Final = FractalView(FractalKind.julia, (-1.5, 1.5), (-1.5, 1.5), (128, 128), 100., 64)
+    c_values: Final = get_c_grid((-2., .5), (-1.25, 1.25), (32, 32))
+    timer: Final = Timer()
+    save_julia_sweep('julia_sweep.npy', window, c_values)
+    print(f'{len(c_values)} Julia sets of {window.res_xy[0]}x{window.res_xy[1]} pixels written to julia_sweep.npy in '
+          f'{timer.elapsed()}')
+
+
+if __name__ == '__main__':
+    main()
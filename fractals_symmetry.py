@@ -0,0 +1,105 @@
+"""Symmetry-aware rendering. The Mandelbrot set is symmetric about the real axis (c and its conjugate have the same
+escape iterations), and any Julia set has a 180° rotational symmetry about the origin (z_0 and -z_0 have the same ones,
+since (-z)^2 = z^2). The overlap between the requested window and its mirror image is detected, only the unique part
+is computed, and the iteration counts are mirrored into the rest.
+
+The arithmetic of the escape-time loop is exactly symmetric, so the mirrored counts are identical to the computed ones
+as long as the pixel coordinates are exact mirrors of each other, which holds (up to an ulp, immaterial in practice) for
+the pixels matched here."""
+
+import multiprocessing
+import numpy as np
+import numpy.typing as npt
+
+from fractals_engine import FractalKind, FractalView, IterationsArray, Tile, TupleOf2Ints
+from fractals_parallel import default_tile_shape, generate_iterations_in_parallel, get_iterations_in_parallel
+from timer import Timer
+from typing import Final, Generator
+
+mirror_tolerance: Final[float] = 1e-6  # in pixels
+
+
+def get_mirror_indices(v_first: float, inc: float, resolution: int) -> npt.NDArray[np.intp]:
+    """For the samples v_first + index * inc, index in [0, resolution), returns the index of the sample at -v (or -1
+    if there is none)."""
+    indices: Final = np.arange(resolution)
+    mirror_positions: Final = (-2. * v_first - indices * inc) / inc
+    mirror_indices: Final = np.rint(mirror_positions).astype(np.intp)
+    valid: Final = ((np.abs(mirror_positions - mirror_indices) < mirror_tolerance)
+                    & (mirror_indices >= 0) & (mirror_indices < resolution))
+    return np.where(valid, mirror_indices, -1)
+
+
+def get_copied_range(mirror_indices: npt.NDArray[np.intp]) -> tuple[int, int]:
+    """Returns the range [start, end) of the indices whose values will be copied from their mirrors: the half of the
+    symmetric band farther from the center of the image (so that the computed part remains as compact as possible),
+    excluding the self-mirrored index, if any."""
+    symmetric: Final = np.nonzero(mirror_indices >= 0)[0]
+    if symmetric.size < 2:
+        return 0, 0
+    first: Final = int(symmetric[0])
+    last: Final = int(symmetric[-1])  # mirror_indices[first] == last
+    half: Final = (last - first + 1) // 2
+    if first + last >= mirror_indices.size - 1:  # the band touches the end: copy its second half
+        return last + 1 - half, last + 1
+    return first, first + half
+
+
+def get_symmetry(view: FractalView) -> tuple[list[Tile], Tile, npt.NDArray[np.intp], npt.NDArray[np.intp]]:
+    """Returns the regions to compute, the copied rectangle, and the mirror row and column indices of the latter."""
+    res_i, res_j = view.res_xy
+    inc_re, inc_im = view.get_increments()
+    row_mirrors: Final = get_mirror_indices(view.im_min_max[1], inc_im, res_j)
+    column_mirrors: Final = get_mirror_indices(view.re_min_max[0], inc_re, res_i) if view.kind == FractalKind.julia \
+        else np.arange(res_i)
+    j_0, j_1 = get_copied_range(row_mirrors)
+    symmetric_columns: Final = np.nonzero(column_mirrors >= 0)[0]
+    i_0, i_1 = (int(symmetric_columns[0]), int(symmetric_columns[-1]) + 1) if symmetric_columns.size > 0 else (0, 0)
+    if j_0 == j_1 or i_0 == i_1:
+        return [(0, res_j, 0, res_i)], (0, 0, 0, 0), row_mirrors[0:0], column_mirrors[0:0]
+
+    candidate_regions: Final[list[Tile]] = [(0, j_0, 0, res_i), (j_1, res_j, 0, res_i), (j_0, j_1, 0, i_0),
+                                            (j_0, j_1, i_1, res_i)]
+    regions: Final = [region for region in candidate_regions if region[0] < region[1] and region[2] < region[3]]
+    return regions, (j_0, j_1, i_0, i_1), row_mirrors[j_0:j_1], column_mirrors[i_0:i_1]
+
+
+def get_iterations_with_symmetry(view: FractalView, num_workers: int | None = None) -> tuple[IterationsArray, int]:
+    """Returns the iteration counts of the view, and the number of pixels actually computed."""
+    regions, copied, row_mirrors, column_mirrors = get_symmetry(view)
+    iterations: Final = get_iterations_in_parallel(view, num_workers, regions=regions)
+    j_0, j_1, i_0, i_1 = copied
+    iterations[j_0:j_1, i_0:i_1] = iterations[np.ix_(row_mirrors, column_mirrors)]
+    num_computed_pixels: Final = sum((j_1 - j_0) * (i_1 - i_0) for j_0, j_1, i_0, i_1 in regions)
+    return iterations, num_computed_pixels
+
+
+def generate_iterations_with_symmetry(view: FractalView, num_workers: int | None = None,
+                                      tile_shape: TupleOf2Ints = default_tile_shape,
+                                      context: multiprocessing.context.BaseContext | None = None) \
+        -> Generator[tuple[Tile, IterationsArray], None, None]:
+    """Yields (tile, iterations of the tile) as `generate_iterations_in_parallel` does, the tiles of the unique part
+    first, in completion order, and then the mirrored rectangle, in bands of tile_shape[0] rows."""
+    regions, copied, row_mirrors, column_mirrors = get_symmetry(view)
+    iterations: Final = np.zeros((view.res_xy[1], view.res_xy[0]), dtype=np.int32)
+    for (j_0, j_1, i_0, i_1), tile_iterations in generate_iterations_in_parallel(view, num_workers, tile_shape,
+                                                                                 regions, context=context):
+        iterations[j_0:j_1, i_0:i_1] = tile_iterations
+        yield (j_0, j_1, i_0, i_1), tile_iterations
+    copied_j_0, copied_j_1, i_0, i_1 = copied
+    for j_0 in range(copied_j_0, copied_j_1, tile_shape[0]):
+        j_1 = min(j_0 + tile_shape[0], copied_j_1)
+        yield (j_0, j_1, i_0, i_1), iterations[np.ix_(row_mirrors[j_0 - copied_j_0:j_1 - copied_j_0], column_mirrors)]
+
+
+def main():
+    for view in (FractalView(FractalKind.mandelbrot, (-2.25, .75), (-1.5, 1.5), (1024, 1024), 100., 256),
+                 FractalView(FractalKind.julia, (-1.5, 1.5), (-1.5, 1.5), (1024, 1024), 100., 256,
+                             complex(-.39054, -.58679))):
+        timer = Timer()
+        iterations, num_computed_pixels = get_iterations_with_symmetry(view, 1)
+        print(f'{view}: {num_computed_pixels} of {iterations.size} pixels computed in {timer.elapsed()}')
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,261 @@
+"""Local HTTP tile server of the Julia and Mandelbrot sets, with the URL scheme of the slippy maps,
+`/{fractal}/{z}/{x}/{y}.png`: at zoom level z, the square domain of the fractal is split into 2^z x 2^z tiles of 256x256
+pixels, x going rightwards and y downwards from the top-left corner. A `k_max` query parameter overrides the default
+k_max of the zoom level, which grows with z, up to `max_k_max_factor` times that default. Any slippy-map client pointed
+at the URL template (such as Leaflet with `L.CRS.Simple`) can browse the tiles; the server itself needs no network
+access beyond its own socket.
+
+The PNG tiles are cached in memory (LRU, bounded in bytes, with `TileCache`) and, optionally, on disk, under a
+directory per palette and Julia constant, so that they survive restarts. The cache misses are rendered by a pool of
+processes, and concurrent requests for the same tile are coalesced: the first one renders it, the others wait for its
+result instead of rendering it again."""
+
+import argparse
+import concurrent.futures
+import hashlib
+import numpy as np
+import numpy.typing as npt
+import os
+import re
+import sys
+import threading
+import urllib.parse
+
+from fractals_cache import TileCache
+from fractals_colors import generate_rgb_palette, get_lookup_table
+from fractals_engine import FractalKind, FractalView, TupleOf2Floats
+from fractals_io import get_png_bytes
+from fractals_parallel import get_default_num_workers
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Final, Sequence
+
+tile_size: Final[int] = 256
+max_zoom_level: Final[int] = 34  # the deepest one whose tiles never need `needs_arbitrary_precision` (Re = -2.25)
+default_k_max: Final[int] = 64
+k_max_per_zoom_level: Final[int] = 32
+max_k_max_factor: Final[int] = 16  # of the default k_max of the zoom level, beyond which a request is refused
+default_memory_cache_bytes: Final[int] = 64 * 1024 * 1024
+tile_domains: Final[dict[FractalKind, tuple[TupleOf2Floats, TupleOf2Floats]]] = {  # the tile of zoom level 0
+    FractalKind.julia: ((-1.5, 1.5), (-1.5, 1.5)),
+    FractalKind.mandelbrot: ((-2.25, .75), (-1.5, 1.5))
+}
+tile_path_pattern: Final = re.compile(r'^/(' + '|'.join(kind.value for kind in FractalKind)
+                                      + r')/(\d+)/(\d+)/(\d+)\.png$')
+
+TileKey = tuple[str, int, int, int, int]  # fractal, z, x, y, k_max
+
+
+def get_default_k_max(z: int) -> int:
+    return default_k_max + k_max_per_zoom_level * z
+
+
+def get_max_k_max(z: int) -> int:
+    """The largest k_max a request may ask for, so that a single tile cannot tie up the workers indefinitely."""
+    return max_k_max_factor * get_default_k_max(z)
+
+
+def get_tile_view(kind: FractalKind, z: int, x: int, y: int, k_max: int, c: complex = complex(-.39054, -.58679),
+                  magnitude: float = 100.) -> FractalView:
+    """Returns the view of the tile. Its samples are at the centers of the pixels, so that the tiles of a zoom level
+    form a regular grid without seams."""
+    if not 0 <= z <= max_zoom_level:
+        raise ValueError(f'Zoom level {z} is out of range')
+    num_tiles: Final = 1 << z
+    if not (0 <= x < num_tiles and 0 <= y < num_tiles):
+        raise ValueError(f'Tile ({x}, {y}) is out of range at zoom level {z}')
+    (re_min, re_max), (im_min, im_max) = tile_domains[kind]
+    tile_width: Final = (re_max - re_min) / num_tiles
+    tile_height: Final = (im_max - im_min) / num_tiles
+    half_pixel_re, half_pixel_im = tile_width / (2 * tile_size), tile_height / (2 * tile_size)
+    re_0: Final = re_min + x * tile_width
+    im_1: Final = im_max - y * tile_height
+    return FractalView(kind, (re_0 + half_pixel_re, re_0 + tile_width - half_pixel_re),
+                       (im_1 - tile_height + half_pixel_im, im_1 - half_pixel_im), (tile_size, tile_size), magnitude,
+                       k_max, c)
+
+
+def render_tile(view: FractalView, rgb_palette: npt.NDArray[np.uint8]) -> bytes:
+    return get_png_bytes(get_lookup_table(rgb_palette, view.k_max)[view.get_iterations()])
+
+
+class TileService(object):
+    """Returns the PNG bytes of the tiles, from the memory cache, the disk cache or the worker pool, in that order. It
+    is thread-safe."""
+
+    def __new__(cls, rgb_palette: npt.NDArray[np.uint8], cache_directory: str | None = None,
+                num_workers: int | None = None, memory_cache_bytes: int = default_memory_cache_bytes,
+                c: complex = complex(-.39054, -.58679)) -> 'TileService':
+        if num_workers is not None and num_workers < 1:
+            raise ValueError(f'Number of workers {num_workers} is out of range')
+        return object.__new__(cls)
+
+    def __init__(self, rgb_palette: npt.NDArray[np.uint8], cache_directory: str | None = None,
+                 num_workers: int | None = None, memory_cache_bytes: int = default_memory_cache_bytes,
+                 c: complex = complex(-.39054, -.58679)) -> None:
+        self.rgb_palette = rgb_palette
+        self.c = c
+        self.cache_directory = None if cache_directory is None \
+            else os.path.join(cache_directory, self.get_style_digest())
+        self.memory_cache = TileCache(memory_cache_bytes)
+        self.executor = concurrent.futures.ProcessPoolExecutor(
+            get_default_num_workers() if num_workers is None else num_workers)
+        self.lock = threading.Lock()
+        self.pending: dict[TileKey, concurrent.futures.Future] = {}
+        self.num_rendered = 0
+        self.num_disk_hits = 0
+        self.num_coalesced = 0
+
+    def __str__(self) -> str:
+        return (f'TileService({self.num_rendered} tiles rendered, {self.num_disk_hits} read from disk, '
+                f'{self.num_coalesced} coalesced requests; {self.memory_cache})')
+
+    def get_style_digest(self) -> str:
+        """Identifies what, besides the tile key, changes the PNG bytes: the palette and the Julia constant."""
+        digest: Final = hashlib.sha256(np.ascontiguousarray(self.rgb_palette).tobytes())
+        digest.update(repr(self.c).encode())
+        return digest.hexdigest()[:16]
+
+    def get_disk_path(self, key: TileKey) -> str | None:
+        if self.cache_directory is None:
+            return None
+        fractal, z, x, y, k_max = key
+        return os.path.join(self.cache_directory, fractal, f'k_max_{k_max}', str(z), str(x), f'{y}.png')
+
+    def get_tile(self, kind: FractalKind, z: int, x: int, y: int, k_max: int | None = None) -> bytes:
+        """Returns the PNG bytes of the tile. Raises ValueError if the tile is out of range."""
+        view: Final = get_tile_view(kind, z, x, y, get_default_k_max(z) if k_max is None else k_max, self.c)
+        key: Final[TileKey] = kind.value, z, x, y, view.k_max
+        with self.lock:
+            png = self.memory_cache.get(key)
+            if png is not None:
+                return png
+            future = self.pending.get(key)
+            is_owner = future is None
+            if future is None:
+                future = self.pending[key] = concurrent.futures.Future()
+            else:
+                self.num_coalesced += 1
+        if not is_owner:
+            return future.result()
+
+        try:
+            png = self.get_tile_from_disk_or_workers(key, view)
+        except BaseException as exception:
+            with self.lock:
+                del self.pending[key]
+            future.set_exception(exception)
+            raise
+        with self.lock:
+            self.memory_cache.put(key, png)
+            del self.pending[key]
+        future.set_result(png)
+        return png
+
+    def get_tile_from_disk_or_workers(self, key: TileKey, view: FractalView) -> bytes:
+        path: Final = self.get_disk_path(key)
+        if path is not None and os.path.exists(path):
+            with open(path, 'rb') as file:
+                png = file.read()
+            with self.lock:
+                self.num_disk_hits += 1
+            return png
+
+        png = self.executor.submit(render_tile, view, self.rgb_palette).result()
+        with self.lock:
+            self.num_rendered += 1
+        if path is not None:
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+            temporary_path = f'{path}.{threading.get_ident()}.tmp'
+            with open(temporary_path, 'wb') as file:
+                file.write(png)
+            os.replace(temporary_path, path)  # atomically, so that an interruption never leaves a partial tile
+        return png
+
+    def close(self) -> None:
+        self.executor.shutdown(cancel_futures=True)
+
+
+class TileRequestHandler(BaseHTTPRequestHandler):
+    server: 'TileServer'
+
+    def do_GET(self) -> None:
+        url: Final = urllib.parse.urlsplit(self.path)
+        match: Final = tile_path_pattern.match(url.path)
+        if match is None:
+            self.send_error(404, 'Not a tile (/{fractal}/{z}/{x}/{y}.png)')
+            return
+        query: Final = urllib.parse.parse_qs(url.query)
+        z: Final = int(match.group(2))
+        try:
+            k_max = int(query['k_max'][0]) if 'k_max' in query else None
+            if k_max is not None and k_max < 1:
+                raise ValueError(f'k_max {k_max} is out of range')
+            if k_max is not None and k_max > get_max_k_max(z):
+                self.send_error(400, f'k_max {k_max} is above {get_max_k_max(z)}, the maximum at zoom level {z}')
+                return
+            png = self.server.tile_service.get_tile(FractalKind(match.group(1)), z, int(match.group(3)),
+                                                    int(match.group(4)), k_max)
+        except ValueError as error:
+            self.send_error(404, str(error))
+            return
+        except Exception as error:
+            self.log_error('Failed to render %s: %r', self.path, error)
+            self.send_error(500, 'Failed to render the tile')
+            return
+        self.send_response(200)
+        self.send_header('Content-Type', 'image/png')
+        self.send_header('Content-Length', str(len(png)))
+        self.send_header('Cache-Control', 'public, max-age=86400')
+        self.end_headers()
+        self.wfile.write(png)
+
+    def log_message(self, format: str, *args) -> None:
+        if self.server.verbose:
+            super().log_message(format, *args)
+
+
+class TileServer(ThreadingHTTPServer):
+    """HTTP server of the tiles of a `TileService`, one thread per connection."""
+    daemon_threads = True
+
+    def __init__(self, address: tuple[str, int], tile_service: TileService, verbose: bool = False) -> None:
+        super().__init__(address, TileRequestHandler)
+        self.tile_service = tile_service
+        self.verbose = verbose
+
+
+def create_parser() -> argparse.ArgumentParser:
+    parser: Final = argparse.ArgumentParser(description='Local HTTP server of /{fractal}/{z}/{x}/{y}.png tiles.')
+    parser.add_argument('--host', default='127.0.0.1', help='address to listen on (0.0.0.0 for other machines)')
+    parser.add_argument('--port', type=int, default=8000)
+    parser.add_argument('--cache-directory', metavar='<directory>', default=None, help='on-disk tile cache')
+    parser.add_argument('--memory-cache-mb', type=int, default=default_memory_cache_bytes >> 20)
+    parser.add_argument('--workers', type=int, default=None, help='number of processes (default: one per CPU)')
+    parser.add_argument('-c', metavar=('<Re(c)>', '<Im(c)>'), type=float, nargs=2, default=(-.39054, -.58679),
+                        help='complex c number of the Julia set')
+    parser.add_argument('-C', '--c-max', type=int, default=64, help='C (max. #colors)')
+    parser.add_argument('--step-colors', type=int, default=7, help='SC (step colors)')
+    parser.add_argument('--card-s', type=int, choices=range(0, 11), default=1, help='card{S} in HSV (0 to 10)')
+    parser.add_argument('--card-v', type=int, choices=range(0, 11), default=1, help='card{V} in HSV (0 to 10)')
+    return parser
+
+
+def main(argv: Sequence[str] | None = None) -> int:
+    args: Final = create_parser().parse_args(argv)
+    tile_service: Final = TileService(generate_rgb_palette(args.c_max, args.step_colors, args.card_s, args.card_v),
+                                      args.cache_directory, args.workers, args.memory_cache_mb << 20, complex(*args.c))
+    with TileServer((args.host, args.port), tile_service, verbose=True) as server:
+        print(f'Serving http://{args.host}:{server.server_address[1]}/{{fractal}}/{{z}}/{{x}}/{{y}}.png tiles '
+              '(Ctrl+C to stop)')
+        try:
+            server.serve_forever()
+        except KeyboardInterrupt:
+            pass
+        finally:
+            tile_service.close()
+            print(tile_service)
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,201 @@
+"""
+Run the tests by executing, for all test classes:
+
+  $ python -m unittest -v test_fractals.py
+  or
+  $ python test_fractals.py
+"""
+
+import numpy as np
+import unittest
+
+from decimal import Decimal
+from fractals import RenderSettings, compute_iterations, generate_array_colors, generate_iterations, \
+    get_mandelbrot_deep_zoom_view, get_photo_image_data, last_render, paint_pixel_by_pixel, paint_with_rectangles, \
+    poll_background_render, recolor, zoom_in
+from fractals_background import BackgroundRender, get_parallel_tiles_generator
+from fractals_colors import colorize, generate_rgb_palette
+from fractals_engine import FractalKind, FractalView, get_int_colors
+from fractals_io import get_ppm_bytes
+from fractals_lattice import get_zoomed_view
+from fractals_perturbation import DeepZoomView, get_deep_zoom_view
+from fractals_subdivision import get_iterations_by_subdivision
+from typing import Final
+from unittest import mock
+
+
+class Test_get_photo_image_data(unittest.TestCase):
+
+    def test_GivenIntColors_When_get_photo_image_data_ThenReturnOneBracedListOfColorsPerRow(self):
+        array_colors: Final = '#000000', '#ff0000', '#00ff00'
+        int_colors: Final = np.array([[0, 1, 2], [2, 2, 0]])
+        self.assertEqual(get_photo_image_data(int_colors, array_colors),
+                         '{#000000 #ff0000 #00ff00} {#00ff00 #00ff00 #000000}')
+
+    def test_GivenGeneratedArrayColors_When_get_photo_image_data_ThenEveryPixelHasA7CharacterColor(self):
+        array_colors: Final = generate_array_colors(16, 1, 1, 1)
+        int_colors: Final = np.arange(17).reshape(1, 17)
+        data: Final = get_photo_image_data(int_colors, array_colors)
+        self.assertEqual([len(color) for color in data.strip('{}').split(' ')], [7]*17)
+
+
+def get_painted_pixels(create_rectangle: mock.Mock, shape: tuple[int, int]) -> np.ndarray:
+    """Paints the calls to `canvas.create_rectangle` as Tk does: from (x_0, y_0) up to, but excluding, (x_1, y_1), and
+    at least one pixel."""
+    pixels: Final = np.full(shape, '', dtype=object)
+    for call in create_rectangle.call_args_list:
+        x_0, y_0, x_1, y_1 = call.args
+        pixels[y_0 - 2:max(y_1, y_0 + 1) - 2, x_0 - 2:max(x_1, x_0 + 1) - 2] = call.kwargs['fill']
+    return pixels
+
+
+class Test_paint_with_rectangles(unittest.TestCase):
+
+    def test_GivenIntColors_When_paint_with_rectangles_ThenPaintTheSamePixelsWithFewerItems(self):
+        array_colors: Final = '#000000', '#ff0000', '#00ff00'
+        int_colors: Final = np.array([[0, 0, 1, 1, 2], [0, 0, 1, 1, 1], [0, 0, 2, 2, 2]])
+        with mock.patch('builtins.print'):
+            pixel_canvas, rectangle_canvas = mock.Mock(), mock.Mock()
+            paint_pixel_by_pixel(int_colors, array_colors, pixel_canvas)
+            paint_with_rectangles(int_colors, array_colors, rectangle_canvas)
+        self.assertEqual(pixel_canvas.create_rectangle.call_count, 15)
+        self.assertEqual(rectangle_canvas.create_rectangle.call_count, 5)
+        np.testing.assert_array_equal(get_painted_pixels(rectangle_canvas.create_rectangle, int_colors.shape),
+                                      get_painted_pixels(pixel_canvas.create_rectangle, int_colors.shape))
+        rectangle_canvas.delete.assert_called_once_with('all')
+
+    def test_GivenTheDefaultBackgroundRender_When_it_finishes_ThenPaintItWithRectangles(self):
+        view: Final = FractalView(FractalKind.mandelbrot, (-2.25, .75), (-1.5, 1.5), (24, 18), 100., 16)
+        array_colors: Final = generate_array_colors(16, 1, 1, 1)
+        render: Final = BackgroundRender(view.res_xy, get_parallel_tiles_generator(view, 1)).start()
+        render.join()
+        common_vars: Final = mock.Mock()
+        common_vars.use_photo_image.get.return_value, common_vars.merge_rectangles.get.return_value = False, True
+        canvas: Final = mock.Mock()
+        with mock.patch('builtins.print'):
+            poll_background_render(render, view, array_colors, mock.Mock(), set(), common_vars, canvas, 'go_mandelbrot')
+        self.assertLess(canvas.create_rectangle.call_count, view.res_xy[0] * view.res_xy[1])
+        np.testing.assert_array_equal(get_painted_pixels(canvas.create_rectangle, (18, 24)),
+                                      np.array(array_colors)[get_int_colors(view.get_iterations(), 16)])
+
+
+def get_vars_for_testing(**values) -> mock.Mock:
+    """Mocks the Tk variables, whose `get` returns the given values."""
+    tk_vars: Final = mock.Mock()
+    for name, value in values.items():
+        if isinstance(value, tuple):
+            setattr(tk_vars, name, tuple(mock.Mock(**{'get.return_value': item}) for item in value))
+        else:
+            getattr(tk_vars, name).get.return_value = value
+    return tk_vars
+
+
+class Test_get_mandelbrot_deep_zoom_view(unittest.TestCase):
+
+    def test_GivenTheDeepZoomEntries_When_get_mandelbrot_deep_zoom_view_ThenKeepAllTheDigitsOfTheCenter(self):
+        common_vars: Final = get_vars_for_testing(res_xy=(64, 48), magnitude=100., k_max=500)
+        center: Final = '-0.74364388703715870475219150611477', '0.13182590420531197049313205638361'
+        deep_zoom_view: Final = get_mandelbrot_deep_zoom_view(
+            common_vars, get_vars_for_testing(deep_zoom_center=center, deep_zoom_width='1e-20'))
+        self.assertEqual((deep_zoom_view.center_re, deep_zoom_view.center_im), (Decimal(center[0]), Decimal(center[1])))
+        self.assertEqual((deep_zoom_view.width, deep_zoom_view.res_xy, deep_zoom_view.k_max), (1e-20, (64, 48), 500))
+
+    def test_GivenEntriesThatAreNotNumbers_When_get_mandelbrot_deep_zoom_view_ThenRaiseValueError(self):
+        common_vars: Final = get_vars_for_testing(res_xy=(64, 48), magnitude=100., k_max=500)
+        for center, width in (('-0.75', 'x'), '3'), (('-0.75', '0'), 'wide'), (('-0.75', '0'), '-1'):
+            with self.subTest(center=center, width=width):
+                self.assertRaises(ValueError, get_mandelbrot_deep_zoom_view, common_vars,
+                                  get_vars_for_testing(deep_zoom_center=center, deep_zoom_width=width))
+
+
+class Test_zoom_in(unittest.TestCase):
+
+    def setUp(self):
+        self.common_vars = mock.Mock()
+        self.julia_set_vars = get_vars_for_testing(x_min_max=(0., 0.), y_min_max=(0., 0.))
+        self.mandelbrot_set_vars = get_vars_for_testing(p_min_max=(0., 0.), q_min_max=(0., 0.),
+                                                        deep_zoom_center=('', ''))
+
+    def zoom_in(self, i: int, j: int, view: FractalView, deep_zoom_view: DeepZoomView | None = None) -> mock.Mock:
+        """Returns the mock of the `go_*` function called."""
+        with mock.patch.object(last_render, 'view', view), \
+                mock.patch.object(last_render, 'deep_zoom_view', deep_zoom_view), \
+                mock.patch('fractals.go_julia') as go_julia, mock.patch('fractals.go_mandelbrot') as go_mandelbrot:
+            zoom_in(i, j, self.common_vars, self.julia_set_vars, self.mandelbrot_set_vars, mock.Mock())
+        return go_julia if view.kind == FractalKind.julia else go_mandelbrot
+
+    def test_GivenAClickOnTheLastView_When_zoom_in_ThenWriteTheZoomedBoundsAndGo(self):
+        for view, re_vars, im_vars in (
+                (FractalView(FractalKind.mandelbrot, (-2.25, .75), (-1.5, 1.5), (129, 97), 100., 64),
+                 self.mandelbrot_set_vars.p_min_max, self.mandelbrot_set_vars.q_min_max),
+                (FractalView(FractalKind.julia, (-1.5, 1.5), (-1.5, 1.5), (129, 97), 100., 64, complex(-.8, .156)),
+                 self.julia_set_vars.x_min_max, self.julia_set_vars.y_min_max)):
+            with self.subTest(kind=view.kind):
+                go = self.zoom_in(40, 30, view)
+                go.assert_called_once()
+                zoomed_view = get_zoomed_view(view, 40, 30, 2)
+                self.assertEqual(tuple(bound.set.call_args.args[0] for bound in re_vars), zoomed_view.re_min_max)
+                self.assertEqual(tuple(bound.set.call_args.args[0] for bound in im_vars), zoomed_view.im_min_max)
+
+    def test_GivenADeepZoom_When_zoom_in_ThenWriteTheNewCenterWithAllItsDigitsAndHalfTheWidth(self):
+        view: Final = FractalView(FractalKind.mandelbrot, (-2.25, .75), (-1.5, 1.5), (5, 3), 100., 64)
+        deep_zoom_view: Final = DeepZoomView('-0.743643887037158704752191506114774', '0.1318259042053119704931320563',
+                                             4e-30, (5, 3), 100., 64)
+        self.zoom_in(3, 0, view, deep_zoom_view).assert_called_once()
+        center_re, center_im = (Decimal(center.set.call_args.args[0])
+                                for center in self.mandelbrot_set_vars.deep_zoom_center)
+        self.assertLess(abs(center_re - deep_zoom_view.center_re - Decimal(1e-30)), Decimal('1e-40'))
+        self.assertLess(abs(center_im - deep_zoom_view.center_im - Decimal(1e-30)), Decimal('1e-40'))
+        self.assertEqual(float(self.mandelbrot_set_vars.deep_zoom_width.set.call_args.args[0]), 2e-30)
+
+    def test_GivenAClickOutsideTheImage_When_zoom_in_ThenDoNothing(self):
+        view: Final = FractalView(FractalKind.mandelbrot, (-2.25, .75), (-1.5, 1.5), (129, 97), 100., 64)
+        self.zoom_in(129, 30, view).assert_not_called()
+
+
+class Test_recolor(unittest.TestCase):
+
+    def test_GivenALastRender_When_recolor_ThenPaintItsColorizedIterationsAsASinglePpmImage(self):
+        iterations: Final = np.array([[0, 1, 2], [3, 4, 0]], dtype=np.int32)
+        common_vars: Final = mock.Mock()
+        common_vars.c_max.get.return_value, common_vars.step_colors.get.return_value = 16, 3
+        common_vars.card_s.get.return_value = common_vars.card_v.get.return_value = 1
+        canvas: Final = mock.Mock()
+        with mock.patch.object(last_render, 'iterations', iterations), \
+                mock.patch('fractals.tk.PhotoImage') as photo_image, mock.patch('builtins.print'):
+            recolor(common_vars, canvas)
+        photo_image.assert_called_once_with(data=get_ppm_bytes(colorize(iterations, generate_rgb_palette(16, 3, 1, 1))),
+                                            format='PPM')
+        canvas.delete.assert_called_once_with('all')
+        self.assertEqual(canvas.create_image.call_args.kwargs['image'], photo_image.return_value)
+
+
+class Test_generate_iterations(unittest.TestCase):
+
+    def test_GivenEachRenderer_When_generate_iterations_ThenYieldBandsOfTheSameIterationsAsCompute(self):
+        view: Final = FractalView(FractalKind.mandelbrot, (-2.25, .75), (-1.5, 1.5), (40, 37), 100., 32)
+        for settings in (RenderSettings(get_deep_zoom_view(view), False, False, False),
+                         RenderSettings(None, True, False, False), RenderSettings(None, False, True, False),
+                         RenderSettings(None, False, False, True)):
+            with self.subTest(settings=settings.__dict__):
+                with mock.patch('builtins.print'):
+                    bands = list(generate_iterations(view, settings))
+                    expected_iterations = compute_iterations(view, settings)
+                self.assertEqual([tile for tile, _ in bands], [(0, 16, 0, 40), (16, 32, 0, 40), (32, 37, 0, 40)])
+                np.testing.assert_array_equal(np.vstack([iterations for _, iterations in bands]), expected_iterations)
+
+    def test_GivenSubdivision_When_generate_iterations_ThenIterateAsFewPixelsAsOnTheWholeView(self):
+        view: Final = FractalView(FractalKind.mandelbrot, (-2.25, .75), (-1.5, 1.5), (256, 256), 100., 64)
+        with mock.patch.object(FractalView, 'get_iterations_of_points', autospec=True,
+                               side_effect=FractalView.get_iterations_of_points) as get_iterations_of_points, \
+                mock.patch('builtins.print'):
+            bands = list(generate_iterations(view, RenderSettings(None, False, False, True)))
+        num_iterated_pixels: Final = sum(points.size for (_, points), _ in get_iterations_of_points.call_args_list)
+        iterations, num_computed_pixels = get_iterations_by_subdivision(view)
+        self.assertEqual(num_iterated_pixels, num_computed_pixels)
+        self.assertLess(num_iterated_pixels, .7 * view.res_xy[0] * view.res_xy[1])
+        np.testing.assert_array_equal(np.vstack([iterations for _, iterations in bands]), iterations)
+
+
+if __name__ == '__main__':
+    unittest.main()
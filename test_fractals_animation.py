@@ -0,0 +1,165 @@
+"""
+Run the tests by executing, for all test classes:
+
+  $ python -m unittest -v test_fractals_animation.py
+  or
+  $ python test_fractals_animation.py
+"""
+
+import json
+import numpy as np
+import os
+import tempfile
+import unittest
+
+from fractals_animation import Keyframe, generate_frame_images, get_frame_image, get_frame_views, \
+    get_interpolated_keyframe, load_animation, main, render_animation
+from fractals_colors import generate_rgb_palette
+from fractals_engine import FractalKind, FractalView
+from fractals_out_of_core import get_progress_path
+from fractals_precision import ArbitraryPrecisionView, needs_arbitrary_precision
+from test_fractals_out_of_core import Interruption, read_png
+from typing import Final
+from unittest import mock
+
+
+def get_view_for_testing() -> FractalView:
+    return FractalView(FractalKind.mandelbrot, (-2.25, .75), (-1.5, 1.5), (33, 25), 100., 32)
+
+
+def get_keyframes_for_testing() -> list[Keyframe]:
+    return [Keyframe(complex(-.75, 0.), 3., 32, 4), Keyframe(complex(-.7453, .1127), .03, 128, 2),
+            Keyframe(complex(-.7453, .1127), .003, 256)]
+
+
+class Test_get_frame_views(unittest.TestCase):
+
+    def test_GivenTwoKeyframes_When_get_interpolated_keyframe_ThenZoomGeometricallyTowardsTheEnd(self):
+        start: Final = Keyframe(0j, 4., 100)
+        end: Final = Keyframe(1 + 1j, 1., 200)
+        middle: Final = get_interpolated_keyframe(start, end, .5)
+        self.assertAlmostEqual(middle.width, 2.)
+        self.assertAlmostEqual(middle.center, (2. / 3.) * (1 + 1j))  # the width went 2/3 of the way
+        self.assertEqual(middle.k_max, 150)
+        self.assertAlmostEqual(get_interpolated_keyframe(start, end, 1.).center, end.center)
+
+    def test_GivenKeyframes_When_get_frame_views_ThenReturnAllTheFramesWithSquarePixels(self):
+        keyframes: Final = get_keyframes_for_testing()
+        views: Final = get_frame_views(get_view_for_testing(), keyframes)
+        self.assertEqual(len(views), 4 + 2 + 1)
+        for view, keyframe in zip((views[0], views[4], views[6]), keyframes):
+            self.assertAlmostEqual(view.re_min_max[1] - view.re_min_max[0], keyframe.width)
+            self.assertAlmostEqual(complex(sum(view.re_min_max) / 2., sum(view.im_min_max) / 2.), keyframe.center)
+            self.assertEqual(view.k_max, keyframe.k_max)
+        for view in views:
+            inc_re, inc_im = view.get_increments()
+            self.assertAlmostEqual(abs(inc_im) / inc_re, 1.)
+            self.assertEqual(view.res_xy, (33, 25))
+
+    def test_GivenKeyframesBeyondTheFloat64Resolution_When_get_frame_views_ThenSwitchToArbitraryPrecision(self):
+        view: Final = FractalView(FractalKind.mandelbrot, (-2.25, .75), (-1.5, 1.5), (5, 4), 100., 32)
+        views: Final = get_frame_views(view, [Keyframe(complex(-.75, .1), 1e-3, 32, 2),
+                                              Keyframe(complex(-.75, .1), 1e-15, 32)])
+        self.assertEqual([needs_arbitrary_precision(view) for view in views], [False, False, True])
+        self.assertEqual([type(view) for view in views], [FractalView, FractalView, ArbitraryPrecisionView])
+        self.assertEqual(get_frame_image(views[2], generate_rgb_palette(16, 3, 1, 1)).shape, (4, 5, 3))
+
+    def test_GivenInvalidKeyframes_When_Keyframe_ThenRaiseValueError(self):
+        self.assertRaises(ValueError, Keyframe, 0j, 0., 64)
+        self.assertRaises(ValueError, Keyframe, 0j, 1., 0)
+        self.assertRaises(ValueError, Keyframe, 0j, 1., 64, 0)
+        self.assertRaises(ValueError, get_frame_views, get_view_for_testing(), [])
+
+    def test_GivenAnAnimationFile_When_load_animation_ThenReturnTheViewAndKeyframes(self):
+        with tempfile.TemporaryDirectory() as directory:
+            path = os.path.join(directory, 'animation.json')
+            with open(path, 'w') as file:
+                json.dump({'fractal': 'julia', 'c': [-.8, .156],
+                           'keyframes': [{'center': [0., 0.], 'width': 3., 'k_max': 64, 'frames': 10},
+                                         {'center': [.1, .2], 'width': .3, 'k_max': 128}]}, file)
+            view, keyframes = load_animation(path, (64, 48))
+        self.assertEqual(view.kind, FractalKind.julia)
+        self.assertEqual(view.c, complex(-.8, .156))
+        self.assertEqual(view.re_min_max, (-1.5, 1.5))
+        self.assertEqual([keyframe.frames for keyframe in keyframes], [10, 60])
+        self.assertEqual(len(get_frame_views(view, keyframes)), 11)
+
+
+class Test_render_animation(unittest.TestCase):
+
+    def setUp(self):
+        self.views = get_frame_views(get_view_for_testing(), get_keyframes_for_testing())
+        self.rgb_palette = generate_rgb_palette(16, 3, 1, 1)
+        self.expected_images = [get_frame_image(view, self.rgb_palette) for view in self.views]
+        self.directory = tempfile.TemporaryDirectory()
+
+    def tearDown(self):
+        self.directory.cleanup()
+
+    def check_output(self, output: str) -> None:
+        if output.endswith('.png'):
+            for index, expected_image in enumerate(self.expected_images):
+                np.testing.assert_array_equal(read_png(output % index), expected_image)
+        else:
+            with open(output, 'rb') as file:
+                frames = np.frombuffer(file.read(), dtype=np.uint8)
+            np.testing.assert_array_equal(frames.reshape(-1, 25, 33, 3), self.expected_images)
+        self.assertFalse(os.path.exists(get_progress_path(output)))
+
+    def test_GivenAFirstFrame_When_generate_frame_images_ThenYieldTheFollowingFramesInOrder(self):
+        for num_workers in 1, 2:
+            with self.subTest(num_workers=num_workers):
+                frames = list(generate_frame_images(self.views, self.rgb_palette, 2, num_workers))
+                self.assertEqual([index for index, _ in frames], list(range(2, 7)))
+                np.testing.assert_array_equal([image for _, image in frames], self.expected_images[2:])
+
+    def test_GivenTheOutputs_When_render_animation_ThenWriteAllTheFrames(self):
+        for output in os.path.join(self.directory.name, 'frames', 'zoom_%03d.png'), \
+                os.path.join(self.directory.name, 'zoom.rgb'):
+            with self.subTest(output=output):
+                self.assertEqual(render_animation(self.views, output, self.rgb_palette, 2), 7)
+                self.check_output(output)
+
+    def test_GivenAnInterruptedAnimation_When_render_animation_ThenResumeFromTheNextFrame(self):
+        for output in os.path.join(self.directory.name, 'zoom_%03d.png'), os.path.join(self.directory.name, 'zoom.rgb'):
+            with self.subTest(output=output):
+                calls = []
+
+                def get_frame_image_until_interrupted(view, rgb_palette):
+                    calls.append(view)
+                    if len(calls) == 4:
+                        raise Interruption
+                    return get_frame_image(view, rgb_palette)
+
+                with mock.patch('fractals_animation.get_frame_image', get_frame_image_until_interrupted):
+                    self.assertRaises(Interruption, render_animation, self.views, output, self.rgb_palette, 1)
+                self.assertTrue(os.path.exists(get_progress_path(output)))
+                self.assertEqual(render_animation(self.views, output, self.rgb_palette, 1), 7 - 3)
+                self.check_output(output)
+
+    def test_GivenAnInterruptedAnimationOfOtherParameters_When_render_animation_ThenStartOver(self):
+        output: Final = os.path.join(self.directory.name, 'zoom.rgb')
+        with mock.patch('fractals_animation.get_frame_image', side_effect=Interruption):
+            self.assertRaises(Interruption, render_animation, self.views[:3], output, self.rgb_palette, 1)
+        self.assertEqual(render_animation(self.views, output, self.rgb_palette, 1), 7)
+        self.check_output(output)
+
+    def test_GivenAPatternWithoutPlaceholder_When_render_animation_ThenRaiseValueError(self):
+        self.assertRaises(ValueError, render_animation, self.views, os.path.join(self.directory.name, 'zoom.png'),
+                          self.rgb_palette, 1)
+
+    def test_GivenTheCommandLine_When_main_ThenWriteTheFrames(self):
+        path: Final = os.path.join(self.directory.name, 'animation.json')
+        with open(path, 'w') as file:
+            json.dump({'fractal': 'mandelbrot',
+                       'keyframes': [{'center': [-.75, 0.], 'width': 3., 'k_max': 32, 'frames': 3},
+                                     {'center': [-.7453, .1127], 'width': .3, 'k_max': 64}]}, file)
+        output: Final = os.path.join(self.directory.name, 'zoom_%02d.png')
+        with mock.patch('builtins.print'):
+            self.assertEqual(main([path, '-o', output, '--resolution', '16', '12', '--workers', '1']), 0)
+        self.assertEqual(sorted(os.listdir(self.directory.name)),
+                         ['animation.json', 'zoom_00.png', 'zoom_01.png', 'zoom_02.png', 'zoom_03.png'])
+
+
+if __name__ == '__main__':
+    unittest.main()
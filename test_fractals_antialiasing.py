@@ -0,0 +1,76 @@
+"""
+Run the tests by executing, for all test classes:
+
+  $ python -m unittest -v test_fractals_antialiasing.py
+  or
+  $ python test_fractals_antialiasing.py
+"""
+
+import numpy as np
+import unittest
+
+from fractals_antialiasing import get_antialiased_image, get_edge_contrast, get_pixels_to_supersample, \
+    get_subpixel_offsets
+from fractals_colors import colorize, generate_rgb_palette
+from fractals_engine import FractalKind, FractalView
+from typing import Final
+
+
+def get_view_for_testing(res_xy: tuple[int, int] = (64, 48)) -> FractalView:
+    return FractalView(FractalKind.mandelbrot, (-2.25, .75), (-1.5, 1.5), res_xy, 100., 64)
+
+
+class Test_get_antialiased_image(unittest.TestCase):
+
+    def setUp(self):
+        self.rgb_palette = generate_rgb_palette(16, 3, 1, 1)
+
+    def test_GivenAFlatAreaAndAnEdge_When_get_edge_contrast_ThenOnlyThePixelsNextToTheEdgeHaveContrast(self):
+        rgb_image: Final = np.zeros((4, 4, 3), dtype=np.uint8)
+        rgb_image[:, 3] = 10, 20, 30
+        contrast: Final = get_edge_contrast(rgb_image)
+        np.testing.assert_array_equal(contrast[:, :2], 0)
+        np.testing.assert_array_equal(contrast[:, 2:], 60)
+
+    def test_GivenMoreEdgePixelsThanTheBudget_When_get_pixels_to_supersample_ThenKeepTheHighestContrasts(self):
+        contrast: Final = np.array([[0, 5, 1], [9, 0, 3]], dtype=np.int32)
+        np.testing.assert_array_equal(get_pixels_to_supersample(contrast, 10), [1, 2, 3, 5])
+        np.testing.assert_array_equal(get_pixels_to_supersample(contrast, 2), [1, 3])
+
+    def test_GivenSamplesPerAxis_When_get_subpixel_offsets_ThenTheyStayWithinThePixel(self):
+        view: Final = get_view_for_testing()
+        inc_re, inc_im = view.get_increments()
+        offsets: Final = get_subpixel_offsets(view, 4)
+        self.assertEqual(offsets.size, 16)
+        self.assertAlmostEqual(float(np.abs(offsets.real).max()), .375 * abs(inc_re))
+        self.assertAlmostEqual(float(np.abs(offsets.imag).max()), .375 * abs(inc_im))
+        self.assertAlmostEqual(complex(offsets.mean()), 0j)
+
+    def test_GivenAView_When_get_antialiased_image_ThenOnlyEdgePixelsChangeWithinTheBudget(self):
+        view: Final = get_view_for_testing()
+        iterations: Final = view.get_iterations()
+        aliased_image: Final = colorize(iterations, self.rgb_palette)
+        rgb_image, stats = get_antialiased_image(view, self.rgb_palette, max_cost=2.)
+        self.assertEqual(rgb_image.shape, aliased_image.shape)
+        self.assertLessEqual(stats.get_cost(), 2.)
+        self.assertGreater(stats.num_supersampled_pixels, 0)
+        self.assertLessEqual(stats.num_supersampled_pixels, stats.num_edge_pixels)
+        changed: Final = (rgb_image != aliased_image).any(axis=2)
+        self.assertLessEqual(np.count_nonzero(changed), stats.num_supersampled_pixels)
+        flat: Final = get_edge_contrast(aliased_image) == 0
+        np.testing.assert_array_equal(rgb_image[flat], aliased_image[flat])
+
+    def test_GivenAMinimalBudget_When_get_antialiased_image_ThenReturnTheAliasedImage(self):
+        view: Final = get_view_for_testing()
+        rgb_image, stats = get_antialiased_image(view, self.rgb_palette, max_cost=1.)
+        np.testing.assert_array_equal(rgb_image, colorize(view.get_iterations(), self.rgb_palette))
+        self.assertEqual(stats.get_cost(), 1.)
+
+    def test_GivenInvalidParameters_When_get_antialiased_image_ThenRaiseValueError(self):
+        self.assertRaises(ValueError, get_antialiased_image, get_view_for_testing(), self.rgb_palette,
+                          samples_per_axis=1)
+        self.assertRaises(ValueError, get_antialiased_image, get_view_for_testing(), self.rgb_palette, max_cost=.5)
+
+
+if __name__ == '__main__':
+    unittest.main()
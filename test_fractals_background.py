@@ -0,0 +1,93 @@
+"""
+Run the tests by executing, for all test classes:
+
+  $ python -m unittest -v test_fractals_background.py
+  or
+  $ python test_fractals_background.py
+"""
+
+import numpy as np
+import threading
+import unittest
+
+from fractals_background import BackgroundRender, RenderFinished, RenderedTile, \
+    get_cached_and_parallel_tiles_generator, get_parallel_tiles_generator, get_whole_image_generator
+from fractals_cache import TileCache, get_cached_and_missing_tiles, get_iterations_with_cache
+from fractals_engine import FractalKind, FractalView, IterationsArray, get_tiles
+from typing import Final
+from unittest import mock
+
+
+def get_view_for_testing() -> FractalView:
+    return FractalView(FractalKind.mandelbrot, (-2.25, .75), (-1.5, 1.5), (40, 30), 100., 32)
+
+
+def wait_for(render: BackgroundRender) -> tuple[list[RenderedTile | RenderFinished], RenderFinished]:
+    messages: Final[list[RenderedTile | RenderFinished]] = []
+    while render.finished is None:
+        render.join(.01)
+        messages.extend(render.poll())
+    return messages, render.finished
+
+
+class Test_BackgroundRender(unittest.TestCase):
+
+    def test_GivenParallelTiles_When_BackgroundRender_ThenIterationsAreAssembledTileByTile(self):
+        view: Final = get_view_for_testing()
+        render: Final = BackgroundRender(view.res_xy, get_parallel_tiles_generator(view, 1)).start()
+        messages, finished = wait_for(render)
+        self.assertEqual(len([message for message in messages if isinstance(message, RenderedTile)]),
+                         len(get_tiles(view.res_xy, (16, 256))))
+        self.assertEqual((render.get_progress(), finished.cancelled, finished.error), (1., False, None))
+        np.testing.assert_array_equal(render.iterations, view.get_iterations())
+
+    def test_GivenCachedTiles_When_BackgroundRender_ThenTheCachedAndTheComputedTilesAreCombined(self):
+        view: Final = get_view_for_testing()
+        cache: Final = TileCache(2*(8*16*4))
+        get_iterations_with_cache(view, cache, 1, (8, 16))
+        cached_tiles, missing_tiles = get_cached_and_missing_tiles(view, cache, (8, 16))
+        self.assertTrue(len(cached_tiles) > 0 and len(missing_tiles) > 0)
+        render: Final = BackgroundRender(view.res_xy, get_cached_and_parallel_tiles_generator(
+            view, cached_tiles, missing_tiles, (8, 16))).start()
+        wait_for(render)
+        np.testing.assert_array_equal(render.iterations, view.get_iterations())
+
+    def test_GivenNoCachedTiles_When_BackgroundRender_ThenComputeTheUniquePartAndMirrorTheRest(self):
+        view: Final = get_view_for_testing()
+        render: Final = BackgroundRender(view.res_xy, get_cached_and_parallel_tiles_generator(
+            view, {}, get_tiles(view.res_xy, (8, 16)), (8, 16)))
+        with mock.patch.object(FractalView, 'get_iterations', autospec=True,
+                               side_effect=FractalView.get_iterations) as get_iterations:
+            render.start()
+            wait_for(render)
+        np.testing.assert_array_equal(render.iterations, view.get_iterations())
+        self.assertLess(sum((j_1 - j_0) * (i_1 - i_0) for (_, j_0, j_1, i_0, i_1), _ in get_iterations.call_args_list),
+                        view.res_xy[0] * view.res_xy[1])
+
+    def test_GivenACancelledRender_When_poll_ThenItFinishesEarlyAsCancelled(self):
+        view: Final = get_view_for_testing()
+        may_go_on: Final = threading.Event()
+
+        def generate_tiles():
+            for tile in get_tiles(view.res_xy, (1, 40)):
+                yield tile, view.get_iterations(*tile)
+                may_go_on.wait()
+
+        render: Final = BackgroundRender(view.res_xy, generate_tiles).start()
+        render.cancel()
+        may_go_on.set()
+        _, finished = wait_for(render)
+        self.assertTrue(finished.cancelled)
+        self.assertLess(render.get_progress(), 1.)
+
+    def test_GivenAFailingRenderer_When_poll_ThenTheErrorIsReported(self):
+        def compute() -> IterationsArray:
+            raise ValueError('Out of range')
+
+        render: Final = BackgroundRender((40, 30), get_whole_image_generator((40, 30), compute)).start()
+        _, finished = wait_for(render)
+        self.assertIn('Out of range', str(finished.error))
+
+
+if __name__ == '__main__':
+    unittest.main()
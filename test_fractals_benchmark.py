@@ -0,0 +1,101 @@
+"""
+Run the tests by executing, for all test classes:
+
+  $ python -m unittest -v test_fractals_benchmark.py
+  or
+  $ python test_fractals_benchmark.py
+"""
+
+import contextlib
+import io
+import json
+import numpy as np
+import os
+import tempfile
+import unittest
+
+from fractals_benchmark import BenchmarkCase, BenchmarkResult, get_benchmark_cases, get_num_iterations, \
+    get_regressions, load_baseline, main, max_pure_pixels, run_benchmark_case, save_baseline
+from fractals_engine import KernelBackend
+from typing import Final
+from unittest import mock
+
+
+class Test_fractals_benchmark(unittest.TestCase):
+
+    def test_GivenIterations_When_get_num_iterations_ThenCountKMaxForTheNonEscapingPixels(self):
+        self.assertEqual(get_num_iterations(np.array([[0, 3], [5, 0]], dtype=np.int32), 10), 28)
+
+    def test_GivenTheParameters_When_get_benchmark_cases_ThenSkipTheLargePureOnes(self):
+        cases: Final = get_benchmark_cases((128, 256), (64,), ('julia',), (KernelBackend.pure, KernelBackend.numpy),
+                                           (1, 2))
+        names: Final = [case.get_name() for case in cases]
+        self.assertEqual(len(names), 6)
+        self.assertIn('julia-128x128-k64-pure-w2', names)
+        self.assertTrue(all(case.resolution**2 <= max_pure_pixels for case in cases
+                            if case.backend == KernelBackend.pure))
+
+    def test_GivenAnUnknownView_When_get_benchmark_cases_ThenRaiseValueError(self):
+        self.assertRaises(ValueError, get_benchmark_cases, (128,), (64,), ('nowhere',), (KernelBackend.numpy,), (1,))
+
+    def test_GivenACase_When_run_benchmark_case_ThenReturnItsWork(self):
+        result: Final = run_benchmark_case(BenchmarkCase('boundary', 32, 64, KernelBackend.numpy, 1), repeats=2)
+        self.assertEqual(result.name, 'boundary-32x32-k64-numpy-w1')
+        self.assertEqual(result.num_pixels, 32 * 32)
+        self.assertTrue(32 * 32 <= result.num_iterations <= 32 * 32 * 64)
+        self.assertTrue(result.seconds > 0)
+
+    def test_GivenResults_When_saved_and_loaded_ThenTheThroughputsAreKept(self):
+        results: Final = [BenchmarkResult('a', 2_000_000, 3_000_000_000, 2.)]
+        with tempfile.TemporaryDirectory() as directory:
+            path: Final = os.path.join(directory, 'baseline.json')
+            save_baseline(path, results)
+            baseline: Final = load_baseline(path)
+        self.assertEqual(baseline['results']['a']['mpixels_per_second'], 1.)
+        self.assertEqual(baseline['results']['a']['giterations_per_second'], 1.5)
+
+    def test_GivenSlowerResults_When_get_regressions_ThenFlagThoseBeyondTheThreshold(self):
+        baseline: Final = {'results': {name: {'mpixels_per_second': 1.} for name in ('a', 'b')}}
+        results: Final = [BenchmarkResult('a', 1_000_000, 0, 1.05), BenchmarkResult('b', 1_000_000, 0, 2.),
+                          BenchmarkResult('c', 1_000_000, 0, 100.)]
+        regressions: Final = get_regressions(results, baseline, .1)
+        self.assertEqual([regression.name for regression in regressions], ['b'])
+        self.assertAlmostEqual(regressions[0].get_slowdown(), .5)
+
+    def test_GivenAnInvalidThreshold_When_get_regressions_ThenRaiseValueError(self):
+        self.assertRaises(ValueError, get_regressions, [], {'results': {}}, 1.)
+
+    def test_GivenABaseline_When_main_ThenReturnWhetherThereAreRegressions(self):
+        arguments: Final = ['--resolutions', '16', '--k-max', '16', '--views', 'julia', '--backends', 'numpy',
+                            '--workers', '1', '--repeats', '1']
+        with tempfile.TemporaryDirectory() as directory, contextlib.redirect_stdout(io.StringIO()):
+            path: Final = os.path.join(directory, 'baseline.json')
+            self.assertEqual(main(arguments + ['--save', path]), 0)
+            baseline: Final = load_baseline(path)
+            for result in baseline['results'].values():
+                result['mpixels_per_second'] *= 1000.
+            faster_path: Final = os.path.join(directory, 'faster.json')
+            with open(faster_path, 'w') as file:
+                json.dump(baseline, file)
+            self.assertEqual(main(arguments + ['--baseline', faster_path]), 1)
+
+    def test_GivenInvalidArguments_When_main_ThenPrintAnErrorAndReturn2(self):
+        arguments: Final = ['--resolutions', '16', '--k-max', '16', '--views', 'julia', '--repeats', '1']
+        for extra_arguments in (['--workers', '0'], ['--backends', 'jit'], ['--threshold', '1']):
+            with self.subTest(extra_arguments=extra_arguments):
+                with mock.patch('fractals_engine.get_escape_iterations_jit', None), \
+                        contextlib.redirect_stdout(io.StringIO()) as output:
+                    self.assertEqual(main(arguments + extra_arguments), 2)
+                self.assertTrue(output.getvalue().startswith('❌  ERROR: '))
+
+    def test_GivenAnInterruptedSave_When_save_baseline_ThenKeepThePreviousBaseline(self):
+        with tempfile.TemporaryDirectory() as directory:
+            path: Final = os.path.join(directory, 'baseline.json')
+            save_baseline(path, [BenchmarkResult('a', 2_000_000, 3_000_000_000, 2.)])
+            with mock.patch('fractals_io.json.dump', side_effect=KeyboardInterrupt):
+                self.assertRaises(KeyboardInterrupt, save_baseline, path, [])
+            self.assertEqual(list(load_baseline(path)['results']), ['a'])
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,74 @@
+"""
+Run the tests by executing, for all test classes:
+
+  $ python -m unittest -v test_fractals_cache.py
+  or
+  $ python test_fractals_cache.py
+"""
+
+import numpy as np
+import unittest
+
+from fractals_cache import TileCache, get_iterations_with_cache
+from fractals_engine import FractalKind, FractalView
+from typing import Final
+
+
+class Test_TileCache(unittest.TestCase):
+
+    def test_GivenANonPositiveSize_When_TileCache_ThenExceptionIsRaised(self):
+        self.assertRaises(ValueError, TileCache, 0)
+
+    def test_GivenACache_When_get_ThenCountHitsAndMisses(self):
+        cache: Final = TileCache(1000)
+        cache.put('a', np.zeros(10, dtype=np.int32))
+        self.assertIsNotNone(cache.get('a'))
+        self.assertIsNone(cache.get('b'))
+        self.assertEqual((cache.hits, cache.misses), (1, 1))
+
+    def test_GivenAFullCache_When_put_ThenEvictTheLeastRecentlyUsedEntries(self):
+        cache: Final = TileCache(100)
+        cache.put('a', np.zeros(10, dtype=np.int32))  # 40 bytes
+        cache.put('b', np.zeros(10, dtype=np.int32))
+        cache.get('a')
+        cache.put('c', np.zeros(10, dtype=np.int32))
+        self.assertEqual(('a' in cache, 'b' in cache, 'c' in cache), (True, False, True))
+        self.assertEqual((cache.num_bytes, cache.evictions), (80, 1))
+
+    def test_GivenAValueLargerThanTheCache_When_put_ThenItIsNotStored(self):
+        cache: Final = TileCache(100)
+        cache.put('a', bytes(101))
+        self.assertEqual((len(cache), cache.num_bytes), (0, 0))
+
+
+class Test_get_iterations_with_cache(unittest.TestCase):
+
+    def test_GivenTheSameViewTwice_When_get_iterations_with_cache_ThenTheSecondTimeAllTilesAreHits(self):
+        view: Final = FractalView(FractalKind.mandelbrot, (-2.25, .75), (-1.5, 1.5), (40, 30), 100., 32)
+        cache: Final = TileCache()
+        first: Final = get_iterations_with_cache(view, cache, 1, (8, 16))
+        self.assertEqual((cache.hits, cache.misses), (0, 12))
+        second: Final = get_iterations_with_cache(view, cache, 1, (8, 16))
+        self.assertEqual((cache.hits, cache.misses), (12, 12))
+        np.testing.assert_array_equal(first, view.get_iterations())
+        np.testing.assert_array_equal(second, first)
+
+    def test_GivenAPartiallyCachedView_When_get_iterations_with_cache_ThenComputeOnlyTheMissingTiles(self):
+        view: Final = FractalView(FractalKind.julia, (-1.5, 1.5), (-1.5, 1.5), (32, 32), 100., 32,
+                                  complex(-.39054, -.58679))
+        cache: Final = TileCache(4*(8*16*4))  # room for 4 out of the 8 tiles
+        get_iterations_with_cache(view, cache, 1, (8, 16))
+        self.assertEqual(len(cache), 4)
+        np.testing.assert_array_equal(get_iterations_with_cache(view, cache, 1, (8, 16)), view.get_iterations())
+        self.assertEqual((cache.hits, cache.misses), (4, 8 + 4))
+
+    def test_GivenADifferentKMax_When_get_iterations_with_cache_ThenNothingIsReused(self):
+        cache: Final = TileCache()
+        for k_max in 16, 32:
+            view = FractalView(FractalKind.mandelbrot, (-2.25, .75), (-1.5, 1.5), (40, 30), 100., k_max)
+            get_iterations_with_cache(view, cache, 1, (8, 16))
+        self.assertEqual((cache.hits, cache.misses), (0, 24))
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,140 @@
+"""
+Run the tests by executing, for all test classes:
+
+  $ python -m unittest -v test_fractals_cli.py
+  or
+  $ python test_fractals_cli.py
+"""
+
+import numpy as np
+import os
+import socket
+import subprocess
+import sys
+import tempfile
+import threading
+import unittest
+import zlib
+
+from fractals_cli import main
+from fractals_distributed import run_worker
+from fractals_engine import FractalKind, FractalView
+from fractals_io import get_png_bytes, get_ppm_bytes
+from typing import Final
+from unittest import mock
+
+
+class Test_fractals_io(unittest.TestCase):
+
+    def test_GivenAnImage_When_get_ppm_bytes_ThenReturnHeaderFollowedByTheRawPixels(self):
+        rgb_image: Final = np.arange(2*3*3, dtype=np.uint8).reshape(2, 3, 3)
+        self.assertEqual(get_ppm_bytes(rgb_image), b'P6\n3 2\n255\n' + rgb_image.tobytes())
+
+    def test_GivenAnImage_When_get_png_bytes_ThenTheIdatChunkDecompressesToTheFilteredRows(self):
+        rgb_image: Final = np.arange(2*3*3, dtype=np.uint8).reshape(2, 3, 3)
+        png: Final = get_png_bytes(rgb_image)
+        self.assertEqual(png[:8], b'\x89PNG\r\n\x1a\n')
+        idat_start: Final = png.index(b'IDAT') + 4
+        idat_length: Final = int.from_bytes(png[idat_start - 8:idat_start - 4], 'big')
+        rows: Final = zlib.decompress(png[idat_start:idat_start + idat_length])
+        self.assertEqual(rows, b'\x00' + rgb_image[0].tobytes() + b'\x00' + rgb_image[1].tobytes())
+
+    def test_GivenANonRgbImage_When_get_png_bytes_ThenExceptionIsRaised(self):
+        self.assertRaises(ValueError, get_png_bytes, np.zeros((2, 3), dtype=np.uint8))
+
+
+class Test_fractals_cli(unittest.TestCase):
+
+    def test_GivenMandelbrotArguments_When_main_ThenWriteTheRequestedFiles(self):
+        with tempfile.TemporaryDirectory() as directory:
+            paths: Final = [os.path.join(directory, f'mandelbrot{extension}') for extension in ('.png', '.ppm', '.npy')]
+            main(['mandelbrot', '--resolution', '40', '30', '-k', '32', '-q', '--workers', '1']
+                 + [argument for path in paths for argument in ('-o', path)])
+            for path in paths:
+                self.assertTrue(os.path.getsize(path) > 0)
+            expected: Final = FractalView(FractalKind.mandelbrot, (-2.25, .75), (-1.5, 1.5), (40, 30), 100.,
+                                          32).get_iterations()
+            np.testing.assert_array_equal(np.load(paths[2]), expected)
+
+    def test_GivenOutOfCore_When_main_ThenWriteTheSameFiles(self):
+        with tempfile.TemporaryDirectory() as directory:
+            arguments: Final = ['julia', '--resolution', '40', '30', '-k', '32', '-q', '--workers', '1']
+            for extension in '.ppm', '.npy':
+                path, out_of_core_path = (os.path.join(directory, f'{name}{extension}') for name in ('a', 'b'))
+                main(arguments + ['-o', path])
+                main(arguments + ['--out-of-core', '-o', out_of_core_path])
+                with open(path, 'rb') as file, open(out_of_core_path, 'rb') as out_of_core_file:
+                    self.assertEqual(file.read(), out_of_core_file.read())
+
+    def test_GivenDistributed_When_main_ThenWriteTheIterationsComputedByTheWorkers(self):
+        with socket.create_server(('127.0.0.1', 0)) as probe:
+            port: Final = probe.getsockname()[1]  # a free port
+        worker: Final = threading.Thread(target=run_worker, args=(('127.0.0.1', port), 30.))
+        worker.start()
+        with tempfile.TemporaryDirectory() as directory:
+            path: Final = os.path.join(directory, 'julia.npy')
+            main(['julia', '--resolution', '40', '30', '-k', '32', '-q', '--distributed', f'127.0.0.1:{port}',
+                  '-o', path])
+            worker.join()
+            expected: Final = FractalView(FractalKind.julia, (-1.5, 1.5), (-1.5, 1.5), (40, 30), 100., 32,
+                                          complex(-.39054, -.58679)).get_iterations()
+            np.testing.assert_array_equal(np.load(path), expected)
+
+    def test_GivenDistributedWithOutOfCore_When_main_ThenAssembleTheTilesOnDiskAndWriteTheImagesFromThem(self):
+        expected_path: Final = 'expected.ppm'
+        arguments: Final = ['julia', '--resolution', '40', '30', '-k', '32', '-q']
+        for extensions in ('.ppm',), ('.npy', '.ppm'):
+            with self.subTest(extensions=extensions), tempfile.TemporaryDirectory() as directory:
+                with socket.create_server(('127.0.0.1', 0)) as probe:
+                    port = probe.getsockname()[1]  # a free port
+                worker = threading.Thread(target=run_worker, args=(('127.0.0.1', port), 30.))
+                worker.start()
+                paths = [os.path.join(directory, f'julia{extension}') for extension in extensions]
+                main(arguments + ['--distributed', f'127.0.0.1:{port}', '--out-of-core']
+                     + [argument for path in paths for argument in ('-o', path)])
+                worker.join()
+                main(arguments + ['--workers', '1', '-o', os.path.join(directory, expected_path)])
+                with open(paths[-1], 'rb') as file, open(os.path.join(directory, expected_path), 'rb') as expected:
+                    self.assertEqual(file.read(), expected.read())
+                self.assertEqual(sorted(os.listdir(directory)),
+                                 sorted([expected_path] + [os.path.basename(path) for path in paths]))
+
+    def test_GivenDistributedWithAnInvalidAddress_When_main_ThenExit(self):
+        with self.assertRaises(SystemExit):
+            main(['julia', '-o', 'julia.png', '-q', '--distributed', '5555'])
+
+    def test_GivenAntialiasingWithOutOfCore_When_main_ThenExit(self):
+        with self.assertRaises(SystemExit):
+            main(['julia', '--antialiasing', '4', '--out-of-core', '-o', 'julia.png', '-q'])
+
+    def test_GivenAnUnsupportedExtension_When_main_ThenExit(self):
+        with self.assertRaises(SystemExit):
+            main(['julia', '-o', 'julia.jpg', '-q'])
+
+    def test_GivenADeepZoomOfAJuliaSet_When_main_ThenExit(self):
+        with self.assertRaises(SystemExit):
+            main(['julia', '--deep-zoom', '0', '0', '1e-18', '-o', 'julia.png', '-q'])
+
+    def test_GivenAnUnavailableBackend_When_main_ThenExit(self):
+        with mock.patch('fractals_engine.get_escape_iterations_jit', None), self.assertRaises(SystemExit):
+            main(['julia', '--backend', 'jit', '-o', 'julia.png', '-q'])
+
+    def test_GivenAResolutionBelow2_When_main_ThenExitWithAnError(self):
+        with mock.patch('builtins.print') as print_mock, self.assertRaises(SystemExit):
+            main(['julia', '--resolution', '1', '1', '-o', 'julia.png', '-q'])
+        self.assertIn('❌  ERROR: Resolution', print_mock.call_args.args[0])
+
+    def test_GivenANegativeMagnitude_When_main_ThenExitWithAnError(self):
+        with mock.patch('builtins.print') as print_mock, self.assertRaises(SystemExit):
+            main(['mandelbrot', '-M', '-1', '-o', 'mandelbrot.png', '-q'])
+        self.assertIn('❌  ERROR: Magnitude', print_mock.call_args.args[0])
+
+    def test_GivenTheModule_WhenImported_ThenTkinterIsNotImported(self):
+        code: Final = 'import sys, fractals_cli; print("tkinter" in sys.modules)'
+        result: Final = subprocess.run([sys.executable, '-c', code], capture_output=True, text=True,
+                                       cwd=os.path.dirname(os.path.abspath(__file__)))
+        self.assertEqual(result.stdout.strip(), 'False')
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,51 @@
+"""
+Run the tests by executing, for all test classes:
+
+  $ python -m unittest -v test_fractals_colors.py
+  or
+  $ python test_fractals_colors.py
+"""
+
+import numpy as np
+import unittest
+
+from fractals_colors import colorize, generate_array_colors, generate_rgb_palette, get_rgb_image, hsv2rgb, rgb_to_hex
+from fractals_engine import get_int_colors
+from typing import Final
+
+
+def generate_array_colors_entry_by_entry(num_colors: int, step_colors: int, card_s: int,
+                                         card_v: int) -> tuple[str, ...]:
+    array_colors: list[str] = [rgb_to_hex((0., 0., 0.))]
+    for i in range(0, num_colors):
+        h = ((i * step_colors) % num_colors) * (360. / num_colors)
+        s = (i % card_s + 1.)/card_s if card_s > 0 else 0.
+        v = (i % card_v + 1.)/card_v if card_v > 0 else (i+1.)/num_colors
+        array_colors.append(rgb_to_hex(hsv2rgb((h, s, v))))
+    return tuple(array_colors)
+
+
+class Test_generate_array_colors(unittest.TestCase):
+
+    def test_GivenAnyParameters_When_generate_array_colors_ThenResultIsTheSameAsEntryByEntry(self):
+        for num_colors in 1, 7, 16, 255:
+            for step_colors in 1, 3, -2:
+                for card_s in range(0, 11):
+                    for card_v in range(0, 11):
+                        self.assertEqual(
+                            generate_array_colors(num_colors, step_colors, card_s, card_v),
+                            generate_array_colors_entry_by_entry(num_colors, step_colors, card_s, card_v))
+
+
+class Test_colorize(unittest.TestCase):
+
+    def test_GivenIterations_When_colorize_ThenResultIsTheSameAsLookingUpTheIntColors(self):
+        iterations: Final = np.array([[0, 1, 16], [17, 255, 3]], dtype=np.int32)
+        rgb_palette: Final = generate_rgb_palette(16, 3, 2, 1)
+        np.testing.assert_array_equal(
+            colorize(iterations, rgb_palette),
+            get_rgb_image(get_int_colors(iterations, 16), generate_array_colors(16, 3, 2, 1)))
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,73 @@
+"""
+Run the tests by executing, for all test classes:
+
+  $ python -m unittest -v test_fractals_deepening.py
+  or
+  $ python test_fractals_deepening.py
+"""
+
+import numpy as np
+import unittest
+
+from fractals_deepening import DeepeningRenderer
+from fractals_engine import EscapeTimeState, FractalKind, FractalView, continue_escape_iterations, \
+    get_escape_iterations
+from typing import Final
+
+
+def get_view_for_testing(kind: FractalKind, k_max: int, use_interior_checks: bool = False) -> FractalView:
+    re_min_max: Final = (-1.5, 1.5) if kind == FractalKind.julia else (-2.25, .75)
+    return FractalView(kind, re_min_max, (-1.5, 1.5), (40, 30), 100., k_max, complex(-.39054, -.58679),
+                       use_interior_checks)
+
+
+class Test_continue_escape_iterations(unittest.TestCase):
+
+    def test_GivenSeveralIncreasingKMax_When_continue_escape_iterations_ThenResultIsTheSameAsInOneGo(self):
+        c: Final = (np.linspace(-2., .5, 101) + .25j).astype(np.complex128)
+        state: Final = EscapeTimeState(0j, c, 100., 1e-12)
+        for k_max in 3, 10, 64, 300:
+            continue_escape_iterations(state, k_max)
+            np.testing.assert_array_equal(state.get_iterations(), get_escape_iterations(0j, c, 100., k_max, 1e-12))
+
+
+class Test_DeepeningRenderer(unittest.TestCase):
+
+    def test_GivenALargerKMax_When_get_iterations_ThenResultIsTheSameAsFromScratch(self):
+        for kind in FractalKind:
+            for use_interior_checks in False, True:
+                renderer = DeepeningRenderer()
+                for k_max in 16, 64, 256:
+                    view = get_view_for_testing(kind, k_max, use_interior_checks)
+                    np.testing.assert_array_equal(renderer.get_iterations(view), view.get_iterations())
+
+    def test_GivenALargerKMax_When_get_iterations_ThenOnlyTheUnfinishedPixelsAreResumed(self):
+        renderer: Final = DeepeningRenderer()
+        iterations: Final = renderer.get_iterations(get_view_for_testing(FractalKind.mandelbrot, 16))
+        self.assertEqual(renderer.num_resumed_pixels, 0)
+        renderer.get_iterations(get_view_for_testing(FractalKind.mandelbrot, 64))
+        self.assertEqual(renderer.num_resumed_pixels, np.count_nonzero(iterations == 0))
+
+    def test_GivenASmallerKMaxOrAnotherView_When_get_iterations_ThenStartFromScratch(self):
+        renderer: Final = DeepeningRenderer()
+        renderer.get_iterations(get_view_for_testing(FractalKind.mandelbrot, 64))
+        view: Final = get_view_for_testing(FractalKind.mandelbrot, 16)
+        np.testing.assert_array_equal(renderer.get_iterations(view), view.get_iterations())
+        self.assertEqual(renderer.num_resumed_pixels, 0)
+        renderer.get_iterations(get_view_for_testing(FractalKind.julia, 64))
+        self.assertEqual(renderer.num_resumed_pixels, 0)
+
+    def test_GivenBands_When_generate_iterations_ThenYieldTheResumedBandsInOrder(self):
+        renderer: Final = DeepeningRenderer()
+        first: Final = renderer.get_iterations(get_view_for_testing(FractalKind.mandelbrot, 16), 8)
+        view: Final = get_view_for_testing(FractalKind.mandelbrot, 64)
+        bands: Final = list(renderer.generate_iterations(view, 8))
+        self.assertEqual([tile for tile, _ in bands], [(0, 8, 0, 40), (8, 16, 0, 40), (16, 24, 0, 40), (24, 30, 0, 40)])
+        np.testing.assert_array_equal(np.concatenate([iterations for _, iterations in bands]), view.get_iterations())
+        self.assertEqual(renderer.num_resumed_pixels, np.count_nonzero(first == 0))
+        self.assertTrue(renderer.can_resume(get_view_for_testing(FractalKind.mandelbrot, 256), 8))
+        self.assertFalse(renderer.can_resume(get_view_for_testing(FractalKind.mandelbrot, 256)))
+
+
+if __name__ == '__main__':
+    unittest.main()
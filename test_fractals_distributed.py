@@ -0,0 +1,131 @@
+"""
+Run the tests by executing, for all test classes:
+
+  $ python -m unittest -v test_fractals_distributed.py
+  or
+  $ python test_fractals_distributed.py
+"""
+
+import multiprocessing
+import numpy as np
+import os
+import socket
+import tempfile
+import threading
+import unittest
+
+from fractals_distributed import Coordinator, get_view_from_message, get_view_message, parse_address, \
+    protocol_version, receive_message, run_worker, send_message
+from fractals_engine import FractalKind, FractalView, KernelBackend
+from fractals_precision import ArbitraryPrecisionView
+from typing import Final
+
+
+def get_view_for_testing() -> FractalView:
+    return FractalView(FractalKind.mandelbrot, (-2.25, .75), (-1.5, 1.5), (96, 72), 100., 64)
+
+
+def run_faulty_worker(address: tuple[str, int], got_a_tile: threading.Event, hangs: bool = False) -> None:
+    """Takes a tile and then disconnects (a crash) or stays silent (a hang, until the coordinator gives up)."""
+    with socket.create_connection(address) as connection:
+        send_message(connection, {'type': 'hello', 'version': protocol_version})
+        header, _ = receive_message(connection)
+        assert header['type'] == 'tile'
+        got_a_tile.set()
+        if hangs:
+            connection.settimeout(10.)
+            try:
+                receive_message(connection)
+            except (OSError, ValueError):
+                pass
+
+
+class Test_messages(unittest.TestCase):
+
+    def test_GivenAMessage_When_send_message_ThenReceiveTheSameHeaderAndPayload(self):
+        first, second = socket.socketpair()
+        with first, second:
+            send_message(first, {'type': 'result', 'tile': [0, 2, 0, 3]}, bytes(range(24)))
+            self.assertEqual(receive_message(second), ({'type': 'result', 'tile': [0, 2, 0, 3]}, bytes(range(24))))
+            first.close()
+            self.assertRaises(ConnectionError, receive_message, second)
+
+    def test_GivenAView_When_get_view_message_ThenGetTheSameViewBack(self):
+        view: Final = FractalView(FractalKind.julia, (-1.5, 1.5), (-1., 1.), (30, 20), 4., 99, complex(-.8, .156),
+                                  True, KernelBackend.pure)
+        received: Final = get_view_from_message(get_view_message(view))
+        self.assertEqual(received.__dict__, view.__dict__)
+
+    def test_GivenAddresses_When_parse_address_ThenReturnTheHostAndPortOrRaiseValueError(self):
+        self.assertEqual(parse_address('localhost:5555'), ('localhost', 5555))
+        self.assertEqual(parse_address('::1:5555'), ('::1', 5555))
+        for address in 'localhost', ':5555', 'localhost:port':
+            with self.subTest(address=address):
+                self.assertRaises(ValueError, parse_address, address)
+
+
+class Test_Coordinator(unittest.TestCase):
+
+    def setUp(self):
+        self.view = get_view_for_testing()
+        self.expected_iterations = self.view.get_iterations()
+
+    def test_GivenWorkerProcesses_When_run_ThenAssembleTheIterationsOfTheView(self):
+        coordinator: Final = Coordinator(self.view, tile_shape=(16, 32))
+        with multiprocessing.Pool(3) as pool:
+            num_tiles = pool.starmap_async(run_worker, [(coordinator.address,)] * 3)
+            np.testing.assert_array_equal(coordinator.run(), self.expected_iterations)
+            self.assertEqual(sum(num_tiles.get(timeout=30)), 5 * 3)
+        self.assertEqual(coordinator.num_workers, 3)
+        self.assertEqual(coordinator.num_requeued, 0)
+
+    def test_GivenAnIterationsPath_When_run_ThenAssembleTheIterationsIntoThatNpyFile(self):
+        with tempfile.TemporaryDirectory() as directory:
+            path = os.path.join(directory, 'iterations.npy')
+            coordinator = Coordinator(self.view, tile_shape=(16, 32), iterations_path=path)
+            worker = threading.Thread(target=run_worker, args=(coordinator.address,))
+            worker.start()
+            iterations = coordinator.run()
+            worker.join()
+            self.assertIsInstance(iterations, np.memmap)
+            del iterations, coordinator  # closes the memory map
+            np.testing.assert_array_equal(np.load(path), self.expected_iterations)
+
+    def test_GivenAWorkerThatFails_When_run_ThenRequeueItsTileForAnother(self):
+        for hangs in False, True:
+            with self.subTest(hangs=hangs):
+                coordinator = Coordinator(self.view, tile_shape=(16, 32), task_timeout=.5)
+                got_a_tile = threading.Event()
+                faulty_worker = threading.Thread(target=run_faulty_worker,
+                                                 args=(coordinator.address, got_a_tile, hangs))
+                faulty_worker.start()
+                results = []
+                running = threading.Thread(target=lambda: results.append(coordinator.run()))
+                running.start()
+                self.assertTrue(got_a_tile.wait(10.))
+                self.assertEqual(run_worker(coordinator.address), 15)
+                running.join()
+                faulty_worker.join()
+                np.testing.assert_array_equal(results[0], self.expected_iterations)
+                self.assertEqual(coordinator.num_requeued, 1)
+
+    def test_GivenATileThatFailsEveryTime_When_run_ThenRaiseRuntimeError(self):
+        coordinator: Final = Coordinator(self.view, tile_shape=(16, 32), max_attempts=2)
+
+        def run_faulty_workers():
+            for _ in range(2):
+                run_faulty_worker(coordinator.address, threading.Event())
+
+        faulty_workers: Final = threading.Thread(target=run_faulty_workers)
+        faulty_workers.start()
+        self.assertRaises(RuntimeError, coordinator.run)
+        faulty_workers.join()
+
+    def test_GivenInvalidParameters_When_Coordinator_ThenRaiseValueError(self):
+        self.assertRaises(ValueError, Coordinator, ArbitraryPrecisionView(self.view))
+        self.assertRaises(ValueError, Coordinator, self.view, task_timeout=0.)
+        self.assertRaises(ValueError, Coordinator, self.view, max_attempts=0)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,207 @@
+"""
+Run the tests by executing, for all test classes:
+
+  $ python -m unittest -v test_fractals_engine.py
+  or
+  $ python test_fractals_engine.py
+"""
+
+import numpy as np
+import pickle
+import unittest
+
+from fractals_engine import CancellationToken, FractalKind, FractalView, KernelBackend, \
+    default_periodicity_tolerance, generate_progressive_iterations, get_available_kernel_backends, \
+    get_escape_iterations, get_escape_iterations_of_point, get_int_colors, get_kernel, get_kernel_backend, \
+    is_in_main_cardioid_or_period_2_bulb
+from typing import Final
+from unittest import mock
+
+
+def get_julia_view_for_testing(res_xy: tuple[int, int] = (40, 30), k_max: int = 64) -> FractalView:
+    return FractalView(FractalKind.julia, (-1.5, 1.5), (-1.5, 1.5), res_xy, 100., k_max, complex(-.39054, -.58679))
+
+
+def get_mandelbrot_view_for_testing(res_xy: tuple[int, int] = (40, 30), k_max: int = 64) -> FractalView:
+    return FractalView(FractalKind.mandelbrot, (-2.25, .75), (-1.5, 1.5), res_xy, 100., k_max)
+
+
+def get_iterations_point_by_point(view: FractalView) -> np.ndarray:
+    grid: Final = view.get_grid()
+    result: Final = np.zeros(grid.shape, dtype=np.int32)
+    for (j, i), point in np.ndenumerate(grid):
+        z_0, c = (complex(point), view.c) if view.kind == FractalKind.julia else (0j, complex(point))
+        result[j, i] = get_escape_iterations_of_point(z_0, c, view.magnitude, view.k_max)
+    return result
+
+
+class Test_get_escape_iterations(unittest.TestCase):
+
+    def test_GivenAnInteriorPoint_When_get_escape_iterations_of_point_ThenReturn0(self):
+        self.assertEqual(get_escape_iterations_of_point(0j, -.1 + .1j, 100., 50), 0)
+
+    def test_GivenAPointEscapingAtTheFirstIteration_When_get_escape_iterations_of_point_ThenReturn1(self):
+        self.assertEqual(get_escape_iterations_of_point(0j, 20 + 0j, 100., 50), 1)
+
+    def test_GivenAMandelbrotView_When_get_iterations_ThenReturnTheSameAsPointByPoint(self):
+        view: Final = get_mandelbrot_view_for_testing()
+        np.testing.assert_array_equal(view.get_iterations(), get_iterations_point_by_point(view))
+
+    def test_GivenAJuliaView_When_get_iterations_ThenReturnTheSameAsPointByPoint(self):
+        view: Final = get_julia_view_for_testing()
+        np.testing.assert_array_equal(view.get_iterations(), get_iterations_point_by_point(view))
+
+    def test_GivenArraysOfZ0AndC_When_get_escape_iterations_ThenTheyAreBroadcast(self):
+        z_0: Final = np.array([0j, .5j])
+        c: Final = np.array([[-.1 + .1j], [2 + 2j]])
+        result: Final = get_escape_iterations(z_0, c, 4., 20)
+        self.assertEqual(result.shape, (2, 2))
+        self.assertEqual(result[1, 0], get_escape_iterations_of_point(0j, 2 + 2j, 4., 20))
+
+    def test_GivenFloat32_When_get_escape_iterations_ThenTheOrbitsAreRoundedToFloat32(self):
+        c: Final = np.array([.25 + 1e-8, -.1 + .1j, 2 + 2j])  # .25 + 1e-8 escapes (slowly), but in float32 it is .25
+        float64_iterations: Final = get_escape_iterations(0j, c, 4., 100_000)
+        float32_iterations: Final = get_escape_iterations(0j, c, 4., 100_000, dtype=np.float32)
+        self.assertGreater(float64_iterations[0], 0)
+        self.assertEqual(float32_iterations[0], 0)
+        np.testing.assert_array_equal(float32_iterations[1:], float64_iterations[1:])
+
+
+class Test_interior_checks(unittest.TestCase):
+
+    def test_GivenPointsInsideAndOutside_When_is_in_main_cardioid_or_period_2_bulb_ThenTellThemApart(self):
+        self.assertTrue(is_in_main_cardioid_or_period_2_bulb(0., 0.))
+        self.assertTrue(is_in_main_cardioid_or_period_2_bulb(-1., .1))
+        self.assertFalse(is_in_main_cardioid_or_period_2_bulb(.3, 0.))
+        self.assertFalse(is_in_main_cardioid_or_period_2_bulb(-.75, .2))
+        result: Final = is_in_main_cardioid_or_period_2_bulb(np.array([0., .3]), np.array([0., 0.]))
+        np.testing.assert_array_equal(result, [True, False])
+
+    def test_GivenAnAttractingCycle_When_get_escape_iterations_of_point_WithPeriodicity_ThenStopBeforeKMax(self):
+        c: Final = complex(-.12, .75)  # in the period-3 bulb, out of the cardioid and the period-2 bulb
+        huge_k_max: Final = 10**9  # it would take ages to reach it
+        self.assertEqual(get_escape_iterations_of_point(0j, c, 100., huge_k_max, default_periodicity_tolerance), 0)
+
+    def test_GivenAMandelbrotView_When_get_iterations_WithInteriorChecks_ThenReturnTheSameAsWithout(self):
+        view: Final = get_mandelbrot_view_for_testing((64, 48), 512)
+        view_with_checks: Final = FractalView(view.kind, view.re_min_max, view.im_min_max, view.res_xy, view.magnitude,
+                                              view.k_max, use_interior_checks=True)
+        np.testing.assert_array_equal(view_with_checks.get_iterations(), view.get_iterations())
+
+    def test_GivenPoints_When_get_escape_iterations_WithPeriodicity_ThenReturnTheSameAsPointByPoint(self):
+        c: Final = get_mandelbrot_view_for_testing((32, 24), 256).get_grid()
+        expected: Final = [[get_escape_iterations_of_point(0j, complex(point), 100., 256, default_periodicity_tolerance)
+                            for point in row] for row in c]
+        np.testing.assert_array_equal(get_escape_iterations(0j, c, 100., 256, default_periodicity_tolerance), expected)
+
+
+class Test_get_int_colors(unittest.TestCase):
+
+    def test_GivenIterations_When_get_int_colors_ThenReturnKModuloNumColorsPlus1Or0(self):
+        iterations: Final = np.array([[0, 1, 16, 17]], dtype=np.int32)
+        np.testing.assert_array_equal(get_int_colors(iterations, 16), [[0, 2, 1, 2]])
+
+
+class Test_FractalView(unittest.TestCase):
+
+    def test_GivenAResolutionLessThan2_When_FractalView_ThenExceptionIsRaised(self):
+        self.assertRaises(ValueError, get_julia_view_for_testing, (1, 30))
+
+    def test_GivenANonPositiveKMax_When_FractalView_ThenExceptionIsRaised(self):
+        self.assertRaises(ValueError, get_julia_view_for_testing, (40, 30), 0)
+
+    def test_GivenAView_When_get_grid_ThenCornersMatchTheRanges(self):
+        grid: Final = get_mandelbrot_view_for_testing().get_grid()
+        self.assertEqual(grid[0, 0], complex(-2.25, 1.5))
+        self.assertAlmostEqual(grid[-1, -1], complex(.75, -1.5))
+
+    def test_GivenAView_When_get_iterations_OfATile_ThenReturnTheCorrespondingSlice(self):
+        view: Final = get_julia_view_for_testing()
+        np.testing.assert_array_equal(view.get_iterations(5, 17, 3, 29), view.get_iterations()[5:17, 3:29])
+
+    def test_GivenAView_When_pickled_ThenTheUnpickledViewIsEqual(self):
+        view: Final = get_julia_view_for_testing()
+        unpickled: Final = pickle.loads(pickle.dumps(view))
+        self.assertEqual((str(unpickled), unpickled.__dict__), (str(view), view.__dict__))
+
+
+class Test_KernelBackend(unittest.TestCase):
+    """Conformance test: all the available backends must return exactly the iteration counts of the pure one."""
+
+    def test_GivenTheBackends_When_get_available_kernel_backends_ThenPureAndNumpyAreAlwaysThere(self):
+        self.assertEqual(get_available_kernel_backends()[:2], (KernelBackend.pure, KernelBackend.numpy))
+
+    def test_GivenAutoOrNone_When_get_kernel_backend_ThenReturnTheLastAvailableOne(self):
+        for name in 'auto', None:
+            self.assertEqual(get_kernel_backend(name), get_available_kernel_backends()[-1])
+
+    def test_GivenAName_When_get_kernel_backend_ThenReturnItsBackend(self):
+        self.assertEqual(get_kernel_backend('pure'), KernelBackend.pure)
+
+    def test_GivenAnUnknownName_When_get_kernel_backend_ThenRaiseValueError(self):
+        self.assertRaises(ValueError, get_kernel_backend, 'fortran')
+
+    def test_GivenAnUnavailableBackend_When_get_kernel_backend_ThenRaiseValueError(self):
+        with mock.patch('fractals_engine.get_escape_iterations_jit', None):
+            self.assertRaises(ValueError, get_kernel_backend, 'jit')
+            self.assertRaises(ValueError, FractalView, FractalKind.mandelbrot, (-2.25, .75), (-1.5, 1.5), (4, 4), 100.,
+                              16, kernel_backend=KernelBackend.jit)
+
+    def test_GivenPointsAndTolerances_When_get_kernel_ThenAllTheBackendsAgree(self):
+        rng: Final = np.random.default_rng(16)
+        c: Final = (rng.uniform(-2.25, .75, (12, 10)) + 1j * rng.uniform(-1.5, 1.5, (12, 10))).astype(np.complex128)
+        for tolerance in 0., default_periodicity_tolerance:
+            expected = get_kernel(KernelBackend.pure)(0j, c, 100., 256, tolerance)
+            for backend in get_available_kernel_backends():
+                with self.subTest(backend=backend, tolerance=tolerance):
+                    np.testing.assert_array_equal(get_kernel(backend)(0j, c, 100., 256, tolerance), expected)
+                    np.testing.assert_array_equal(get_kernel(backend)(c, -.8 + .156j, 100., 256, tolerance),
+                                                  get_kernel(KernelBackend.pure)(c, -.8 + .156j, 100., 256, tolerance))
+
+    def test_GivenViews_When_get_iterations_ThenAllTheBackendsAgree(self):
+        for view in get_julia_view_for_testing(), get_mandelbrot_view_for_testing():
+            for use_interior_checks in False, True:
+                views = [FractalView(view.kind, view.re_min_max, view.im_min_max, view.res_xy, view.magnitude,
+                                     view.k_max, view.c, use_interior_checks, backend)
+                         for backend in get_available_kernel_backends()]
+                expected = views[0].get_iterations()
+                for backend_view in views[1:]:
+                    with self.subTest(view=str(view), use_interior_checks=use_interior_checks,
+                                      backend=backend_view.kernel_backend):
+                        np.testing.assert_array_equal(backend_view.get_iterations(), expected)
+
+
+class Test_generate_progressive_iterations(unittest.TestCase):
+
+    def test_GivenAView_When_generate_progressive_iterations_ThenYieldCoarseToFinePreviewsEndingInTheFullImage(self):
+        view: Final = get_mandelbrot_view_for_testing((37, 29))
+        steps_and_previews: Final = list(generate_progressive_iterations(view))
+        self.assertEqual([step for step, _ in steps_and_previews], [8, 4, 2, 1])
+        for _, preview in steps_and_previews:
+            self.assertEqual(preview.shape, (29, 37))
+        np.testing.assert_array_equal(steps_and_previews[-1][1], view.get_iterations())
+
+    def test_GivenAView_When_generate_progressive_iterations_ThenEachPixelIsComputedOnce(self):
+        view: Final = get_julia_view_for_testing((37, 29))
+        with mock.patch.object(FractalView, 'get_iterations_of_points', autospec=True,
+                               side_effect=FractalView.get_iterations_of_points) as get_iterations_of_points:
+            for _ in generate_progressive_iterations(view):
+                pass
+        num_points: Final = sum(call.args[1].size for call in get_iterations_of_points.call_args_list)
+        self.assertEqual(num_points, 37*29)
+
+    def test_GivenACancelledToken_When_generate_progressive_iterations_ThenStopYielding(self):
+        token: Final = CancellationToken()
+        steps: Final = []
+        for step, _ in generate_progressive_iterations(get_julia_view_for_testing(), token.is_cancelled):
+            steps.append(step)
+            token.cancel()
+        self.assertEqual(steps, [8])
+
+    def test_GivenStepsThatAreNotSuccessiveDivisors_When_generate_progressive_iterations_ThenExceptionIsRaised(self):
+        generator: Final = generate_progressive_iterations(get_julia_view_for_testing(), steps=(8, 3, 1))
+        self.assertRaises(ValueError, next, generator)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,30 @@
+"""
+Run the tests by executing, for all test classes:
+
+  $ python -m unittest -v test_fractals_io.py
+  or
+  $ python test_fractals_io.py
+"""
+
+import json
+import os
+import tempfile
+import unittest
+
+from fractals_io import save_json_atomically
+
+
+class Test_save_json_atomically(unittest.TestCase):
+
+    def test_GivenAnExistingFile_When_save_json_atomically_ThenReplaceItWithoutLeavingATemporaryFile(self):
+        with tempfile.TemporaryDirectory() as directory:
+            path = os.path.join(directory, 'progress.json')
+            save_json_atomically(path, {'next_row': 1})
+            save_json_atomically(path, {'next_row': 2})
+            with open(path) as file:
+                self.assertEqual(json.load(file), {'next_row': 2})
+            self.assertEqual(os.listdir(directory), ['progress.json'])
+
+
+if __name__ == '__main__':
+    unittest.main()
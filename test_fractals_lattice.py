@@ -0,0 +1,85 @@
+"""
+Run the tests by executing, for all test classes:
+
+  $ python -m unittest -v test_fractals_lattice.py
+  or
+  $ python test_fractals_lattice.py
+"""
+
+import numpy as np
+import unittest
+
+from fractals_engine import FractalKind, FractalView
+from fractals_lattice import LatticeRenderer, get_zoomed_view
+from typing import Final
+
+
+def get_views_for_testing(res_xy: tuple[int, int] = (129, 97), k_max: int = 64) -> tuple[FractalView, ...]:
+    return (FractalView(FractalKind.mandelbrot, (-2.25, .75), (-1.5, 1.5), res_xy, 100., k_max),
+            FractalView(FractalKind.julia, (-1.5, 1.5), (-1.5, 1.5), res_xy, 100., k_max, complex(-.39054, -.58679)))
+
+
+class Test_LatticeRenderer(unittest.TestCase):
+
+    def test_GivenZoomsAndPans_When_get_iterations_ThenReturnTheSameAsAFullRender(self):
+        for view in get_views_for_testing():
+            with self.subTest(view=str(view)):
+                renderer = LatticeRenderer()
+                for i, j, factor in (40, 50, 2), (60, 30, 3), (64, 48, 2), (70, 41, 1), (0, 0, 2):
+                    np.testing.assert_array_equal(renderer.get_iterations(view), view.get_iterations())
+                    view = get_zoomed_view(view, i, j, factor)
+                np.testing.assert_array_equal(renderer.get_iterations(view), view.get_iterations())
+
+    def test_GivenAZoomIn2x_When_get_iterations_ThenReuseAQuarterOfThePixels(self):
+        for res_xy, expected_reused_pixels in ((129, 97), 65 * 49), ((128, 96), 64 * 48):
+            with self.subTest(res_xy=res_xy):
+                view = get_views_for_testing(res_xy)[0]
+                renderer = LatticeRenderer()
+                renderer.get_iterations(view)
+                self.assertEqual(renderer.num_reused_pixels, 0)
+                renderer.get_iterations(get_zoomed_view(view, 64, 48, 2))
+                self.assertEqual(renderer.num_reused_pixels, expected_reused_pixels)
+
+    def test_GivenAPanByWholePixels_When_get_iterations_ThenReuseTheOverlap(self):
+        view: Final = get_views_for_testing()[1]
+        renderer: Final = LatticeRenderer()
+        renderer.get_iterations(view)
+        renderer.get_iterations(get_zoomed_view(view, 64 + 5, 48 - 3, 1))
+        self.assertEqual(renderer.num_reused_pixels, (129 - 5) * (97 - 3))
+
+    def test_GivenBands_When_generate_iterations_ThenYieldThemInOrderAndReuseTheSamePixels(self):
+        view: Final = get_views_for_testing()[0]
+        zoomed_view: Final = get_zoomed_view(view, 64, 48, 2)
+        renderer: Final = LatticeRenderer()
+        renderer.get_iterations(view)
+        bands: Final = list(renderer.generate_iterations(zoomed_view, 16))
+        self.assertEqual([tile for tile, _ in bands], [(j_0, min(j_0 + 16, 97), 0, 129) for j_0 in range(0, 97, 16)])
+        np.testing.assert_array_equal(np.vstack([iterations for _, iterations in bands]), zoomed_view.get_iterations())
+        self.assertEqual(renderer.num_reused_pixels, 65 * 49)
+        renderer.get_iterations(get_zoomed_view(zoomed_view, 64, 48, 2))
+        self.assertEqual(renderer.num_reused_pixels, 65 * 49)
+
+    def test_GivenAnotherKMaxOrKind_When_get_iterations_ThenReuseNothing(self):
+        mandelbrot, julia = get_views_for_testing()
+        renderer: Final = LatticeRenderer()
+        renderer.get_iterations(mandelbrot)
+        np.testing.assert_array_equal(renderer.get_iterations(julia), julia.get_iterations())
+        self.assertEqual(renderer.num_reused_pixels, 0)
+        deeper: Final = get_views_for_testing(k_max=128)[1]
+        np.testing.assert_array_equal(renderer.get_iterations(deeper), deeper.get_iterations())
+        self.assertEqual(renderer.num_reused_pixels, 0)
+
+    def test_GivenAClearedRenderer_When_get_iterations_ThenReuseNothing(self):
+        view: Final = get_views_for_testing()[0]
+        renderer: Final = LatticeRenderer()
+        renderer.get_iterations(view)
+        renderer.clear()
+        renderer.get_iterations(view)
+        self.assertEqual(renderer.num_reused_pixels, 0)
+
+    def test_GivenAFactorBelow1_When_get_zoomed_view_ThenRaiseValueError(self):
+        self.assertRaises(ValueError, get_zoomed_view, get_views_for_testing()[0], 64, 48, 0)
+
+
+if __name__ == '__main__':
+    unittest.main()
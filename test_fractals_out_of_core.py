@@ -0,0 +1,137 @@
+"""
+Run the tests by executing, for all test classes:
+
+  $ python -m unittest -v test_fractals_out_of_core.py
+  or
+  $ python test_fractals_out_of_core.py
+"""
+
+import numpy as np
+import os
+import struct
+import tempfile
+import unittest
+import zlib
+
+from fractals_colors import colorize, generate_rgb_palette
+from fractals_engine import FractalKind, FractalView
+from fractals_out_of_core import generate_bands, get_band_iterations, get_progress_path, render_out_of_core, \
+    write_out_of_core
+from typing import Final
+from unittest import mock
+
+
+def get_view_for_testing() -> FractalView:
+    return FractalView(FractalKind.mandelbrot, (-2.25, .75), (-1.5, 1.5), (50, 40), 100., 64)
+
+
+def read_png(path: str) -> np.ndarray:
+    """Decodes the (unfiltered, 8-bit RGB) PNG files written by `render_out_of_core`."""
+    with open(path, 'rb') as file:
+        png: Final = file.read()
+    offset = 8
+    width = height = 0
+    idat: Final = bytearray()
+    while offset < len(png):
+        length, chunk_type = struct.unpack('>I4s', png[offset:offset + 8])
+        data = png[offset + 8:offset + 8 + length]
+        assert struct.unpack('>I', png[offset + 8 + length:offset + 12 + length])[0] == zlib.crc32(chunk_type + data)
+        if chunk_type == b'IHDR':
+            width, height = struct.unpack('>II', data[:8])
+        elif chunk_type == b'IDAT':
+            idat.extend(data)
+        offset += 12 + length
+    rows: Final = np.frombuffer(zlib.decompress(bytes(idat)), dtype=np.uint8).reshape(height, 1 + 3*width)
+    assert (rows[:, 0] == 0).all()
+    return rows[:, 1:].reshape(height, width, 3)
+
+
+def read_ppm(path: str, width: int, height: int) -> np.ndarray:
+    with open(path, 'rb') as file:
+        ppm: Final = file.read()
+    header: Final = f'P6\n{width} {height}\n255\n'.encode('ascii')
+    assert ppm.startswith(header)
+    return np.frombuffer(ppm[len(header):], dtype=np.uint8).reshape(height, width, 3)
+
+
+class Interruption(Exception):
+    pass
+
+
+class Test_render_out_of_core(unittest.TestCase):
+
+    def setUp(self):
+        self.view = get_view_for_testing()
+        self.rgb_palette = generate_rgb_palette(64, 7, 1, 1)
+        self.expected_iterations = self.view.get_iterations()
+        self.directory = tempfile.TemporaryDirectory()
+
+    def tearDown(self):
+        self.directory.cleanup()
+
+    def get_path(self, extension: str) -> str:
+        return os.path.join(self.directory.name, f'image{extension}')
+
+    def check_file(self, path: str) -> None:
+        expected_image: Final = colorize(self.expected_iterations, self.rgb_palette)
+        if path.endswith('.npy'):
+            np.testing.assert_array_equal(np.load(path), self.expected_iterations)
+        elif path.endswith('.png'):
+            np.testing.assert_array_equal(read_png(path), expected_image)
+        else:
+            np.testing.assert_array_equal(read_ppm(path, *self.view.res_xy), expected_image)
+        self.assertFalse(os.path.exists(get_progress_path(path)))
+
+    def test_GivenTheFormats_When_render_out_of_core_ThenWriteTheWholeImage(self):
+        for extension in '.npy', '.png', '.ppm':
+            for num_workers in 1, 2:
+                with self.subTest(extension=extension, num_workers=num_workers):
+                    path = self.get_path(extension)
+                    self.assertEqual(render_out_of_core(self.view, path, self.rgb_palette, num_workers, 7), 40)
+                    self.check_file(path)
+
+    def test_GivenAnInterruptedRender_When_render_out_of_core_ThenResumeFromTheLastFinishedBand(self):
+        for extension in '.npy', '.png', '.ppm':
+            with self.subTest(extension=extension):
+                path = self.get_path(extension)
+                calls = []
+
+                def get_band_iterations_until_interrupted(view, j_0, j_1):
+                    calls.append(j_0)
+                    if len(calls) == 3:
+                        raise Interruption
+                    return get_band_iterations(view, j_0, j_1)
+
+                with mock.patch('fractals_out_of_core.get_band_iterations', get_band_iterations_until_interrupted):
+                    self.assertRaises(Interruption, render_out_of_core, self.view, path, self.rgb_palette, 1, 7)
+                self.assertTrue(os.path.exists(get_progress_path(path)))
+                self.assertEqual(render_out_of_core(self.view, path, self.rgb_palette, 1, 7), 40 - 14)
+                self.check_file(path)
+
+    def test_GivenAnInterruptedRenderOfOtherParameters_When_render_out_of_core_ThenStartOver(self):
+        path: Final = self.get_path('.png')
+        with mock.patch('fractals_out_of_core.get_band_iterations', side_effect=Interruption):
+            self.assertRaises(Interruption, render_out_of_core, self.view, path, generate_rgb_palette(16, 3, 1, 1), 1,
+                              7)
+        self.assertEqual(render_out_of_core(self.view, path, self.rgb_palette, 1, 7), 40)
+        self.check_file(path)
+
+    def test_GivenAnImageWithoutPalette_When_render_out_of_core_ThenRaiseValueError(self):
+        self.assertRaises(ValueError, render_out_of_core, self.view, self.get_path('.png'))
+
+    def test_GivenComputedIterations_When_write_out_of_core_ThenWriteTheSameFilesAsRenderOutOfCore(self):
+        for extension in '.npy', '.png', '.ppm':
+            with self.subTest(extension=extension):
+                path = self.get_path(extension)
+                write_out_of_core(self.view, self.expected_iterations, path, self.rgb_palette, 7)
+                self.check_file(path)
+
+    def test_GivenAFirstRow_When_generate_bands_ThenYieldTheFollowingBandsInOrder(self):
+        bands: Final = list(generate_bands(self.view, 10, 8, 2))
+        self.assertEqual([j_0 for j_0, _ in bands], [10, 18, 26, 34])
+        np.testing.assert_array_equal(np.concatenate([iterations for _, iterations in bands]),
+                                      self.expected_iterations[10:])
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,72 @@
+"""
+Run the tests by executing, for all test classes:
+
+  $ python -m unittest -v test_fractals_parallel.py
+  or
+  $ python test_fractals_parallel.py
+"""
+
+import multiprocessing
+import numpy as np
+import unittest
+
+from fractals_engine import FractalKind, FractalView, get_tiles
+from fractals_parallel import generate_iterations_in_parallel, generate_results_in_order, get_iterations_in_parallel
+from typing import Final
+
+
+class Test_get_tiles(unittest.TestCase):
+
+    def test_GivenAnImage_When_get_tiles_ThenTheTilesCoverItExactlyOnce(self):
+        covered: Final = np.zeros((30, 40), dtype=np.int32)
+        for j_0, j_1, i_0, i_1 in get_tiles((40, 30), (7, 16)):
+            covered[j_0:j_1, i_0:i_1] += 1
+        self.assertTrue((covered == 1).all())
+
+    def test_GivenAnEmptyTileShape_When_get_tiles_ThenExceptionIsRaised(self):
+        self.assertRaises(ValueError, get_tiles, (40, 30), (0, 16))
+
+
+class Test_get_iterations_in_parallel(unittest.TestCase):
+
+    def test_GivenAJuliaViewAnd3Workers_When_get_iterations_in_parallel_ThenReturnTheSameAsSerially(self):
+        view: Final = FractalView(FractalKind.julia, (-1.5, 1.5), (-1.5, 1.5), (300, 260), 100., 64,
+                                  complex(-.39054, -.58679))
+        np.testing.assert_array_equal(get_iterations_in_parallel(view, 3, (7, 50)), view.get_iterations())
+
+    def test_GivenAMandelbrotViewAnd2Workers_When_get_iterations_in_parallel_ThenReturnTheSameAsSerially(self):
+        view: Final = FractalView(FractalKind.mandelbrot, (-2.25, .75), (-1.5, 1.5), (300, 260), 100., 64)
+        np.testing.assert_array_equal(get_iterations_in_parallel(view, 2), view.get_iterations())
+
+    def test_GivenZeroWorkers_When_get_iterations_in_parallel_ThenExceptionIsRaised(self):
+        view: Final = FractalView(FractalKind.mandelbrot, (-2.25, .75), (-1.5, 1.5), (30, 20), 100., 64)
+        self.assertRaises(ValueError, get_iterations_in_parallel, view, 0)
+
+
+class Test_generate_iterations_in_parallel(unittest.TestCase):
+
+    def test_GivenAnAbandonedGenerator_When_close_ThenTheWorkersAreGone(self):
+        view: Final = FractalView(FractalKind.mandelbrot, (-2.25, .75), (-1.5, 1.5), (300, 260), 100., 64)
+        tiles: Final = generate_iterations_in_parallel(view, 2)
+        (j_0, j_1, i_0, i_1), tile_iterations = next(tiles)
+        np.testing.assert_array_equal(tile_iterations, view.get_iterations(j_0, j_1, i_0, i_1))
+        tiles.close()
+        self.assertEqual(multiprocessing.active_children(), [])
+
+
+class Test_generate_results_in_order(unittest.TestCase):
+
+    def test_GivenCallsAndWorkers_When_generate_results_in_order_ThenYieldTheResultsInTheOrderOfTheCalls(self):
+        arguments: Final = [(n, 7) for n in range(30, 0, -1)]
+        for num_workers in 1, 3:
+            with self.subTest(num_workers=num_workers):
+                self.assertEqual(list(generate_results_in_order(divmod, arguments, num_workers)),
+                                 [divmod(n, 7) for n in range(30, 0, -1)])
+        self.assertEqual(multiprocessing.active_children(), [])
+
+    def test_GivenZeroWorkers_When_generate_results_in_order_ThenExceptionIsRaised(self):
+        self.assertRaises(ValueError, list, generate_results_in_order(divmod, [(1, 2)], 0))
+
+
+if __name__ == '__main__':
+    unittest.main()
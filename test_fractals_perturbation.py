@@ -0,0 +1,89 @@
+"""
+Run the tests by executing, for all test classes:
+
+  $ python -m unittest -v test_fractals_perturbation.py
+  or
+  $ python test_fractals_perturbation.py
+"""
+
+import decimal
+import numpy as np
+import unittest
+
+from decimal import Decimal
+from fractals_engine import FractalKind, FractalView
+from fractals_perturbation import DeepZoomView, generate_iterations_by_perturbation, get_deep_zoom_view, \
+    get_iterations_by_perturbation
+from typing import Final
+
+deep_center_re: Final = '-0.745522156517920470911502456571581626577'
+deep_center_im: Final = '0.094573654491167108596216750120378552379'
+
+
+def get_escape_iterations_in_decimal(c_re: Decimal, c_im: Decimal, magnitude: float, k_max: int) -> int:
+    with decimal.localcontext() as context:
+        context.prec = 60
+        x, y = Decimal(0), Decimal(0)
+        for k in range(1, k_max + 1):
+            x, y = x * x - y * y + c_re, 2 * x * y + c_im
+            if x * x + y * y > magnitude:
+                return k
+    return 0
+
+
+class Test_DeepZoomView(unittest.TestCase):
+
+    def test_GivenInvalidParameters_When_DeepZoomView_ThenExceptionIsRaised(self):
+        self.assertRaises(ValueError, DeepZoomView, 'x', '0', 1., (8, 8), 100., 16)
+        self.assertRaises(ValueError, DeepZoomView, '0', '0', 0., (8, 8), 100., 16)
+        self.assertRaises(ValueError, DeepZoomView, '0', '0', 1., (1, 8), 100., 16)
+        self.assertRaises(ValueError, DeepZoomView, '0', '0', 1., (8, 8), 100., 0)
+
+    def test_GivenAFractalView_When_get_deep_zoom_view_ThenItHasTheSameGrid(self):
+        view: Final = FractalView(FractalKind.mandelbrot, (-.75, -.73), (.1, .115), (41, 31), 100., 16)
+        deep_zoom_view: Final = get_deep_zoom_view(view)
+        np.testing.assert_allclose(deep_zoom_view.get_fractal_view().get_grid(), view.get_grid(), rtol=0, atol=1e-15)
+
+
+class Test_get_iterations_by_perturbation(unittest.TestCase):
+
+    def test_GivenAShallowZoom_When_get_iterations_by_perturbation_ThenResultIsAlmostTheSameAsWithFloat64(self):
+        for use_series_approximation in False, True:
+            view = DeepZoomView('-.74', '.11', .02, (80, 60), 100., 512)
+            iterations, _ = get_iterations_by_perturbation(view, use_series_approximation)
+            self.assertLess(np.count_nonzero(iterations != view.get_fractal_view().get_iterations()),
+                            .01 * iterations.size)
+
+    def test_GivenADeepZoom_When_get_iterations_by_perturbation_ThenResultMatchesArbitraryPrecision(self):
+        view: Final = DeepZoomView(deep_center_re, deep_center_im, 1e-18, (16, 12), 100., 8000)
+        iterations, stats = get_iterations_by_perturbation(view)
+        self.assertGreater(stats.precision, 18)
+        self.assertGreater(np.unique(iterations).size, 50)  # instead of a few blocks, as with float64
+        inc: Final = Decimal(view.get_increment())
+        pixels: Final = (0, 0), (0, 15), (11, 0), (11, 15), (6, 7), (3, 12)
+        num_matches: int = 0
+        for j, i in pixels:
+            c_re = view.center_re + (i - Decimal(15) / 2) * inc
+            c_im = view.center_im + (Decimal(11) / 2 - j) * inc
+            num_matches += iterations[j, i] == get_escape_iterations_in_decimal(c_re, c_im, view.magnitude, view.k_max)
+        self.assertGreaterEqual(num_matches, len(pixels) - 1)  # orbits this long are chaotic: allow a single miss
+
+    def test_GivenBands_When_generate_iterations_by_perturbation_ThenYieldTheSameCountsBandByBand(self):
+        view: Final = DeepZoomView(deep_center_re, deep_center_im, 1e-18, (16, 12), 100., 4000)
+        expected_iterations, expected_stats = get_iterations_by_perturbation(view)
+        bands: Final = generate_iterations_by_perturbation(view, 5)
+        tiles: Final[list] = []
+        try:
+            while True:
+                tile, iterations = next(bands)
+                tiles.append(tile)
+                j_0, j_1, i_0, i_1 = tile
+                np.testing.assert_array_equal(iterations, expected_iterations[j_0:j_1, i_0:i_1])
+        except StopIteration as stop:
+            stats = stop.value
+        self.assertEqual(tiles, [(0, 5, 0, 16), (5, 10, 0, 16), (10, 12, 0, 16)])
+        self.assertEqual(str(stats), str(expected_stats))
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,109 @@
+"""
+Run the tests by executing, for all test classes:
+
+  $ python -m unittest -v test_fractals_precision.py
+  or
+  $ python test_fractals_precision.py
+"""
+
+import numpy as np
+import pickle
+import unittest
+
+from fractals_engine import FractalKind, FractalView, KernelBackend
+from fractals_parallel import get_iterations_in_parallel
+from fractals_perturbation import get_deep_zoom_view, get_iterations_by_perturbation
+from fractals_precision import ArbitraryPrecisionView, Float32View, PrecisionBackend, \
+    get_iterations_in_arbitrary_precision, get_precision_digits, get_ulps_per_pixel, get_view_with_float32, \
+    needs_arbitrary_precision
+from typing import Final
+
+deep_center: Final = complex(-.7436438870371587, .1318259042053119)
+
+
+def get_deep_view_for_testing(half_width: float, res_xy: tuple[int, int] = (12, 12)) -> FractalView:
+    return FractalView(FractalKind.mandelbrot, (deep_center.real - half_width, deep_center.real + half_width),
+                       (deep_center.imag - half_width, deep_center.imag + half_width), res_xy, 100., 256)
+
+
+class Test_needs_arbitrary_precision(unittest.TestCase):
+
+    def test_GivenAShallowView_When_needs_arbitrary_precision_ThenReturnFalse(self):
+        self.assertFalse(needs_arbitrary_precision(get_deep_view_for_testing(1e-3)))
+
+    def test_GivenADeepView_When_needs_arbitrary_precision_ThenReturnTrue(self):
+        self.assertTrue(needs_arbitrary_precision(get_deep_view_for_testing(1e-14)))
+
+    def test_GivenDeeperViews_When_get_precision_digits_ThenMoreDigitsAreUsed(self):
+        self.assertLess(get_precision_digits(get_deep_view_for_testing(1e-3)),
+                        get_precision_digits(get_deep_view_for_testing(1e-14)))
+        self.assertGreater(get_precision_digits(get_deep_view_for_testing(1e-14)), 17)
+
+
+class Test_get_view_with_float32(unittest.TestCase):
+
+    def test_GivenTheDefaultJuliaView_When_get_view_with_float32_ThenUseFloat32(self):
+        view: Final = FractalView(FractalKind.julia, (-1.5, 1.5), (-1.5, 1.5), (64, 48), 100., 64,
+                                  complex(-.39054, -.58679))
+        float32_view, check = get_view_with_float32(view)
+        self.assertIsInstance(float32_view, Float32View)
+        self.assertTrue(check.use_float32)
+        self.assertEqual(check.num_samples, 64 * 48)
+        self.assertLessEqual(check.num_mismatches, .005 * check.num_samples)
+        iterations: Final = float32_view.get_iterations()
+        self.assertLessEqual(np.count_nonzero(iterations != view.get_iterations()), .005 * iterations.size)
+
+    def test_GivenASmallPixelSpacing_When_get_view_with_float32_ThenKeepFloat64WithoutSampling(self):
+        view: Final = get_deep_view_for_testing(1e-5)
+        self.assertLess(get_ulps_per_pixel(view, np.float32), 1024.)
+        float32_view, check = get_view_with_float32(view)
+        self.assertIs(float32_view, view)
+        self.assertEqual(check.num_samples, 0)
+
+    def test_GivenTooManyMismatchesOnTheSample_When_get_view_with_float32_ThenKeepFloat64(self):
+        view: Final = FractalView(FractalKind.mandelbrot, (-.76, -.72), (.08, .12), (64, 64), 100., 2048)
+        float32_view, check = get_view_with_float32(view, sample_size=256, max_mismatch_fraction=0.)
+        self.assertIs(float32_view, view)
+        self.assertGreater(check.num_mismatches, 0)
+        self.assertEqual(check.num_samples, 256)
+
+    def test_GivenAnotherKernelBackend_When_get_view_with_float32_ThenKeepFloat64(self):
+        view: Final = FractalView(FractalKind.mandelbrot, (-2.25, .75), (-1.5, 1.5), (8, 8), 100., 16,
+                                  kernel_backend=KernelBackend.pure)
+        self.assertIs(get_view_with_float32(view)[0], view)
+        self.assertRaises(ValueError, Float32View, view)
+
+    def test_GivenAFloat32View_When_computed_in_parallel_ThenResultIsAsInThisProcess(self):
+        view: Final = Float32View(FractalView(FractalKind.mandelbrot, (-2.25, .75), (-1.5, 1.5), (64, 48), 100., 64))
+        self.assertIsInstance(pickle.loads(pickle.dumps(view)), Float32View)
+        np.testing.assert_array_equal(get_iterations_in_parallel(view, 2, (16, 16), min_pixels=0),
+                                      view.get_iterations())
+
+
+class Test_get_iterations_in_arbitrary_precision(unittest.TestCase):
+
+    def test_GivenAShallowView_When_get_iterations_in_arbitrary_precision_ThenResultIsAlmostAsWithFloat64(self):
+        view: Final = FractalView(FractalKind.julia, (-1.5, 1.5), (-1.5, 1.5), (12, 10), 100., 64,
+                                  complex(-.39054, -.58679))
+        iterations, report = get_iterations_in_arbitrary_precision(view, PrecisionBackend.decimal, 1)
+        self.assertLessEqual(np.count_nonzero(iterations != view.get_iterations()), 2)
+        self.assertEqual((report.backend, report.num_pixels), (PrecisionBackend.decimal, 120))
+        self.assertGreater(report.get_microseconds_per_pixel(), 0.)
+
+    def test_GivenADeepView_When_get_iterations_in_arbitrary_precision_ThenResultMatchesPerturbation(self):
+        center: Final = complex(-.7455221565179205, .09457365449116711)
+        view: Final = FractalView(FractalKind.mandelbrot, (center.real - 3e-15, center.real + 3e-15),
+                                  (center.imag - 3e-15, center.imag + 3e-15), (10, 10), 100., 4000)
+        iterations, _ = get_iterations_in_arbitrary_precision(view, num_workers=2)
+        iterations_by_perturbation, _ = get_iterations_by_perturbation(get_deep_zoom_view(view))
+        self.assertGreaterEqual(np.count_nonzero(iterations == iterations_by_perturbation), 95)
+        self.assertLess(np.count_nonzero(iterations == view.get_iterations()), 50)  # float64 is not enough
+
+    def test_GivenAnArbitraryPrecisionView_When_pickled_ThenTheUnpickledViewIsEqual(self):
+        view: Final = ArbitraryPrecisionView(get_deep_view_for_testing(1e-14), PrecisionBackend.decimal)
+        unpickled: Final = pickle.loads(pickle.dumps(view))
+        self.assertEqual(unpickled.__dict__, view.__dict__)
+
+
+if __name__ == '__main__':
+    unittest.main()
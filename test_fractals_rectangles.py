@@ -0,0 +1,46 @@
+"""
+Run the tests by executing, for all test classes:
+
+  $ python -m unittest -v test_fractals_rectangles.py
+  or
+  $ python test_fractals_rectangles.py
+"""
+
+import numpy as np
+import unittest
+
+from fractals_engine import FractalKind, FractalView, get_int_colors
+from fractals_rectangles import get_color_rectangles, get_int_colors_of_rectangles, get_row_runs
+from typing import Final
+
+
+class Test_get_color_rectangles(unittest.TestCase):
+
+    def test_GivenRows_When_get_row_runs_ThenReturnTheMaximalRunsOfEachRow(self):
+        int_colors: Final = np.array([[3, 3, 1], [1, 1, 1]])
+        j, i_0, i_1, colors = get_row_runs(int_colors)
+        self.assertEqual(list(zip(j.tolist(), i_0.tolist(), i_1.tolist(), colors.tolist())),
+                         [(0, 0, 2, 3), (0, 2, 3, 1), (1, 0, 3, 1)])
+
+    def test_GivenAUniformImage_When_get_color_rectangles_ThenReturnASingleRectangle(self):
+        self.assertEqual(get_color_rectangles(np.full((4, 5), 7)), [(0, 4, 0, 5, 7)])
+
+    def test_GivenIdenticalRunsInConsecutiveRows_When_get_color_rectangles_ThenMergeThem(self):
+        int_colors: Final = np.array([[1, 2], [1, 2], [1, 1]])
+        self.assertEqual(sorted(get_color_rectangles(int_colors)), [(0, 2, 0, 1, 1), (0, 2, 1, 2, 2), (2, 3, 0, 2, 1)])
+
+    def test_GivenFractals_When_get_color_rectangles_ThenCoverEveryPixelExactlyOnceWithFarFewerRectangles(self):
+        for view in (FractalView(FractalKind.mandelbrot, (-2.25, .75), (-1.5, 1.5), (128, 96), 100., 64),
+                     FractalView(FractalKind.julia, (-1.5, 1.5), (-1.5, 1.5), (128, 96), 100., 64,
+                                 complex(-.39054, -.58679))):
+            with self.subTest(view=str(view)):
+                int_colors = get_int_colors(view.get_iterations(), 16)
+                rectangles = get_color_rectangles(int_colors)
+                np.testing.assert_array_equal(get_int_colors_of_rectangles(rectangles, view.res_xy), int_colors)
+                self.assertEqual(sum((j_1 - j_0) * (i_1 - i_0) for j_0, j_1, i_0, i_1, _ in rectangles),
+                                 int_colors.size)
+                self.assertLess(len(rectangles), int_colors.size / 5)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,54 @@
+"""
+Run the tests by executing, for all test classes:
+
+  $ python -m unittest -v test_fractals_subdivision.py
+  or
+  $ python test_fractals_subdivision.py
+"""
+
+import numpy as np
+import unittest
+
+from fractals_engine import FractalKind, FractalView
+from fractals_subdivision import get_iterations_by_subdivision, split_rectangle
+from typing import Final
+
+
+class Test_split_rectangle(unittest.TestCase):
+
+    def test_GivenARectangle_When_split_rectangle_ThenThePiecesCoverItAndShareTheirBorders(self):
+        covered: Final = np.zeros((9, 12), dtype=np.int32)
+        for j_0, j_1, i_0, i_1 in split_rectangle((0, 9, 0, 12)):
+            covered[j_0:j_1, i_0:i_1] += 1
+        self.assertTrue((covered >= 1).all())
+        self.assertEqual(covered[4, 6], 4)
+
+
+class Test_get_iterations_by_subdivision(unittest.TestCase):
+
+    def test_GivenTheDefaultMandelbrotView_When_get_iterations_by_subdivision_ThenMatchBruteForceWithFewerPixels(self):
+        view: Final = FractalView(FractalKind.mandelbrot, (-2.25, .75), (-1.5, 1.5), (256, 256), 100., 64)
+        iterations, num_computed_pixels = get_iterations_by_subdivision(view)
+        np.testing.assert_array_equal(iterations, view.get_iterations())
+        self.assertLess(num_computed_pixels, .75 * iterations.size)
+
+    def test_GivenAJuliaView_When_get_iterations_by_subdivision_ThenMatchBruteForce(self):
+        view: Final = FractalView(FractalKind.julia, (-1.5, 1.5), (-1.5, 1.5), (150, 100), 100., 16,
+                                  complex(-.39054, -.58679))
+        np.testing.assert_array_equal(get_iterations_by_subdivision(view)[0], view.get_iterations())
+
+    def test_GivenAViewFullyInsideTheSet_When_get_iterations_by_subdivision_ThenComputeOnlyTheBorder(self):
+        view: Final = FractalView(FractalKind.mandelbrot, (-.2, .1), (-.1, .1), (64, 48), 100., 64)
+        iterations, num_computed_pixels = get_iterations_by_subdivision(view)
+        self.assertTrue((iterations == 0).all())
+        self.assertEqual(num_computed_pixels, 2*64 + 2*46)
+
+    def test_GivenARegion_When_get_iterations_by_subdivision_ThenMatchBruteForceOnTheRegion(self):
+        view: Final = FractalView(FractalKind.mandelbrot, (-2.25, .75), (-1.5, 1.5), (128, 96), 100., 64)
+        iterations, num_computed_pixels = get_iterations_by_subdivision(view, region=(40, 72, 10, 100))
+        np.testing.assert_array_equal(iterations, view.get_iterations(40, 72, 10, 100))
+        self.assertLess(num_computed_pixels, iterations.size)
+
+
+if __name__ == '__main__':
+    unittest.main()
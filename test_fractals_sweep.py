@@ -0,0 +1,65 @@
+"""
+Run the tests by executing, for all test classes:
+
+  $ python -m unittest -v test_fractals_sweep.py
+  or
+  $ python test_fractals_sweep.py
+"""
+
+import numpy as np
+import os
+import tempfile
+import unittest
+
+from fractals_engine import FractalKind, FractalView
+from fractals_sweep import generate_julia_sweep, get_c_grid, get_julia_sweep, save_julia_sweep
+from typing import Final
+
+
+def get_window_for_testing(use_interior_checks: bool = False) -> FractalView:
+    return FractalView(FractalKind.julia, (-1.5, 1.5), (-1.5, 1.5), (40, 30), 100., 32,
+                       use_interior_checks=use_interior_checks)
+
+
+def get_julia_sets_one_by_one(window: FractalView, c_values: np.ndarray) -> np.ndarray:
+    return np.stack([FractalView(FractalKind.julia, window.re_min_max, window.im_min_max, window.res_xy,
+                                 window.magnitude, window.k_max, c, window.use_interior_checks).get_iterations()
+                     for c in c_values])
+
+
+class Test_get_c_grid(unittest.TestCase):
+
+    def test_GivenRanges_When_get_c_grid_ThenCornersMatchTheRanges(self):
+        c_values: Final = get_c_grid((-2., .5), (-1., 1.), (6, 5))
+        self.assertEqual((c_values.size, c_values[0], c_values[-1]), (30, complex(-2., 1.), complex(.5, -1.)))
+
+
+class Test_get_julia_sweep(unittest.TestCase):
+
+    def test_GivenSomeCValues_When_get_julia_sweep_ThenResultIsTheSameAsOneByOne(self):
+        c_values: Final = get_c_grid((-1., .4), (-.8, .8), (3, 3))
+        for use_interior_checks in False, True:
+            window = get_window_for_testing(use_interior_checks)
+            np.testing.assert_array_equal(get_julia_sweep(window, c_values, 1, 2),
+                                          get_julia_sets_one_by_one(window, c_values))
+
+    def test_GivenSeveralWorkers_When_generate_julia_sweep_ThenChunksAreYieldedInOrder(self):
+        c_values: Final = get_c_grid((-1., .4), (-.8, .8), (5, 4))
+        chunks: Final = list(generate_julia_sweep(get_window_for_testing(), c_values, 2, 3))
+        self.assertEqual([start for start, _ in chunks], list(range(0, 20, 3)))
+        np.testing.assert_array_equal(np.concatenate([chunk for _, chunk in chunks]),
+                                      get_julia_sets_one_by_one(get_window_for_testing(), c_values))
+
+    def test_GivenAPath_When_save_julia_sweep_ThenTheStackIsWrittenAsNpy(self):
+        c_values: Final = get_c_grid((-1., .4), (-.8, .8), (4, 2))
+        with tempfile.TemporaryDirectory() as directory:
+            path: Final = os.path.join(directory, 'sweep.npy')
+            save_julia_sweep(path, get_window_for_testing(), c_values, 1, 3)
+            np.testing.assert_array_equal(np.load(path), get_julia_sets_one_by_one(get_window_for_testing(), c_values))
+
+    def test_GivenAZeroChunkSize_When_get_julia_sweep_ThenExceptionIsRaised(self):
+        self.assertRaises(ValueError, get_julia_sweep, get_window_for_testing(), [0j], 1, 0)
+
+
+if __name__ == '__main__':
+    unittest.main()
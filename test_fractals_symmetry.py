@@ -0,0 +1,76 @@
+"""
+Run the tests by executing, for all test classes:
+
+  $ python -m unittest -v test_fractals_symmetry.py
+  or
+  $ python test_fractals_symmetry.py
+"""
+
+import numpy as np
+import unittest
+
+from fractals_engine import FractalKind, FractalView
+from fractals_symmetry import generate_iterations_with_symmetry, get_iterations_with_symmetry, get_mirror_indices
+from typing import Final
+
+
+class Test_get_mirror_indices(unittest.TestCase):
+
+    def test_GivenSymmetricSamples_When_get_mirror_indices_ThenReturnTheReversedIndices(self):
+        np.testing.assert_array_equal(get_mirror_indices(1.5, -.5, 7), [6, 5, 4, 3, 2, 1, 0])
+
+    def test_GivenPartiallySymmetricSamples_When_get_mirror_indices_ThenReturnMinus1ForTheUnmatchedOnes(self):
+        np.testing.assert_array_equal(get_mirror_indices(-.5, .25, 6), [4, 3, 2, 1, 0, -1])
+
+
+class Test_get_iterations_with_symmetry(unittest.TestCase):
+
+    def test_GivenTheDefaultMandelbrotView_When_get_iterations_with_symmetry_ThenComputeHalfAndMatchBruteForce(self):
+        view: Final = FractalView(FractalKind.mandelbrot, (-2.25, .75), (-1.5, 1.5), (40, 30), 100., 64)
+        iterations, num_computed_pixels = get_iterations_with_symmetry(view, 1)
+        np.testing.assert_array_equal(iterations, view.get_iterations())
+        self.assertEqual(num_computed_pixels, 40*15)
+
+    def test_GivenTheDefaultJuliaView_When_get_iterations_with_symmetry_ThenComputeHalfAndMatchBruteForce(self):
+        view: Final = FractalView(FractalKind.julia, (-1.5, 1.5), (-1.5, 1.5), (41, 31), 100., 64,
+                                  complex(-.39054, -.58679))
+        iterations, num_computed_pixels = get_iterations_with_symmetry(view, 1)
+        np.testing.assert_array_equal(iterations, view.get_iterations())
+        self.assertEqual(num_computed_pixels, 41*16)
+
+    def test_GivenAPartiallySymmetricMandelbrotView_When_get_iterations_with_symmetry_ThenMatchBruteForce(self):
+        view: Final = FractalView(FractalKind.mandelbrot, (-2.25, .75), (-.5, 1.5), (41, 31), 100., 64)
+        iterations, num_computed_pixels = get_iterations_with_symmetry(view, 1)
+        np.testing.assert_array_equal(iterations, view.get_iterations())
+        self.assertEqual(num_computed_pixels, 41*(31 - 8))
+
+    def test_GivenAnAsymmetricView_When_get_iterations_with_symmetry_ThenComputeEverything(self):
+        view: Final = FractalView(FractalKind.mandelbrot, (-2.25, .75), (.1, 1.5), (40, 30), 100., 64)
+        iterations, num_computed_pixels = get_iterations_with_symmetry(view, 1)
+        np.testing.assert_array_equal(iterations, view.get_iterations())
+        self.assertEqual(num_computed_pixels, 40*30)
+
+    def test_GivenAViewAnd2Workers_When_get_iterations_with_symmetry_ThenMatchBruteForce(self):
+        view: Final = FractalView(FractalKind.julia, (-1.5, 1.5), (-1.5, 1.5), (300, 260), 100., 32,
+                                  complex(-.39054, -.58679))
+        np.testing.assert_array_equal(get_iterations_with_symmetry(view, 2)[0], view.get_iterations())
+
+
+class Test_generate_iterations_with_symmetry(unittest.TestCase):
+
+    def test_GivenSymmetricViews_When_generate_iterations_with_symmetry_ThenCoverTheViewOnceAndMatchBruteForce(self):
+        for view in (FractalView(FractalKind.mandelbrot, (-2.25, .75), (-.5, 1.5), (41, 31), 100., 64),
+                     FractalView(FractalKind.julia, (-1.5, 1.5), (-1.5, 1.5), (41, 31), 100., 64,
+                                 complex(-.39054, -.58679))):
+            with self.subTest(kind=view.kind):
+                iterations = np.zeros((31, 41), dtype=np.int32)
+                covered = np.zeros((31, 41), dtype=np.int32)
+                for (j_0, j_1, i_0, i_1), tile_iterations in generate_iterations_with_symmetry(view, 1, (4, 16)):
+                    iterations[j_0:j_1, i_0:i_1] = tile_iterations
+                    covered[j_0:j_1, i_0:i_1] += 1
+                self.assertTrue((covered == 1).all())
+                np.testing.assert_array_equal(iterations, view.get_iterations())
+
+
+if __name__ == '__main__':
+    unittest.main()
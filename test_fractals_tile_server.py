@@ -0,0 +1,157 @@
+"""
+Run the tests by executing, for all test classes:
+
+  $ python -m unittest -v test_fractals_tile_server.py
+  or
+  $ python test_fractals_tile_server.py
+"""
+
+import concurrent.futures
+import numpy as np
+import os
+import tempfile
+import threading
+import unittest
+import urllib.error
+import urllib.request
+
+from fractals_colors import generate_rgb_palette, get_lookup_table
+from fractals_engine import FractalKind
+from fractals_precision import needs_arbitrary_precision
+from fractals_tile_server import TileRequestHandler, TileServer, TileService, get_default_k_max, get_max_k_max, \
+    get_tile_view, max_k_max_factor, max_zoom_level, tile_size
+from test_fractals_out_of_core import read_png
+from typing import Final
+from unittest import mock
+
+
+class Test_get_tile_view(unittest.TestCase):
+
+    def test_GivenTheTilesOfAZoomLevel_When_get_tile_view_ThenTheyFormTheGridOfTheWholeDomain(self):
+        centers: Final = (np.arange(2 * tile_size) + .5) * 3. / (2 * tile_size)  # of the pixels, in [0, 3]
+        expected: Final = (-2.25 + centers)[np.newaxis, :] + 1j * (1.5 - centers)[:, np.newaxis]
+        for x in 0, 1:
+            for y in 0, 1:
+                with self.subTest(x=x, y=y):
+                    grid = get_tile_view(FractalKind.mandelbrot, 1, x, y, 32).get_grid()
+                    np.testing.assert_allclose(grid, expected[y * tile_size:(y + 1) * tile_size,
+                                                              x * tile_size:(x + 1) * tile_size], atol=1e-12)
+
+    def test_GivenTilesOutOfRange_When_get_tile_view_ThenRaiseValueError(self):
+        self.assertRaises(ValueError, get_tile_view, FractalKind.julia, 1, 2, 0, 64)
+        self.assertRaises(ValueError, get_tile_view, FractalKind.julia, 1, 0, -1, 64)
+        self.assertRaises(ValueError, get_tile_view, FractalKind.julia, max_zoom_level + 1, 0, 0, 64)
+
+    def test_GivenTheDeepestZoomLevel_When_get_tile_view_ThenNoTileNeedsArbitraryPrecision(self):
+        last: Final = (1 << max_zoom_level) - 1
+        for kind in FractalKind:
+            for x, y in (0, 0), (0, last), (last, 0), (last, last), (last // 2, last // 2):
+                with self.subTest(kind=kind, x=x, y=y):
+                    self.assertFalse(needs_arbitrary_precision(get_tile_view(kind, max_zoom_level, x, y, 64)))
+
+
+class Test_TileServer(unittest.TestCase):
+
+    def setUp(self):
+        self.rgb_palette = generate_rgb_palette(16, 3, 1, 1)
+        self.directory = tempfile.TemporaryDirectory()
+        self.services: list[TileService] = []
+
+    def tearDown(self):
+        for service in self.services:
+            service.close()
+        self.directory.cleanup()
+
+    def start_server(self, cache_directory: str | None = None) -> tuple[TileService, str]:
+        """Serves on a free port of localhost, in a background thread, until the end of the test."""
+        service: Final = TileService(self.rgb_palette, cache_directory, num_workers=2)
+        self.services.append(service)
+        server: Final = TileServer(('127.0.0.1', 0), service)
+        thread: Final = threading.Thread(target=server.serve_forever, daemon=True)
+        thread.start()
+        self.addCleanup(thread.join)
+        self.addCleanup(server.server_close)
+        self.addCleanup(server.shutdown)
+        return service, f'http://127.0.0.1:{server.server_address[1]}'
+
+    def get(self, url: str) -> bytes:
+        with urllib.request.urlopen(url, timeout=30) as response:
+            self.assertEqual(response.headers['Content-Type'], 'image/png')
+            return response.read()
+
+    def get_expected_image(self, kind: FractalKind, z: int, x: int, y: int, k_max: int) -> np.ndarray:
+        view: Final = get_tile_view(kind, z, x, y, k_max)
+        return get_lookup_table(self.rgb_palette, k_max)[view.get_iterations()]
+
+    def test_GivenATileRequest_When_GET_ThenReturnThePngOfTheTile(self):
+        service, url = self.start_server()
+        for path, (kind, z, x, y, k_max) in (('/mandelbrot/0/0/0.png', (FractalKind.mandelbrot, 0, 0, 0, 64)),
+                                             ('/julia/2/1/3.png?k_max=48', (FractalKind.julia, 2, 1, 3, 48))):
+            with self.subTest(path=path):
+                png = self.get(url + path)
+                with tempfile.NamedTemporaryFile(suffix='.png', dir=self.directory.name, delete=False) as file:
+                    file.write(png)
+                np.testing.assert_array_equal(read_png(file.name), self.get_expected_image(kind, z, x, y, k_max))
+        self.assertEqual(get_default_k_max(0), 64)
+        self.assertEqual(service.num_rendered, 2)
+
+    def test_GivenARepeatedRequest_When_GET_ThenServeItFromTheMemoryCache(self):
+        service, url = self.start_server()
+        first: Final = self.get(url + '/mandelbrot/1/0/1.png')
+        self.assertEqual(self.get(url + '/mandelbrot/1/0/1.png'), first)
+        self.assertEqual(service.num_rendered, 1)
+        self.assertEqual(service.memory_cache.hits, 1)
+
+    def test_GivenARestartedServer_When_GET_ThenServeTheTileFromTheDiskCache(self):
+        first_service, first_url = self.start_server(self.directory.name)
+        first: Final = self.get(first_url + '/julia/1/1/1.png')
+        second_service, second_url = self.start_server(self.directory.name)
+        self.assertEqual(self.get(second_url + '/julia/1/1/1.png'), first)
+        self.assertEqual((first_service.num_rendered, second_service.num_rendered, second_service.num_disk_hits),
+                         (1, 0, 1))
+
+    def test_GivenConcurrentRequestsForTheSameTile_When_GET_ThenRenderItOnce(self):
+        service, url = self.start_server()
+        with concurrent.futures.ThreadPoolExecutor(8) as executor:
+            pngs = list(executor.map(self.get, [url + '/mandelbrot/3/2/3.png?k_max=2000'] * 8))
+        self.assertEqual(len(set(pngs)), 1)
+        self.assertEqual(service.num_rendered, 1)
+
+    def test_GivenInvalidRequests_When_GET_ThenReturn404(self):
+        _, url = self.start_server()
+        for path in '/', '/sierpinski/0/0/0.png', '/mandelbrot/1/2/0.png', '/mandelbrot/0/0/0.png?k_max=0', \
+                '/mandelbrot/0/0/0.png?k_max=many':
+            with self.subTest(path=path):
+                with self.assertRaises(urllib.error.HTTPError) as context:
+                    self.get(url + path)
+                self.assertEqual(context.exception.code, 404)
+                context.exception.close()
+
+    def test_GivenAKMaxAboveTheMaximum_When_GET_ThenReturn400WithoutRendering(self):
+        service, url = self.start_server()
+        with self.assertRaises(urllib.error.HTTPError) as context:
+            self.get(url + f'/mandelbrot/2/1/1.png?k_max={get_max_k_max(2) + 1}')
+        self.assertEqual(context.exception.code, 400)
+        context.exception.close()
+        self.assertEqual(service.num_rendered, 0)
+        self.assertEqual(get_max_k_max(2), max_k_max_factor * get_default_k_max(2))
+
+    def test_GivenARenderThatFails_When_GET_ThenReturn500(self):
+        service, url = self.start_server()
+        with mock.patch.object(service, 'get_tile', side_effect=RuntimeError('Broken pool')), \
+                mock.patch.object(TileRequestHandler, 'log_error') as log_error:
+            with self.assertRaises(urllib.error.HTTPError) as context:
+                self.get(url + '/mandelbrot/0/0/0.png')
+        self.assertEqual(context.exception.code, 500)
+        context.exception.close()
+        self.assertIn('Broken pool', repr(log_error.call_args_list[0]))
+
+    def test_GivenADiskCache_When_GET_ThenWriteTheTilesUnderAStyleDirectory(self):
+        service, url = self.start_server(self.directory.name)
+        self.get(url + '/mandelbrot/0/0/0.png')
+        self.assertTrue(os.path.exists(os.path.join(self.directory.name, service.get_style_digest(), 'mandelbrot',
+                                                    'k_max_64', '0', '0', '0.png')))
+
+
+if __name__ == '__main__':
+    unittest.main()